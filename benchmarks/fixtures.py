@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+"""
+Synthetic Brickset shaped data used by the benchmarks
+"""
+
+import json
+import random
+
+THEMES = ["Star Wars", "City", "Technic", "Creator Expert", "Friends", "Ninjago", "Harry Potter", "Duplo", "Ideas", "Marvel Super Heroes"]
+THEME_GROUPS = ["Licensed", "Modern day", "Technical", "Model making", "Junior", "Action/Adventure"]
+CATEGORIES = ["Normal", "Collection", "Gear", "Book", "Extended"]
+PACKAGING = ["Box", "Polybag", "Blister pack", "Foil pack", "None (loose parts)"]
+AVAILABILITY = ["Retail", "Retail - limited", "LEGO exclusive", "Promotional", "{Not specified}"]
+
+def makeSetJson(i:int, rng:random.Random|None=None):
+    """
+    Creates one getSets entry
+
+    Args:
+        i : set number, used as setID
+        rng : random generator, seeded with i when not given
+
+    Returns:
+        dict : json of a set as returned by getSets
+    """
+    rng = rng or random.Random(i)
+    theme = rng.choice(THEMES)
+    year = rng.randint(1990, 2024)
+    pieces = rng.randint(10, 7000) if rng.random() > 0.1 else None
+    def details():
+        if rng.random() < 0.3:
+            return {}
+        return {"retailPrice": round(rng.uniform(5, 800), 2), "dateFirstAvailable": f"{year}-0{rng.randint(1, 9)}-01T00:00:00Z", "dateLastAvailable": f"{year + rng.randint(0, 4)}-12-31T00:00:00Z"}
+    return {
+        "setID": i,
+        "number": str(10000 + i),
+        "numberVariant": 1,
+        "name": f"Synthetic set {i}",
+        "year": year,
+        "theme": theme,
+        "themeGroup": rng.choice(THEME_GROUPS),
+        "subtheme": f"{theme} subtheme {rng.randint(1, 12)}",
+        "category": rng.choice(CATEGORIES),
+        "released": True,
+        "pieces": pieces,
+        "minifigs": rng.randint(0, 12) if rng.random() > 0.3 else None,
+        "image": {"thumbnailURL": f"https://images.brickset.com/sets/small/{10000 + i}-1.jpg", "imageURL": f"https://images.brickset.com/sets/images/{10000 + i}-1.jpg"},
+        "bricksetURL": f"https://brickset.com/sets/{10000 + i}-1",
+        "collection": {},
+        "collections": {"ownedBy": rng.randint(0, 20000), "wantedBy": rng.randint(0, 8000)},
+        "LEGOCom": {"US": details(), "UK": details(), "CA": details(), "DE": details()},
+        "rating": round(rng.uniform(0, 5), 1),
+        "reviewCount": rng.randint(0, 40),
+        "packagingType": rng.choice(PACKAGING),
+        "availability": rng.choice(AVAILABILITY),
+        "instructionsCount": rng.randint(0, 8),
+        "additionalImageCount": rng.randint(0, 30),
+        "ageRange": {"min": rng.randint(4, 16)},
+        "dimensions": {"height": rng.uniform(5, 60), "width": rng.uniform(5, 60), "depth": rng.uniform(1, 20), "weight": rng.uniform(0.1, 10)} if rng.random() > 0.2 else {},
+        "barcode": {"EAN": str(5702010000000 + i), "UPC": str(673419000000 + i)},
+        "extendedData": {"tags": [theme, f"Tag{rng.randint(1, 200)}", f"Tag{rng.randint(1, 200)}"], "description": "Lorem ipsum dolor sit amet " * rng.randint(1, 10)},
+        "lastUpdated": f"{rng.randint(2015, 2024)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}T12:00:00.5Z",
+    }
+
+def makeSetsJson(count:int):
+    """
+    Creates a list of getSets entries
+
+    Args:
+        count : number of sets
+
+    Returns:
+        list[dict] : json of sets
+    """
+    rng = random.Random(count)
+    return [makeSetJson(i, rng) for i in range(count)]
+
+def makeSetsResponse(count:int):
+    """
+    Creates an encoded getSets response
+
+    Args:
+        count : number of sets in the response
+
+    Returns:
+        bytes : utf-8 encoded response body
+    """
+    return json.dumps({"status": "success", "matches": count, "sets": makeSetsJson(count)}).encode("utf-8")
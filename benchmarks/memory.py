@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+"""
+Memory footprint of Sets objects - slotted layout against the previous __dict__ based one,
+and shared string pool against separate copies of every categorical string
+
+Usage:
+    python -m benchmarks.memory [count]
+"""
+
+import gc
+import io
+import sys
+import tracemalloc
+
+from benchmarks.fixtures import makeSetsJson, makeSetsResponse
+from brickset.pool import StringPool
+from brickset.types import JsonDeserializable, Sets
+
+_unslottedTypes = {}
+
+def _unslotted(cls):
+    """
+    Returns twin of cls which keeps its attributes in a per-instance __dict__
+
+    Args:
+        cls : slotted class from brickset.types
+
+    Returns:
+        type : class without __slots__
+    """
+    twin = _unslottedTypes.get(cls)
+    if twin is None:
+        twin = _unslottedTypes[cls] = type(cls.__name__, (), {"__init__": cls.__init__})
+    return twin
+
+def toDictBacked(obj):
+    """
+    Copies object graph into instances with __dict__, the layout used before __slots__
+
+    Args:
+        obj : object from brickset.types
+
+    Returns:
+        object : the same data kept in __dict__ based objects
+    """
+    if not isinstance(obj, JsonDeserializable):
+        return obj
+    twin = object.__new__(_unslotted(type(obj)))
+    for name in type(obj).__slots__:
+        setattr(twin, name, toDictBacked(getattr(obj, name)))
+    return twin
+
+def measure(build, data):
+    """
+    Measures memory retained by objects built from data
+
+    Args:
+        build : function creating object from json dict
+        data : list of set json dicts
+
+    Returns:
+        int : number of retained bytes
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [build(obj) for obj in data]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return after - before
+
+class _NoPool:
+    """
+    Stand-in for StringPool keeping every string as it was parsed
+    """
+    @staticmethod
+    def intern(value):
+        return value
+
+def measureInterning(count:int):
+    """
+    Measures memory retained by sets loaded from a getSets response with and without the string pool
+
+    Args:
+        count : number of sets in the response
+
+    Returns:
+        tuple[int, int] : retained bytes with pool and without pool
+    """
+    response = makeSetsResponse(count)
+    pooled = measure(lambda pool: list(Sets.iter_from_stream(io.BytesIO(response), pool=pool)), [StringPool()])
+    unpooled = measure(lambda pool: list(Sets.iter_from_stream(io.BytesIO(response), pool=pool)), [_NoPool()])
+    return pooled, unpooled
+
+def main(count:int=10000):
+    """
+    Prints retained size of count sets for both layouts
+
+    Args:
+        count : number of sets to build
+    """
+    data = makeSetsJson(count)
+    slotted = measure(Sets.deJson, data)
+    dictBacked = measure(lambda obj: toDictBacked(Sets.deJson(obj)), data)
+    print(f"sets: {count}")
+    print(f"__dict__ layout: {dictBacked / 2**20:.2f} MiB ({dictBacked / count:.0f} B/set)")
+    print(f"__slots__ layout: {slotted / 2**20:.2f} MiB ({slotted / count:.0f} B/set)")
+    print(f"saved: {(dictBacked - slotted) / dictBacked:.1%}")
+    pooled, unpooled = measureInterning(count)
+    print(f"without string pool: {unpooled / 2**20:.2f} MiB ({unpooled / count:.0f} B/set)")
+    print(f"with string pool: {pooled / 2**20:.2f} MiB ({pooled / count:.0f} B/set)")
+    print(f"saved: {(unpooled - pooled) / 2**20:.2f} MiB ({(unpooled - pooled) / unpooled:.1%})")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark suite of brickset types - deserialization, memory, rendering and query throughput
+
+Every benchmark runs on synthetic catalogues of each size, the best of repeat runs is reported.
+Results are written as json; with --baseline the run is compared to an earlier result file and the
+exit status is 1 when any benchmark got slower than the threshold allows.
+
+Usage:
+    python -m benchmarks.suite [--sizes 1000,10000,100000] [--repeat 3] [--output results.json]
+                               [--baseline old.json] [--threshold 0.2]
+"""
+
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+
+from benchmarks.fixtures import THEMES, makeSetsJson
+from benchmarks.memory import measure
+from brickset.index import SetIndex
+from brickset.table import SetTable
+from brickset.types import Sets
+
+SIZES = (1000, 10000, 100000)
+
+def timeBest(function, repeat:int):
+    """
+    Measures the fastest of repeated runs
+
+    Args:
+        function : function without arguments
+        repeat : number of runs
+
+    Returns:
+        float : seconds of the fastest run
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+# index lookups run by lookups for every set
+LOOKUPS_PER_SET = 3
+
+def lookups(index:SetIndex, count:int):
+    """
+    Runs LOOKUPS_PER_SET mixed index lookups for every set
+
+    Args:
+        index : index of the catalogue
+        count : number of sets in the catalogue, lookups use every set number once
+    """
+    for i in range(count):
+        index.byNumber(str(10000 + i))
+        index.byTheme(THEMES[i % len(THEMES)])
+        index.byThemeYear(THEMES[i % len(THEMES)], 1990 + i % 35)
+
+def runSize(count:int, repeat:int):
+    """
+    Runs all benchmarks on catalogue of count sets
+
+    Args:
+        count : number of sets
+        repeat : number of runs of every benchmark
+
+    Returns:
+        list[dict] : one result per benchmark with name, size, seconds and operations per second
+    """
+    data = makeSetsJson(count)
+    response = json.dumps({"status": "success", "matches": count, "sets": data}).encode("utf-8")
+    sets = [Sets.deJson(obj) for obj in data]
+    table = SetTable.fromSets(sets)
+    index = SetIndex(sets)
+    benchmarks = {
+        "deJson": lambda: [Sets.deJson(obj) for obj in data],
+        "deJsonLazy": lambda: [Sets.deJson(obj, lazy=True) for obj in data],
+        "iterFromStream": lambda: list(Sets.iter_from_stream(io.BytesIO(response))),
+        "str": lambda: "\n".join(map(str, sets)),
+        "toJson": lambda: [s.to_json() for s in sets],
+        # encodings are kept in the sets, every run after the first one reuses them
+        "toJsonCached": lambda: [s.to_json(cache=True) for s in sets],
+        "tableBuild": lambda: SetTable.fromSets(sets),
+        # filters only combine selections, reading setID copies the matching rows
+        "filter": lambda: table.filter("theme", "==", "Star Wars").filter("year", ">=", 2010).filter("pieces", "<", 1000).setID,
+        "groupBy": lambda: table.groupBy(["theme", "year"], "pieces", "mean"),
+        "indexBuild": lambda: SetIndex(sets),
+        "indexLookup": lambda: lookups(index, count),
+    }
+    # operations of a run, one per set unless given
+    operations = {"indexLookup": LOOKUPS_PER_SET * count}
+    results = []
+    for name, function in benchmarks.items():
+        seconds = timeBest(function, repeat)
+        perSecond = operations.get(name, count) / seconds if seconds else None
+        results.append({"name": name, "size": count, "seconds": seconds, "perSecond": perSecond})
+    retained = measure(Sets.deJson, data)
+    results.append({"name": "memory", "size": count, "bytes": retained, "bytesPerSet": retained / count})
+    return results
+
+def compare(results:list, baseline:list, threshold:float):
+    """
+    Finds benchmarks which got worse than baseline
+
+    Args:
+        results : results of this run
+        baseline : results of earlier run
+        threshold : allowed relative slowdown, e.g. 0.2 for 20 %
+
+    Returns:
+        list[str] : description of every regression
+    """
+    previous = {(result["name"], result["size"]): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get((result["name"], result["size"]))
+        if old is None:
+            continue
+        metric = "bytes" if "bytes" in result else "seconds"
+        if old[metric] and result[metric] > old[metric] * (1 + threshold):
+            regressions.append(f"{result['name']}[{result['size']}] {metric}: {old[metric]:.6g} -> {result[metric]:.6g}")
+    return regressions
+
+def main(argv=None):
+    """
+    Runs the suite from the command line
+
+    Args:
+        argv : command line arguments, sys.argv when None
+
+    Returns:
+        int : exit status, 1 when a regression was found
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="comma separated numbers of sets")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of every benchmark")
+    parser.add_argument("--output", help="json file for results, printed to stdout when missing")
+    parser.add_argument("--baseline", help="json results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown")
+    args = parser.parse_args(argv)
+    results = []
+    for count in map(int, args.sizes.split(",")):
+        results.extend(runSize(count, args.repeat))
+    report = {"python": platform.python_version(), "platform": platform.platform(), "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=1)
+    else:
+        json.dump(report, sys.stdout, indent=1)
+        print()
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file)["results"], args.threshold)
+        for regression in regressions:
+            print(f"regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+
+import json
+import sqlite3
+import time
+
+DAY = 24 * 60 * 60
+
+DEFAULT_TTLS = {
+    "getThemes": 7 * DAY,
+    "getSubthemes": 7 * DAY,
+    "getYears": 7 * DAY,
+    "getSets": DAY,
+    "getInstructions": 7 * DAY,
+    "getReviews": DAY,
+    "getMinifigCollection": 60,
+}
+
+class CacheEntry:
+    """
+    Cached response of one API call
+
+    Attributes:
+        key : str
+            method and arguments of the call
+        body : bytes
+            raw response body
+        etag : str ?
+            ETag returned by the server
+        fresh : bool
+            check if the entry is younger than its TTL
+    """
+    __slots__ = ("key", "body", "etag", "fresh")
+    def __init__(self, key:str, body:bytes, etag:str|None, fresh:bool):
+        """
+        Initialization of CacheEntry class
+
+        Args:
+            key : method and arguments of the call
+            body : raw response body
+            etag : ETag returned by the server
+            fresh : check if the entry is younger than its TTL
+        """
+        self.key = key
+        self.body = body
+        self.etag = etag
+        self.fresh = fresh
+    def data(self):
+        """
+        Parses cached body
+
+        Returns:
+            dict : parsed response
+        """
+        return json.loads(self.body)
+    def __str__(self):
+        """
+        String interpretation of CacheEntry class
+
+        Returns:
+            str : key of the entry
+        """
+        return self.key
+
+class ResponseCache:
+    """
+    Persistent cache of API responses stored in SQLite
+
+    Entries are keyed by method and arguments (without apiKey) and expire after a TTL set per method.
+    Calls made with userHash use userTTL because they contain user data. When the total size exceeds
+    maxBytes the least recently used entries are evicted. Expired entries are kept until evicted so they
+    can be revalidated with their ETag.
+
+    Attributes:
+        ttls : dict[str, float]
+            TTL in seconds by method, methods without TTL are not cached
+        userTTL : float
+            TTL in seconds of calls made with userHash
+        maxBytes : int
+            maximal total size of cached bodies
+        hits : int
+            number of lookups answered by a fresh entry
+        misses : int
+            number of lookups without a fresh entry
+        evictions : int
+            number of entries removed to free space
+        revalidations : int
+            number of expired entries confirmed unchanged by the server
+    """
+    def __init__(self, path:str=":memory:", maxBytes:int=256 * 2**20, ttls:dict|None=None, userTTL:float=60):
+        """
+        Initialization of ResponseCache class
+
+        Args:
+            path : path of the SQLite database
+            maxBytes : maximal total size of cached bodies
+            ttls : TTL in seconds by method, DEFAULT_TTLS when None
+            userTTL : TTL in seconds of calls made with userHash
+        """
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.userTTL = userTTL
+        self.maxBytes = maxBytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revalidations = 0
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, expires REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    def ttl(self, method:str, arguments:dict):
+        """
+        Returns TTL of a call
+
+        Args:
+            method : name of API method
+            arguments : arguments of the method
+
+        Returns:
+            float : TTL in seconds, 0 when the call is not cached
+        """
+        ttl = self.ttls.get(method, 0)
+        if ttl and arguments.get("userHash"):
+            return min(ttl, self.userTTL)
+        return ttl
+    @staticmethod
+    def key(method:str, arguments:dict):
+        """
+        Returns cache key of a call
+
+        Args:
+            method : name of API method
+            arguments : arguments of the method
+
+        Returns:
+            str : method and canonical json of arguments without apiKey
+        """
+        canonical = {name: value for name, value in arguments.items() if name != "apiKey"}
+        return method + json.dumps(canonical, sort_keys=True, default=str)
+    def lookup(self, method:str, arguments:dict):
+        """
+        Finds cached response of a call, updating hit and miss counters
+
+        Args:
+            method : name of API method
+            arguments : arguments of the method
+
+        Returns:
+            CacheEntry ? : cached response, may be expired
+        """
+        if not self.ttl(method, arguments):
+            return None
+        key = self.key(method, arguments)
+        row = self._db.execute("SELECT body, etag, expires FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        now = time.time()
+        fresh = row[2] > now
+        if fresh:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        return CacheEntry(key, row[0], row[1], fresh)
+    def store(self, method:str, arguments:dict, body:bytes, etag:str|None=None):
+        """
+        Stores response of a call and evicts least recently used entries when the cache is full
+
+        Args:
+            method : name of API method
+            arguments : arguments of the method
+            body : raw response body
+            etag : ETag returned by the server
+        """
+        ttl = self.ttl(method, arguments)
+        if not ttl or len(body) > self.maxBytes:
+            return
+        key = self.key(method, arguments)
+        now = time.time()
+        db = self._db
+        db.execute("BEGIN")
+        try:
+            old = db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)", (key, body, etag, now + ttl, now, len(body)))
+            self._size += len(body) - (old[0] if old else 0)
+            while self._size > self.maxBytes:
+                oldest = db.execute("SELECT key, size FROM responses WHERE key != ? ORDER BY accessed LIMIT 1", (key,)).fetchone()
+                db.execute("DELETE FROM responses WHERE key = ?", (oldest[0],))
+                self._size -= oldest[1]
+                self.evictions += 1
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            self._size = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            raise
+    def revalidated(self, method:str, arguments:dict, entry:CacheEntry):
+        """
+        Extends lifetime of an expired entry the server confirmed as unchanged
+
+        Args:
+            method : name of API method
+            arguments : arguments of the method
+            entry : entry returned by lookup
+        """
+        self.revalidations += 1
+        self._db.execute("UPDATE responses SET expires = ? WHERE key = ?", (time.time() + self.ttl(method, arguments), entry.key))
+    def invalidate(self, method:str|None=None):
+        """
+        Removes cached responses
+
+        Args:
+            method : name of API method, all entries when None
+        """
+        if method is None:
+            self._db.execute("DELETE FROM responses")
+        else:
+            self._db.execute("DELETE FROM responses WHERE key LIKE ?", (method + "{%",))
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    @property
+    def size(self):
+        """
+        Total size of cached bodies
+
+        Returns:
+            int : size in bytes
+        """
+        return self._size
+    @property
+    def hitRatio(self):
+        """
+        Share of lookups answered from the cache
+
+        Returns:
+            float : hits divided by lookups, 0 before the first lookup
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+    def close(self):
+        """
+        Closes the database
+        """
+        self._db.close()
+    def __str__(self):
+        """
+        String interpretation of ResponseCache class
+
+        Returns:
+            str : counters of the cache
+        """
+        return f"{self.size} bytes, {self.hits} hits, {self.misses} misses, {self.evictions} evictions"
@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from collections import deque
+import json
+import ssl
+from time import perf_counter
+from urllib.parse import urlencode, urlsplit
+
+from brickset.connection import ConnectionPool
+from brickset.types import ApiKeyUsage, Instructions, MinifigCollection, Reviews, Sets, Subthemes, Themes, UserMinifigNotes, Years
+
+class BricksetError(Exception):
+    """
+    Error returned by Brickset API
+    """
+
+class BricksetClient:
+    """
+    Asynchronous client of Brickset API v3
+
+    Requests go over a pool of keep-alive connections and at most concurrency requests run at once.
+
+    Attributes:
+        apiKey : str
+            Brickset API key
+        userHash : str
+            hash of logged in user, empty for anonymous calls
+        scheduler : RequestScheduler ?
+            picks API key and rate limits requests, apiKey is used for every request when None
+        cache : ResponseCache ?
+            answers repeated calls without network round trip
+        metrics : Metrics ?
+            records latency, sizes, cache outcomes and quota, nothing is measured when None
+    """
+    BASE_URL = "https://brickset.com/api/v3.asmx"
+
+    def __init__(self, apiKey:str, userHash:str="", baseURL:str=BASE_URL, maxConnections:int=4, pipelineDepth:int=1, concurrency:int=8, scheduler=None, cache=None, metrics=None):
+        """
+        Initialization of BricksetClient class
+
+        Args:
+            apiKey : Brickset API key
+            userHash : hash of logged in user, empty for anonymous calls
+            baseURL : URL of the API
+            maxConnections : maximal number of opened connections
+            pipelineDepth : maximal number of requests sent on one connection before their responses arrive
+            concurrency : maximal number of requests running at once
+            scheduler : RequestScheduler picking API key for every request
+            cache : ResponseCache storing responses
+            metrics : Metrics recording measurements
+        """
+        self.apiKey = apiKey
+        self.userHash = userHash
+        self.scheduler = scheduler
+        self.cache = cache
+        self.metrics = metrics
+        url = urlsplit(baseURL)
+        secure = url.scheme == "https"
+        self._path = url.path.rstrip("/")
+        self._pool = ConnectionPool(url.hostname, url.port or (443 if secure else 80), ssl.create_default_context() if secure else None, maxConnections, pipelineDepth)
+        self._semaphore = asyncio.Semaphore(concurrency)
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    async def close(self):
+        """
+        Closes all connections of the client
+        """
+        await self._pool.close()
+    async def request(self, method:str, useCache:bool=True, **arguments):
+        """
+        Calls API method
+
+        Args:
+            method : name of API method, e.g. getSets
+            useCache : check if a cached response may be returned, the response is cached either way
+            arguments : arguments of the method, dicts are sent as json; apiKey bypasses the scheduler
+
+        Returns:
+            dict : parsed response
+        """
+        cache = self.cache
+        metrics = self.metrics
+        entry = None
+        headers = None
+        if cache is not None and useCache:
+            entry = cache.lookup(method, arguments)
+            if entry is not None:
+                if entry.fresh:
+                    if metrics is not None:
+                        metrics.observeCache(method, "hit")
+                    return entry.data()
+                if entry.etag:
+                    headers = {"If-None-Match": entry.etag}
+        query = {"apiKey": self.apiKey}
+        for name, value in arguments.items():
+            query[name] = json.dumps(value) if isinstance(value, dict) else value
+        scheduler = self.scheduler
+        if scheduler is not None and "apiKey" not in arguments:
+            query["apiKey"] = await scheduler.acquire()
+        target = f"{self._path}/{method}?{urlencode(query)}"
+        async with self._semaphore:
+            start = perf_counter() if metrics is not None else 0.0
+            response = await self._pool.request("GET", target, headers)
+        if metrics is not None:
+            metrics.observeRequest(method, perf_counter() - start, response.status, len(response.body), query["apiKey"])
+            if cache is not None and cache.ttl(method, arguments):
+                metrics.observeCache(method, "revalidated" if response.status == 304 and entry is not None else "miss")
+        if response.status == 304 and entry is not None:
+            cache.revalidated(method, arguments, entry)
+            return entry.data()
+        if response.status != 200:
+            raise BricksetError(f"{method} failed with HTTP {response}")
+        data = json.loads(response.body)
+        if data.get("status") != "success":
+            message = data.get("message") or f"{method} failed"
+            if scheduler is not None and "limit" in message.lower():
+                scheduler.markExhausted(query["apiKey"])
+            raise BricksetError(message)
+        if cache is not None:
+            cache.store(method, arguments, response.body, response.headers.get("etag"))
+        if metrics is not None and method == "getKeyUsageStats":
+            metrics.observeKeyUsage(query["apiKey"], [ApiKeyUsage.deJson(obj) for obj in data.get("apiKeyUsage", ())])
+        return data
+    def _deJson(self, cls, objs):
+        """
+        Deserializes list of json objects, timed when metrics are recorded
+
+        Args:
+            cls : class from brickset.types
+            objs : json objects of the response
+
+        Returns:
+            list : deserialized objects
+        """
+        metrics = self.metrics
+        if metrics is None:
+            return [cls.deJson(obj) for obj in objs]
+        start = perf_counter()
+        result = [cls.deJson(obj) for obj in objs]
+        metrics.observeDeserialization(cls.__name__, perf_counter() - start, len(result))
+        return result
+    async def getSets(self, **params):
+        """
+        Finds sets, see getSets documentation for available params
+
+        Args:
+            params : query parameters, e.g. theme, year, pageSize, pageNumber
+
+        Returns:
+            list[Sets] : matching sets
+        """
+        data = await self.request("getSets", userHash=self.userHash, params=params)
+        return self._deJson(Sets, data.get("sets", ()))
+    async def getAllSets(self, pageSize:int=500, **params):
+        """
+        Finds sets on all pages, pages after the first one are fetched concurrently
+
+        Args:
+            pageSize : number of sets on one page
+            params : query parameters, e.g. theme, year
+
+        Returns:
+            list[Sets] : matching sets in page order
+        """
+        first = await self.request("getSets", userHash=self.userHash, params=dict(params, pageSize=pageSize, pageNumber=1))
+        pageCount = -(-first.get("matches", 0) // pageSize)
+        pages = await asyncio.gather(*(self.getSets(**params, pageSize=pageSize, pageNumber=page) for page in range(2, pageCount + 1)))
+        sets = self._deJson(Sets, first.get("sets", ()))
+        for page in pages:
+            sets.extend(page)
+        return sets
+    async def iterSets(self, pageSize:int=500, prefetch:int=2, **params):
+        """
+        Yields sets from all pages, fetching up to prefetch next pages in the background.
+        No more than prefetch pages are buffered, so a slow consumer does not cause unbounded buffering.
+
+        Args:
+            pageSize : number of sets on one page
+            prefetch : number of pages fetched ahead of the page being consumed, with 0 every page is requested
+                when the consumer reaches it
+            params : query parameters, e.g. theme, year
+
+        Returns:
+            async generator : Sets in page order
+        """
+        first = await self.request("getSets", userHash=self.userHash, params=dict(params, pageSize=pageSize, pageNumber=1))
+        pageCount = -(-first.get("matches", 0) // pageSize)
+        pending = deque()
+        nextPage = 2
+        def schedule():
+            nonlocal nextPage
+            while nextPage <= pageCount and len(pending) < prefetch:
+                pending.append(asyncio.ensure_future(self.getSets(**params, pageSize=pageSize, pageNumber=nextPage)))
+                nextPage += 1
+        try:
+            schedule()
+            for s in self._deJson(Sets, first.get("sets", ())):
+                yield s
+            while pending or nextPage <= pageCount:
+                if not pending:
+                    pending.append(asyncio.ensure_future(self.getSets(**params, pageSize=pageSize, pageNumber=nextPage)))
+                    nextPage += 1
+                page = await pending.popleft()
+                schedule()
+                for s in page:
+                    yield s
+        finally:
+            for task in pending:
+                task.cancel()
+    async def getThemes(self, useCache:bool=True):
+        """
+        Returns all themes
+
+        Args:
+            useCache : check if a cached response may be returned
+
+        Returns:
+            list[Themes] : themes
+        """
+        data = await self.request("getThemes", useCache)
+        return self._deJson(Themes, data.get("themes", ()))
+    async def getSubthemes(self, theme:str):
+        """
+        Returns subthemes of theme
+
+        Args:
+            theme : name of theme
+
+        Returns:
+            list[Subthemes] : subthemes
+        """
+        data = await self.request("getSubthemes", Theme=theme)
+        return self._deJson(Subthemes, data.get("subthemes", ()))
+    async def getYears(self, theme:str):
+        """
+        Returns years in which theme was produced
+
+        Args:
+            theme : name of theme
+
+        Returns:
+            list[Years] : years with number of sets
+        """
+        data = await self.request("getYears", Theme=theme)
+        return self._deJson(Years, data.get("years", ()))
+    async def getReviews(self, setID:int):
+        """
+        Returns reviews of set
+
+        Args:
+            setID : ID of Lego set
+
+        Returns:
+            list[Reviews] : reviews
+        """
+        data = await self.request("getReviews", setID=setID)
+        return self._deJson(Reviews, data.get("reviews", ()))
+    async def getInstructions(self, setID:int):
+        """
+        Returns building instructions of set
+
+        Args:
+            setID : ID of Lego set
+
+        Returns:
+            list[Instructions] : instructions
+        """
+        data = await self.request("getInstructions", setID=setID)
+        return self._deJson(Instructions, data.get("instructions", ()))
+    async def setCollection(self, setID:int, **params):
+        """
+        Changes set in the user's collection
+
+        Args:
+            setID : ID of Lego set
+            params : changed values, own, want (0 or 1), qtyOwned, notes or rating
+        """
+        await self.request("setCollection", userHash=self.userHash, SetID=setID, params=params)
+    async def getMinifigCollection(self, **params):
+        """
+        Returns minifigs owned or wanted by the user
+
+        Args:
+            params : query parameters, e.g. owned, wanted, query
+
+        Returns:
+            list[MinifigCollection] : minifigs
+        """
+        data = await self.request("getMinifigCollection", userHash=self.userHash, params=params)
+        return self._deJson(MinifigCollection, data.get("minifigs", ()))
+    async def getUserMinifigNotes(self):
+        """
+        Returns notes of the user about minifigs
+
+        Returns:
+            list[UserMinifigNotes] : notes
+        """
+        data = await self.request("getUserMinifigNotes", userHash=self.userHash)
+        return self._deJson(UserMinifigNotes, data.get("userMinifigNotes", ()))
+    async def setMinifigCollection(self, minifigNumber:str, **params):
+        """
+        Changes minifig in the user's collection
+
+        Args:
+            minifigNumber : number of minifig, e.g. sw0001
+            params : changed values, own, want (0 or 1), qtyOwned or notes
+        """
+        await self.request("setMinifigCollection", userHash=self.userHash, minifigNumber=minifigNumber, params=params)
+    async def getKeyUsageStats(self):
+        """
+        Returns usage of the API key in last days
+
+        Returns:
+            list[ApiKeyUsage] : number of calls per day
+        """
+        data = await self.request("getKeyUsageStats")
+        return self._deJson(ApiKeyUsage, data.get("apiKeyUsage", ()))
+    def __str__(self):
+        """
+        String interpretation of BricksetClient class
+
+        Returns:
+            str : URL of the API
+        """
+        return f"Brickset client for {self._pool.host}{self._path}"
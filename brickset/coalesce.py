@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+
+class CoalescingClient:
+    """
+    Single-flight layer in front of BricksetClient
+
+    Identical calls running at the same time share one upstream request and its deserialized result,
+    so callers must not modify returned objects. Lookups of single sets by getSet are collected for window
+    seconds (or until maxBatch of them wait) and fetched by one getSets call with a list of setIDs.
+
+    Attributes:
+        client : BricksetClient
+            client sending the requests
+        window : float
+            seconds getSet waits for other lookups before the batch is sent
+        maxBatch : int
+            maximal number of setIDs in one getSets call
+        upstreamCalls : int
+            number of calls sent to client
+        coalesced : int
+            number of calls answered by a call already in flight
+    """
+    def __init__(self, client, window:float=0.002, maxBatch:int=100):
+        """
+        Initialization of CoalescingClient class
+
+        Args:
+            client : BricksetClient sending the requests
+            window : seconds getSet waits for other lookups before the batch is sent
+            maxBatch : maximal number of setIDs in one getSets call
+        """
+        self.client = client
+        self.window = window
+        self.maxBatch = maxBatch
+        self.upstreamCalls = 0
+        self.coalesced = 0
+        self._flights = {}
+        self._lookups = {}
+        self._batch = []
+        self._timer = None
+        self._batches = set()
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    async def close(self):
+        """
+        Sends waiting lookups and closes the client
+        """
+        if self._batch:
+            self._flush()
+        if self._batches:
+            await asyncio.wait(self._batches)
+        await self.client.close()
+    async def _shared(self, key:tuple, call):
+        """
+        Joins call in flight with the same key or starts a new one
+
+        Args:
+            key : identity of the call
+            call : function returning coroutine of the upstream call
+
+        Returns:
+            result of the shared call
+        """
+        task = self._flights.get(key)
+        if task is None:
+            self.upstreamCalls += 1
+            task = self._flights[key] = asyncio.ensure_future(call())
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+        else:
+            self.coalesced += 1
+        # a cancelled caller must not cancel the call shared with others
+        return await asyncio.shield(task)
+    async def request(self, method:str, **arguments):
+        """
+        Calls API method, see BricksetClient.request
+
+        Args:
+            method : name of API method, e.g. getSets
+            arguments : arguments of the method
+
+        Returns:
+            dict : parsed response
+        """
+        return await self._shared(("request", method, _key(arguments)), lambda: self.client.request(method, **arguments))
+    async def getSet(self, setID:int):
+        """
+        Finds one set, lookups arriving within window are sent as one getSets call
+
+        Args:
+            setID : ID of Lego set
+
+        Returns:
+            Sets ? : found set
+        """
+        future = self._lookups.get(setID)
+        if future is None:
+            future = self._lookups[setID] = asyncio.get_running_loop().create_future()
+            self._batch.append(setID)
+            if len(self._batch) >= self.maxBatch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+    def _flush(self):
+        """
+        Sends waiting lookups as one batch
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        setIDs, self._batch = self._batch, []
+        self.upstreamCalls += 1
+        task = asyncio.ensure_future(self._fetchBatch(setIDs))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+    async def _fetchBatch(self, setIDs:list):
+        """
+        Fetches batch of sets and resolves their lookups
+
+        Args:
+            setIDs : IDs of Lego sets
+        """
+        found = error = None
+        try:
+            sets = await self.client.getSets(setID=",".join(map(str, setIDs)), pageSize=len(setIDs))
+            found = {s.setID: s for s in sets}
+        except Exception as e:
+            error = e
+        finally:
+            # lookups are cancelled when the batch is cancelled, so no caller waits forever
+            for setID in setIDs:
+                future = self._lookups.pop(setID)
+                if found is not None:
+                    future.set_result(found.get(setID))
+                elif error is not None:
+                    future.set_exception(error)
+                else:
+                    future.cancel()
+    async def getSets(self, **params):
+        """
+        Finds sets, see BricksetClient.getSets
+
+        Args:
+            params : query parameters
+
+        Returns:
+            list[Sets] : matching sets
+        """
+        return await self._shared(("getSets", _key(params)), lambda: self.client.getSets(**params))
+    async def getThemes(self, useCache:bool=True):
+        """
+        Returns all themes
+
+        Args:
+            useCache : check if a cached response may be returned
+
+        Returns:
+            list[Themes] : themes
+        """
+        return await self._shared(("getThemes", useCache), lambda: self.client.getThemes(useCache))
+    async def getSubthemes(self, theme:str):
+        """
+        Returns subthemes of theme
+
+        Args:
+            theme : name of theme
+
+        Returns:
+            list[Subthemes] : subthemes
+        """
+        return await self._shared(("getSubthemes", theme), lambda: self.client.getSubthemes(theme))
+    async def getYears(self, theme:str):
+        """
+        Returns years in which theme was produced
+
+        Args:
+            theme : name of theme
+
+        Returns:
+            list[Years] : years with number of sets
+        """
+        return await self._shared(("getYears", theme), lambda: self.client.getYears(theme))
+    async def getReviews(self, setID:int):
+        """
+        Returns reviews of set
+
+        Args:
+            setID : ID of Lego set
+
+        Returns:
+            list[Reviews] : reviews
+        """
+        return await self._shared(("getReviews", setID), lambda: self.client.getReviews(setID))
+    async def getInstructions(self, setID:int):
+        """
+        Returns building instructions of set
+
+        Args:
+            setID : ID of Lego set
+
+        Returns:
+            list[Instructions] : instructions
+        """
+        return await self._shared(("getInstructions", setID), lambda: self.client.getInstructions(setID))
+    def __str__(self):
+        """
+        String interpretation of CoalescingClient class
+
+        Returns:
+            str : wrapped client
+        """
+        return f"Coalescing {self.client}"
+
+def _key(arguments:dict):
+    return json.dumps(arguments, sort_keys=True, default=str)
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+class Response:
+    """
+    HTTP response
+
+    Attributes:
+        status : int
+            HTTP status code
+        reason : str
+            HTTP reason phrase
+        headers : dict[str, str]
+            response headers, names are lower case
+        body : bytes
+            response body, empty when it was passed to a sink
+    """
+    __slots__ = ("status", "reason", "headers", "body")
+    def __init__(self, status:int, reason:str, headers:dict, body:bytes):
+        """
+        Initialization of Response class
+
+        Args:
+            status : HTTP status code
+            reason : HTTP reason phrase
+            headers : response headers, names are lower case
+            body : response body
+        """
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+    def __str__(self):
+        """
+        String interpretation of Response class
+
+        Returns:
+            str : status line
+        """
+        return f"{self.status} {self.reason}"
+
+class HttpConnection:
+    """
+    Keep-alive HTTP/1.1 connection with request pipelining
+
+    Requests are written as soon as they are made and responses are read in the same order.
+
+    Attributes:
+        closed : bool
+            check if connection can not be used anymore
+        load : int
+            number of requests currently assigned to the connection
+    """
+    __slots__ = ("_reader", "_writer", "_lastRead", "closed", "load")
+    def __init__(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter):
+        """
+        Initialization of HttpConnection class
+
+        Args:
+            reader : stream of the opened socket
+            writer : stream of the opened socket
+        """
+        self._reader = reader
+        self._writer = writer
+        self._lastRead = None
+        self.closed = False
+        self.load = 0
+    async def request(self, raw:bytes, sink=None):
+        """
+        Sends request and waits for its response
+
+        Args:
+            raw : encoded request
+            sink : callable taking status and headers and returning callable receiving body chunks, or None to keep body in memory
+
+        Returns:
+            Response : response to the request
+        """
+        if self.closed:
+            raise ConnectionError("Connection is closed")
+        previous = self._lastRead
+        done = asyncio.get_running_loop().create_future()
+        self._lastRead = done
+        try:
+            self._writer.write(raw)
+            await self._writer.drain()
+            # responses come back in the order requests were written
+            if previous is not None and not await previous:
+                raise ConnectionError("Connection was closed by previous request")
+            response = await self._readResponse(sink)
+            done.set_result(not self.closed)
+            return response
+        except BaseException:
+            self.close()
+            if not done.done():
+                done.set_result(False)
+            raise
+    async def _readResponse(self, sink):
+        """
+        Reads one response from the connection
+
+        Args:
+            sink : callable taking status and headers and returning callable receiving body chunks, or None to keep body in memory
+
+        Returns:
+            Response : parsed response
+        """
+        reader = self._reader
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("Connection closed by server")
+            parts = line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+            status = int(parts[1])
+            reason = parts[2] if len(parts) > 2 else ""
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if status >= 200 or status == 101:
+                break
+        chunks = []
+        write = None if sink is None else sink(status, headers)
+        if write is None:
+            write = chunks.append
+        if status in (204, 304):
+            pass
+        elif "content-length" in headers:
+            remaining = int(headers["content-length"])
+            while remaining:
+                chunk = await reader.read(min(remaining, 65536))
+                if not chunk:
+                    raise ConnectionError("Connection closed while reading body")
+                remaining -= len(chunk)
+                write(chunk)
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if not size:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                write(await reader.readexactly(size))
+                await reader.readline()
+        else:
+            while chunk := await reader.read(65536):
+                write(chunk)
+            self.closed = True
+        if headers.get("connection", "").lower() == "close":
+            self.closed = True
+        return Response(status, reason, headers, b"".join(chunks))
+    def close(self):
+        """
+        Closes the connection
+        """
+        self.closed = True
+        self._writer.close()
+
+class ConnectionPool:
+    """
+    Pool of keep-alive connections to one host
+
+    Attributes:
+        host : str
+            name of the server
+        port : int
+            port of the server
+        maxConnections : int
+            maximal number of opened connections
+        pipelineDepth : int
+            maximal number of requests sent on one connection before their responses arrive
+    """
+    __slots__ = ("host", "port", "ssl", "maxConnections", "pipelineDepth", "_connections", "_opening", "_condition")
+    def __init__(self, host:str, port:int, ssl=None, maxConnections:int=4, pipelineDepth:int=1):
+        """
+        Initialization of ConnectionPool class
+
+        Args:
+            host : name of the server
+            port : port of the server
+            ssl : ssl context, plain connection when None
+            maxConnections : maximal number of opened connections
+            pipelineDepth : maximal number of requests sent on one connection before their responses arrive
+        """
+        self.host = host
+        self.port = port
+        self.ssl = ssl
+        self.maxConnections = maxConnections
+        self.pipelineDepth = pipelineDepth
+        self._connections = []
+        # number of connections being opened, their slots are reserved
+        self._opening = 0
+        self._condition = None
+    async def _acquire(self):
+        """
+        Returns connection for the next request, opening a new one or waiting when needed.
+        A new connection is opened without holding the lock, so other requests can use idle connections meanwhile.
+
+        Returns:
+            HttpConnection : connection with reserved slot
+        """
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            while True:
+                self._connections = [c for c in self._connections if not c.closed]
+                best = min(self._connections, key=lambda c: c.load, default=None)
+                if best is not None and not best.load:
+                    break
+                if len(self._connections) + self._opening < self.maxConnections:
+                    self._opening += 1
+                    best = None
+                    break
+                if best is not None and best.load < self.pipelineDepth:
+                    break
+                await self._condition.wait()
+            if best is not None:
+                best.load += 1
+                return best
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        except BaseException:
+            self._opening -= 1
+            async with self._condition:
+                self._condition.notify()
+            raise
+        connection = HttpConnection(reader, writer)
+        connection.load = 1
+        self._opening -= 1
+        self._connections.append(connection)
+        async with self._condition:
+            # requests waiting for a slot may pipeline on the new connection
+            self._condition.notify()
+        return connection
+    async def _release(self, connection:HttpConnection):
+        """
+        Returns slot of connection back to the pool
+
+        Args:
+            connection : connection returned by _acquire
+        """
+        connection.load -= 1
+        async with self._condition:
+            self._condition.notify()
+    async def request(self, method:str, target:str, headers:dict|None=None, body:bytes|None=None, sink=None):
+        """
+        Sends HTTP request over a pooled connection
+
+        Stale keep-alive connections are retried once for GET requests whose response did not start yet.
+
+        Args:
+            method : HTTP method
+            target : path with query string
+            headers : additional request headers
+            body : request body
+            sink : callable taking status and headers and returning callable receiving body chunks, or None to keep body in memory
+
+        Returns:
+            Response : response to the request
+        """
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {self.host}", "Connection: keep-alive"]
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        raw = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b"")
+        started = False
+        def tracked(status, headers):
+            nonlocal started
+            started = True
+            return None if sink is None else sink(status, headers)
+        for attempt in (0, 1):
+            connection = await self._acquire()
+            try:
+                return await connection.request(raw, tracked)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if attempt or started or method != "GET":
+                    raise
+            finally:
+                await self._release(connection)
+    async def close(self):
+        """
+        Closes all connections of the pool
+        """
+        for connection in self._connections:
+            connection.close()
+        self._connections = []
+    def __str__(self):
+        """
+        String interpretation of ConnectionPool class
+
+        Returns:
+            str : host and number of opened connections
+        """
+        return f"{self.host}:{self.port} ({len(self._connections)} connections)"
@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import hashlib
+import json
+import os
+import ssl
+from urllib.parse import unquote, urljoin, urlsplit
+
+from brickset.connection import ConnectionPool
+from brickset.types import Image, Instructions
+
+DOWNLOADED = "downloaded"
+RESUMED = "resumed"
+UNCHANGED = "unchanged"
+
+MANIFEST = ".manifest.json"
+
+class DownloadError(Exception):
+    """
+    Raised when a file can not be downloaded
+    """
+
+class Downloader:
+    """
+    Downloads many files concurrently over pooled keep-alive connections
+
+    Bodies are streamed to a .part file in chunks. An interrupted download is resumed with a Range request.
+    A manifest in the directory keeps ETag and sha256 of every file by its requested URL; files are skipped when
+    the server answers 304 to If-None-Match or when the downloaded content has the same hash as before.
+    Changes of the manifest are written together at most every saveInterval seconds, at the end of downloadAll
+    and on close, so a crash loses only the latest of them and those files are downloaded again.
+
+    Attributes:
+        directory : str
+            directory where files are stored
+        progress : callable ?
+            called with url, received bytes and total bytes (None when unknown) after every chunk
+        manifest : dict[str, dict]
+            ETag, sha256 and size by URL
+        saveInterval : float
+            seconds changes of the manifest wait before they are written
+    """
+    def __init__(self, directory:str, maxConnections:int=4, concurrency:int=8, progress=None, saveInterval:float=1.0):
+        """
+        Initialization of Downloader class
+
+        Args:
+            directory : directory where files are stored
+            maxConnections : maximal number of opened connections per host
+            concurrency : maximal number of files downloaded at once
+            progress : called with url, received bytes and total bytes after every chunk
+            saveInterval : seconds changes of the manifest wait before they are written
+        """
+        self.directory = directory
+        self.progress = progress
+        self.saveInterval = saveInterval
+        self._maxConnections = maxConnections
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._pools = {}
+        os.makedirs(directory, exist_ok=True)
+        self._manifestPath = os.path.join(directory, MANIFEST)
+        self.manifest = {}
+        self._changed = False
+        self._saveTimer = None
+        self._saveTask = None
+        self._saveLock = asyncio.Lock()
+        if os.path.exists(self._manifestPath):
+            with open(self._manifestPath, encoding="utf-8") as file:
+                self.manifest = json.load(file)
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    async def close(self):
+        """
+        Closes all connections and writes changes of the manifest
+        """
+        for pool in self._pools.values():
+            await pool.close()
+        self._pools = {}
+        await self.saveManifest()
+    def _pool(self, url):
+        """
+        Returns connection pool for host of url
+
+        Args:
+            url : parsed URL
+
+        Returns:
+            ConnectionPool : pool of the host
+        """
+        secure = url.scheme == "https"
+        key = (url.scheme, url.hostname, url.port)
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = ConnectionPool(url.hostname, url.port or (443 if secure else 80), ssl.create_default_context() if secure else None, self._maxConnections)
+        return pool
+    def _manifestChanged(self):
+        """
+        Plans writing of the manifest after saveInterval unless it is already planned
+        """
+        self._changed = True
+        if self._saveTimer is None:
+            self._saveTimer = asyncio.get_running_loop().call_later(self.saveInterval, self._startSave)
+    def _startSave(self):
+        self._saveTimer = None
+        self._saveTask = asyncio.ensure_future(self.saveManifest())
+    async def saveManifest(self):
+        """
+        Writes changes of the manifest now, the file is written atomically in a thread
+        """
+        if self._saveTimer is not None:
+            self._saveTimer.cancel()
+            self._saveTimer = None
+        task, self._saveTask = self._saveTask, None
+        if task is not None and task is not asyncio.current_task():
+            await task
+        async with self._saveLock:
+            if not self._changed:
+                return
+            self._changed = False
+            # encoded on the loop, so the manifest is not read while downloads change it
+            data = json.dumps(self.manifest, indent=1, sort_keys=True)
+            await asyncio.to_thread(_replaceFile, self._manifestPath, data)
+    def pathFor(self, url:str):
+        """
+        Returns path where file from url is stored
+
+        Args:
+            url : URL of the file
+
+        Returns:
+            str : path in directory
+        """
+        name = os.path.basename(unquote(urlsplit(url).path)) or "index"
+        return os.path.join(self.directory, name)
+    async def download(self, url:str, path:str|None=None, redirects:int=5):
+        """
+        Downloads one file
+
+        Args:
+            url : URL of the file
+            path : where to store the file, derived from url when None
+            redirects : maximal number of followed redirects
+
+        Returns:
+            str : DOWNLOADED, RESUMED or UNCHANGED
+        """
+        path = self.pathFor(url) if path is None else path
+        # redirects keep the manifest entry of the requested URL
+        key = url
+        async with self._semaphore:
+            for _ in range(redirects + 1):
+                status, location = await self._fetch(url, path, key)
+                if location is None:
+                    return status
+                url = urljoin(url, location)
+        raise DownloadError(f"Too many redirects for {url}")
+    async def _fetch(self, url:str, path:str, key:str):
+        """
+        Sends one request for the file and stores its body
+
+        Args:
+            url : URL of the file
+            path : where to store the file
+            key : key of the file in manifest
+
+        Returns:
+            tuple[str, str] : status and location of redirect, location is None when there was no redirect
+        """
+        entry = self.manifest.get(key, {})
+        part = path + ".part"
+        headers = {}
+        if os.path.exists(path) and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        elif os.path.exists(part) and entry.get("partETag"):
+            # the stored part is hashed in a thread before the request, its size is the start of the range
+            stored, storedHash = await asyncio.to_thread(_hashFile, part)
+            headers["Range"] = f"bytes={stored}-"
+            headers["If-Range"] = entry["partETag"]
+        parsed = urlsplit(url)
+        target = (parsed.path or "/") + (f"?{parsed.query}" if parsed.query else "")
+        state = {"file": None, "hash": hashlib.sha256(), "received": 0}
+        def sink(status, responseHeaders):
+            if status == 206:
+                state["hash"] = storedHash
+                state["received"] = stored
+                state["file"] = open(part, "ab")
+            elif status == 200:
+                state["file"] = open(part, "wb")
+            else:
+                return None
+            length = responseHeaders.get("content-length")
+            total = None if length is None else state["received"] + int(length)
+            entry["partETag"] = responseHeaders.get("etag")
+            self.manifest[key] = entry
+            self._manifestChanged()
+            def write(chunk):
+                state["file"].write(chunk)
+                state["hash"].update(chunk)
+                state["received"] += len(chunk)
+                if self.progress is not None:
+                    self.progress(url, state["received"], total)
+            return write
+        try:
+            response = await self._pool(parsed).request("GET", target, headers, sink=sink)
+        finally:
+            if state["file"] is not None:
+                state["file"].close()
+        if response.status == 304:
+            return UNCHANGED, None
+        if response.status == 416:
+            # the part is already complete or stale, download it again
+            os.remove(part)
+            entry.pop("partETag", None)
+            return None, url
+        if response.status in (301, 302, 303, 307, 308) and "location" in response.headers:
+            return None, response.headers["location"]
+        if response.status not in (200, 206):
+            raise DownloadError(f"{url} failed with HTTP {response}")
+        digest = state["hash"].hexdigest()
+        if digest == entry.get("sha256") and os.path.exists(path):
+            os.remove(part)
+            status = UNCHANGED
+        else:
+            os.replace(part, path)
+            status = RESUMED if response.status == 206 else DOWNLOADED
+        entry.pop("partETag", None)
+        entry.update(etag=response.headers.get("etag"), sha256=digest, size=state["received"])
+        self.manifest[key] = entry
+        self._manifestChanged()
+        return status, None
+    async def downloadAll(self, items):
+        """
+        Downloads many files concurrently, only the first of URLs stored at the same path is downloaded
+
+        Args:
+            items : Instructions, Image objects or URLs
+
+        Returns:
+            dict[str, str|Exception] : status or error by URL, DownloadError for URLs whose path was taken
+        """
+        urls = []
+        for item in items:
+            if isinstance(item, Instructions):
+                urls.append(item.URL)
+            elif isinstance(item, Image):
+                urls.append(item.imageURL)
+            else:
+                urls.append(item)
+        targets = {}
+        skipped = []
+        for url in dict.fromkeys(urls):
+            if url:
+                if targets.setdefault(self.pathFor(url), url) != url:
+                    skipped.append(url)
+        results = await asyncio.gather(*(self.download(url, path) for path, url in targets.items()), return_exceptions=True)
+        results = dict(zip(targets.values(), results))
+        for url in skipped:
+            path = self.pathFor(url)
+            results[url] = DownloadError(f"{url} is stored at {path} like {targets[path]}")
+        await self.saveManifest()
+        return results
+    def __str__(self):
+        """
+        String interpretation of Downloader class
+
+        Returns:
+            str : target directory
+        """
+        return f"Downloader to {self.directory}"
+
+def _hashFile(path:str):
+    """
+    Reads file in chunks
+
+    Args:
+        path : path of the file
+
+    Returns:
+        tuple[int, hashlib sha256] : size and hash of the content
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as file:
+        while chunk := file.read(1 << 20):
+            digest.update(chunk)
+            size += len(chunk)
+    return size, digest
+
+def _replaceFile(path:str, data:str):
+    """
+    Writes file atomically
+
+    Args:
+        path : path of the file
+        data : new content
+    """
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        file.write(data)
+    os.replace(temporary, path)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+"""
+Encoders used by to_msgpack of brickset.types
+"""
+
+import struct
+
+def packb(value):
+    """
+    Encodes json compatible value as MessagePack
+
+    Args:
+        value : None, bool, int, float, str, bytes, list, tuple or dict of them
+
+    Returns:
+        bytes : MessagePack encoding
+    """
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+def _pack(value, out:bytearray):
+    if value is None:
+        out.append(0xc0)
+    elif value is True:
+        out.append(0xc3)
+    elif value is False:
+        out.append(0xc2)
+    elif isinstance(value, int):
+        if 0 <= value < 0x80:
+            out.append(value)
+        elif -0x20 <= value < 0:
+            out.append(value & 0xff)
+        elif 0 <= value <= 0xff:
+            out += b"\xcc" + struct.pack(">B", value)
+        elif 0 <= value <= 0xffff:
+            out += b"\xcd" + struct.pack(">H", value)
+        elif 0 <= value <= 0xffffffff:
+            out += b"\xce" + struct.pack(">I", value)
+        elif 0 <= value:
+            out += b"\xcf" + struct.pack(">Q", value)
+        elif -0x80 <= value:
+            out += b"\xd0" + struct.pack(">b", value)
+        elif -0x8000 <= value:
+            out += b"\xd1" + struct.pack(">h", value)
+        elif -0x80000000 <= value:
+            out += b"\xd2" + struct.pack(">i", value)
+        else:
+            out += b"\xd3" + struct.pack(">q", value)
+    elif isinstance(value, float):
+        out += b"\xcb" + struct.pack(">d", value)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        size = len(data)
+        if size < 0x20:
+            out.append(0xa0 | size)
+        elif size <= 0xff:
+            out += b"\xd9" + struct.pack(">B", size)
+        elif size <= 0xffff:
+            out += b"\xda" + struct.pack(">H", size)
+        else:
+            out += b"\xdb" + struct.pack(">I", size)
+        out += data
+    elif isinstance(value, (bytes, bytearray)):
+        size = len(value)
+        if size <= 0xff:
+            out += b"\xc4" + struct.pack(">B", size)
+        elif size <= 0xffff:
+            out += b"\xc5" + struct.pack(">H", size)
+        else:
+            out += b"\xc6" + struct.pack(">I", size)
+        out += value
+    elif isinstance(value, (list, tuple)):
+        size = len(value)
+        if size < 0x10:
+            out.append(0x90 | size)
+        elif size <= 0xffff:
+            out += b"\xdc" + struct.pack(">H", size)
+        else:
+            out += b"\xdd" + struct.pack(">I", size)
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        size = len(value)
+        if size < 0x10:
+            out.append(0x80 | size)
+        elif size <= 0xffff:
+            out += b"\xde" + struct.pack(">H", size)
+        else:
+            out += b"\xdf" + struct.pack(">I", size)
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    else:
+        raise TypeError(f"{type(value).__name__} can not be encoded as MessagePack")
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, time, timedelta, timezone
+
+from brickset.types import Sets
+
+class SetIndex:
+    """
+    Collection of sets with secondary indexes
+
+    Hash indexes answer lookups by theme, theme with year, subtheme, barcode and number in O(1).
+    Sorted indexes answer range queries on year, pieces and lastUpdated in O(log n).
+
+    Attributes:
+        sets : dict[int, Sets]
+            all sets by setID
+    """
+    __slots__ = ("sets", "_theme", "_themeYear", "_subtheme", "_barcode", "_number", "_sorted")
+
+    SORTED_FIELDS = ("year", "pieces", "lastUpdated")
+
+    def __init__(self, sets=()):
+        """
+        Initialization of SetIndex class
+
+        Args:
+            sets : iterable of sets to index
+        """
+        self.sets = {}
+        self._theme = {}
+        self._themeYear = {}
+        self._subtheme = {}
+        self._barcode = {}
+        self._number = {}
+        self._sorted = {field: [] for field in self.SORTED_FIELDS}
+        for s in sets:
+            self.insert(s)
+    def __len__(self):
+        """
+        Number of indexed sets
+
+        Returns:
+            int : number of sets
+        """
+        return len(self.sets)
+    def __contains__(self, setID:int):
+        """
+        Checks if set is indexed
+
+        Args:
+            setID : ID of Lego set
+
+        Returns:
+            bool : True when set is in the index
+        """
+        return setID in self.sets
+    def __iter__(self):
+        """
+        Iterates over indexed sets
+
+        Returns:
+            iterator : indexed Sets
+        """
+        return iter(self.sets.values())
+    def get(self, setID:int):
+        """
+        Finds set by its ID
+
+        Args:
+            setID : ID of Lego set
+
+        Returns:
+            Sets ? : set with given ID
+        """
+        return self.sets.get(setID)
+    def insert(self, s:Sets):
+        """
+        Adds set to the index, set with the same ID is replaced
+
+        Args:
+            s : set to add
+        """
+        if s.setID in self.sets:
+            self.delete(s.setID)
+        setID = s.setID
+        self.sets[setID] = s
+        self._theme.setdefault(s.theme, set()).add(setID)
+        self._themeYear.setdefault((s.theme, s.year), set()).add(setID)
+        self._subtheme.setdefault(s.subtheme, set()).add(setID)
+        self._number.setdefault(s.number, set()).add(setID)
+        for code in _barcodes(s):
+            self._barcode[code] = setID
+        for field, entries in self._sorted.items():
+            key = getattr(s, field)
+            if key is not None:
+                insort(entries, (key, setID))
+    def update(self, s:Sets):
+        """
+        Replaces indexed set when the new one was updated later
+
+        Args:
+            s : new version of the set
+
+        Returns:
+            bool : True when the index was changed
+        """
+        current = self.sets.get(s.setID)
+        if current is not None and current.lastUpdated is not None and s.lastUpdated is not None and s.lastUpdated <= current.lastUpdated:
+            return False
+        self.insert(s)
+        return True
+    def delete(self, setID:int):
+        """
+        Removes set from the index
+
+        Args:
+            setID : ID of Lego set
+
+        Returns:
+            Sets ? : removed set
+        """
+        s = self.sets.pop(setID, None)
+        if s is None:
+            return None
+        _discard(self._theme, s.theme, setID)
+        _discard(self._themeYear, (s.theme, s.year), setID)
+        _discard(self._subtheme, s.subtheme, setID)
+        _discard(self._number, s.number, setID)
+        for code in _barcodes(s):
+            if self._barcode.get(code) == setID:
+                del self._barcode[code]
+        for field, entries in self._sorted.items():
+            key = getattr(s, field)
+            if key is not None:
+                position = bisect_left(entries, (key, setID))
+                if position < len(entries) and entries[position] == (key, setID):
+                    del entries[position]
+        return s
+    def byTheme(self, theme:str):
+        """
+        Finds sets of theme
+
+        Args:
+            theme : name of theme
+
+        Returns:
+            list[Sets] : matching sets
+        """
+        return self._resolve(self._theme.get(theme, ()))
+    def themeCount(self, theme:str):
+        """
+        Counts sets of theme
+
+        Args:
+            theme : name of theme
+
+        Returns:
+            int : number of sets
+        """
+        return len(self._theme.get(theme, ()))
+    def byThemeYear(self, theme:str, year:int):
+        """
+        Finds sets of theme released in year
+
+        Args:
+            theme : name of theme
+            year : year of release
+
+        Returns:
+            list[Sets] : matching sets
+        """
+        return self._resolve(self._themeYear.get((theme, year), ()))
+    def bySubtheme(self, subtheme:str):
+        """
+        Finds sets of subtheme
+
+        Args:
+            subtheme : name of subtheme
+
+        Returns:
+            list[Sets] : matching sets
+        """
+        return self._resolve(self._subtheme.get(subtheme, ()))
+    def byBarcode(self, code:str):
+        """
+        Finds set by its EAN or UPC barcode
+
+        Args:
+            code : EAN or UPC
+
+        Returns:
+            Sets ? : matching set
+        """
+        setID = self._barcode.get(code)
+        return None if setID is None else self.sets[setID]
+    def byNumber(self, number:str, numberVariant:int|None=None):
+        """
+        Finds sets by number, optionally only given variant
+
+        Args:
+            number : number of Lego set, e.g. 10255
+            numberVariant : variant of the number, all variants when None
+
+        Returns:
+            list[Sets] : matching sets
+        """
+        sets = self._resolve(self._number.get(number, ()))
+        if numberVariant is not None:
+            sets = [s for s in sets if s.numberVariant == numberVariant]
+        return sets
+    def range(self, field:str, low=None, high=None):
+        """
+        Finds sets with field in closed interval, sets with missing value are skipped
+
+        Bounds of lastUpdated may be dates, which include the whole day, or datetimes, naive ones are taken as UTC.
+
+        Args:
+            field : one of year, pieces, lastUpdated
+            low : lower bound, unbounded when None
+            high : upper bound, unbounded when None
+
+        Returns:
+            list[Sets] : matching sets ordered by field
+        """
+        entries = self._sorted[field]
+        start = 0 if low is None else bisect_left(entries, (_bound(field, low, False),))
+        if high is None:
+            stop = len(entries)
+        elif field == "lastUpdated" and not isinstance(high, datetime) and isinstance(high, date):
+            # sets updated before midnight after the day
+            stop = bisect_left(entries, (_bound(field, high, True),))
+        else:
+            # every (high, setID) tuple is smaller than (high, inf)
+            stop = bisect_right(entries, (_bound(field, high, True), float("inf")))
+        sets = self.sets
+        return [sets[setID] for _, setID in entries[start:stop]]
+    def _resolve(self, setIDs):
+        """
+        Returns sets for IDs ordered by setID
+
+        Args:
+            setIDs : IDs of sets
+
+        Returns:
+            list[Sets] : sets
+        """
+        sets = self.sets
+        return [sets[setID] for setID in sorted(setIDs)]
+    def __str__(self):
+        """
+        String interpretation of SetIndex class
+
+        Returns:
+            str : number of indexed sets
+        """
+        return f"SetIndex with {len(self)} sets"
+
+def _barcodes(s:Sets):
+    """
+    Returns barcodes of set
+
+    Args:
+        s : Lego set
+
+    Returns:
+        list[str] : EAN and UPC that are present
+    """
+    barcode = s.barcode
+    if barcode is None:
+        return []
+    return [code for code in (barcode.EAN, barcode.UPC) if code]
+
+def _bound(field:str, value, high:bool):
+    """
+    Converts bound of range to the type of indexed values
+
+    Args:
+        field : indexed field
+        value : bound
+        high : check if value is the upper bound
+
+    Returns:
+        any : value, or aware datetime in UTC for lastUpdated
+    """
+    if field != "lastUpdated":
+        return value
+    if isinstance(value, datetime):
+        return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, date):
+        return datetime.combine(value + timedelta(days=1) if high else value, time(), timezone.utc)
+    raise TypeError(f"bound of lastUpdated must be date or datetime, not {type(value).__name__}")
+
+def _discard(index:dict, key, setID:int):
+    """
+    Removes setID from hash index, dropping empty buckets
+
+    Args:
+        index : hash index
+        key : key of the bucket
+        setID : ID to remove
+    """
+    bucket = index.get(key)
+    if bucket is not None:
+        bucket.discard(setID)
+        if not bucket:
+            del index[key]
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+from brickset.types import MinifigCollection
+
+class MinifigChange:
+    """
+    Change of one minifig to push with setMinifigCollection
+
+    Attributes:
+        minifigNumber : str
+            number of minifig
+        params : dict
+            changed values - own and qtyOwned, want, notes
+    """
+    __slots__ = ("minifigNumber", "params")
+    def __init__(self, minifigNumber:str, params:dict):
+        """
+        Initialization of MinifigChange class
+
+        Args:
+            minifigNumber : number of minifig
+            params : changed values - own and qtyOwned, want, notes
+        """
+        self.minifigNumber = minifigNumber
+        self.params = params
+    def __str__(self):
+        """
+        String interpretation of MinifigChange class
+
+        Returns:
+            str : minifig number with changed values
+        """
+        return f"{self.minifigNumber}: " + ", ".join(f"{name}={value}" for name, value in self.params.items())
+
+class InventoryDiff:
+    """
+    Differences between two snapshots of a minifig collection
+
+    Attributes:
+        owned : dict[str, int]
+            change of ownedTotal by minifig number
+        wantedAdded : set[str]
+            minifigs wanted only in the new snapshot
+        wantedRemoved : set[str]
+            minifigs wanted only in the old snapshot
+        notes : dict[str, str|None]
+            new notes by minifig number, None when notes were removed
+        changes : list[MinifigChange]
+            calls of setMinifigCollection turning the old collection into the new one
+    """
+    __slots__ = ("owned", "wantedAdded", "wantedRemoved", "notes", "changes")
+    def __init__(self):
+        """
+        Initialization of empty InventoryDiff class
+        """
+        self.owned = {}
+        self.wantedAdded = set()
+        self.wantedRemoved = set()
+        self.notes = {}
+        self.changes = []
+    def __bool__(self):
+        return bool(self.owned or self.wantedAdded or self.wantedRemoved or self.notes)
+    def __str__(self):
+        """
+        String interpretation of InventoryDiff class
+
+        Returns:
+            str : numbers of differences
+        """
+        return f"{len(self.owned)} owned, {len(self.wantedAdded)} wanted, {len(self.wantedRemoved)} unwanted, {len(self.notes)} notes, {len(self.changes)} changes"
+
+class MinifigInventory:
+    """
+    Minifig collection of a user with notes, keyed by minifigNumber
+
+    Only loose minifigs, wanted flags and notes can be pushed to the API - ownedInSets follows the user's sets,
+    so differences in it appear in the owned diff but never in changes.
+
+    Attributes:
+        minifigs : dict[str, MinifigCollection]
+            minifigs by number
+        notes : dict[str, str]
+            notes by minifig number
+    """
+    __slots__ = ("minifigs", "notes")
+    def __init__(self, minifigs=(), notes=()):
+        """
+        Initialization of MinifigInventory class
+
+        Args:
+            minifigs : iterable of MinifigCollection, later entries of the same number win
+            notes : iterable of UserMinifigNotes
+        """
+        self.minifigs = {m.minifigNumber: m for m in minifigs}
+        self.notes = {n.minifigNumber: n.notes for n in notes if n.notes}
+    @classmethod
+    async def fromClient(cls, client):
+        """
+        Downloads owned and wanted minifigs and notes of the user
+
+        Args:
+            client : BricksetClient with userHash
+
+        Returns:
+            MinifigInventory : collection of the user
+        """
+        owned, wanted, notes = await asyncio.gather(client.getMinifigCollection(owned=1), client.getMinifigCollection(wanted=1), client.getUserMinifigNotes())
+        return cls(owned + wanted, notes)
+    def __len__(self):
+        """
+        Number of minifigs in the collection
+
+        Returns:
+            int : number of minifigs
+        """
+        return len(self.minifigs)
+    def __contains__(self, minifigNumber:str):
+        return minifigNumber in self.minifigs
+    def get(self, minifigNumber:str):
+        """
+        Finds minifig with its notes
+
+        Args:
+            minifigNumber : number of minifig
+
+        Returns:
+            tuple[MinifigCollection ?, str ?] : minifig and notes
+        """
+        return self.minifigs.get(minifigNumber), self.notes.get(minifigNumber)
+    def diff(self, other:"MinifigInventory"):
+        """
+        Compares this collection with its newer version in one pass over both
+
+        Args:
+            other : newer collection
+
+        Returns:
+            InventoryDiff : differences and changes to push
+        """
+        result = InventoryDiff()
+        old, new = self.minifigs, other.minifigs
+        oldNotes, newNotes = self.notes, other.notes
+        for number in old.keys() | new.keys() | oldNotes.keys() | newNotes.keys():
+            before, after = old.get(number), new.get(number)
+            params = {}
+            total = (after.ownedTotal or 0 if after is not None else 0) - (before.ownedTotal or 0 if before is not None else 0)
+            if total:
+                result.owned[number] = total
+            loose = after.ownedLoose or 0 if after is not None else 0
+            if loose != (before.ownedLoose or 0 if before is not None else 0):
+                params["own"] = int(loose > 0)
+                params["qtyOwned"] = loose
+            wanted = bool(after is not None and after.wanted)
+            if wanted != bool(before is not None and before.wanted):
+                (result.wantedAdded if wanted else result.wantedRemoved).add(number)
+                params["want"] = int(wanted)
+            notes = newNotes.get(number)
+            if notes != oldNotes.get(number):
+                result.notes[number] = notes
+                params["notes"] = notes or ""
+            if params:
+                result.changes.append(MinifigChange(number, params))
+        result.changes.sort(key=lambda change: change.minifigNumber)
+        return result
+    def apply(self, changes):
+        """
+        Updates the collection with changes pushed to the API
+
+        Args:
+            changes : iterable of MinifigChange
+        """
+        for change in changes:
+            number = change.minifigNumber
+            params = change.params
+            minifig = self.minifigs.get(number)
+            if minifig is None:
+                minifig = self.minifigs[number] = MinifigCollection(number, None, None, 0, 0, 0, False)
+            if "qtyOwned" in params:
+                inSets = minifig.ownedInSets or 0
+                minifig.ownedLoose = params["qtyOwned"]
+                minifig.ownedTotal = inSets + params["qtyOwned"]
+            if "want" in params:
+                minifig.wanted = bool(params["want"])
+            if "notes" in params:
+                if params["notes"]:
+                    self.notes[number] = params["notes"]
+                else:
+                    self.notes.pop(number, None)
+            minifig.invalidate()
+            if not (minifig.ownedTotal or minifig.wanted):
+                del self.minifigs[number]
+    def __str__(self):
+        """
+        String interpretation of MinifigInventory class
+
+        Returns:
+            str : numbers of minifigs and notes
+        """
+        return f"MinifigInventory of {len(self)} minifigs, {len(self.notes)} notes"
+
+async def pushChanges(client, changes):
+    """
+    Sends changes with setMinifigCollection, calls run concurrently within limits of the client
+
+    Args:
+        client : BricksetClient with userHash
+        changes : iterable of MinifigChange
+
+    Returns:
+        dict[str, None|Exception] : None or error by minifig number
+    """
+    changes = list(changes)
+    results = await asyncio.gather(*(client.setMinifigCollection(change.minifigNumber, **change.params) for change in changes), return_exceptions=True)
+    return {change.minifigNumber: result for change, result in zip(changes, results)}
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+
+"""
+Instrumentation of BricksetClient
+
+Pass a Metrics object as metrics of BricksetClient to record latency, sizes, cache outcomes and quota.
+Without it the client only checks that metrics is None on its hot path.
+"""
+
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """
+    Histogram with fixed upper bounds of buckets
+
+    Attributes:
+        bounds : tuple[float]
+            upper bounds of buckets, the last bucket is unbounded
+        counts : list[int]
+            number of observations in every bucket, one more than bounds
+        sum : float
+            sum of observed values
+        count : int
+            number of observations
+    """
+    __slots__ = ("bounds", "counts", "sum", "count")
+    def __init__(self, bounds:tuple=LATENCY_BUCKETS):
+        """
+        Initialization of Histogram class
+
+        Args:
+            bounds : sorted upper bounds of buckets
+        """
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+    def observe(self, value:float):
+        """
+        Adds observation
+
+        Args:
+            value : observed value
+        """
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+    def quantile(self, q:float):
+        """
+        Estimates quantile as upper bound of the bucket containing it
+
+        Args:
+            q : quantile between 0 and 1
+
+        Returns:
+            float ? : bound of the bucket, None without observations, inf in the last bucket
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+    def __str__(self):
+        """
+        String interpretation of Histogram class
+
+        Returns:
+            str : number and mean of observations
+        """
+        return f"Histogram of {self.count} values, mean {self.sum / self.count if self.count else 0:.6g}"
+
+class Metrics:
+    """
+    Measurements of API calls and deserialization
+
+    Listeners are called with event name, labels and value for every measurement:
+        request : {"method", "status"}, seconds
+        bytes : {"method"}, body size
+        cache : {"method", "outcome"}, 1 - outcome is hit, revalidated or miss
+        deserialize : {"type"}, seconds
+        quota : {"key"}, 1
+        keyUsage : {"key"}, count of calls reported by getKeyUsageStats for the last day
+
+    API keys are labelled by their last four characters only.
+
+    Attributes:
+        buckets : tuple[float]
+            upper bounds of latency histogram buckets
+        requestLatency : dict[str, Histogram]
+            seconds of requests by method
+        deserializeLatency : dict[str, Histogram]
+            seconds of deserialization by type
+        requests : dict[tuple[str, int], int]
+            number of responses by method and HTTP status
+        bytesReceived : dict[str, int]
+            size of response bodies by method
+        objects : dict[str, int]
+            number of deserialized objects by type
+        cache : dict[tuple[str, str], int]
+            number of cache lookups by method and outcome
+        quotaUsed : dict[str, int]
+            number of requests sent by key
+        keyUsage : dict[str, int]
+            calls of the last day reported by getKeyUsageStats by key
+        listeners : list[callable]
+            functions called for every measurement
+    """
+    def __init__(self, buckets:tuple=LATENCY_BUCKETS):
+        """
+        Initialization of Metrics class
+
+        Args:
+            buckets : upper bounds of latency histogram buckets
+        """
+        self.buckets = buckets
+        self.requestLatency = {}
+        self.deserializeLatency = {}
+        self.requests = {}
+        self.bytesReceived = {}
+        self.objects = {}
+        self.cache = {}
+        self.quotaUsed = {}
+        self.keyUsage = {}
+        self.listeners = []
+    def _emit(self, event:str, labels:dict, value:float):
+        for listener in self.listeners:
+            listener(event, labels, value)
+    def _histogram(self, histograms:dict, name:str):
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = Histogram(self.buckets)
+        return histogram
+    def observeRequest(self, method:str, seconds:float, status:int, size:int, apiKey:str):
+        """
+        Records finished request
+
+        Args:
+            method : API method
+            seconds : time from sending the request to receiving whole body
+            status : HTTP status
+            size : size of the body
+            apiKey : key used for the request
+        """
+        self._histogram(self.requestLatency, method).observe(seconds)
+        self.requests[method, status] = self.requests.get((method, status), 0) + 1
+        self.bytesReceived[method] = self.bytesReceived.get(method, 0) + size
+        key = _keyLabel(apiKey)
+        self.quotaUsed[key] = self.quotaUsed.get(key, 0) + 1
+        if self.listeners:
+            self._emit("request", {"method": method, "status": status}, seconds)
+            self._emit("bytes", {"method": method}, size)
+            self._emit("quota", {"key": key}, 1)
+    def observeCache(self, method:str, outcome:str):
+        """
+        Records cache lookup
+
+        Args:
+            method : API method
+            outcome : hit, revalidated or miss
+        """
+        self.cache[method, outcome] = self.cache.get((method, outcome), 0) + 1
+        if self.listeners:
+            self._emit("cache", {"method": method, "outcome": outcome}, 1)
+    def observeDeserialization(self, typeName:str, seconds:float, count:int):
+        """
+        Records deserialization of a response
+
+        Args:
+            typeName : name of deserialized class
+            seconds : time spent in deJson
+            count : number of built objects
+        """
+        self._histogram(self.deserializeLatency, typeName).observe(seconds)
+        self.objects[typeName] = self.objects.get(typeName, 0) + count
+        if self.listeners:
+            self._emit("deserialize", {"type": typeName}, seconds)
+    def observeKeyUsage(self, apiKey:str, usages):
+        """
+        Records usage reported by getKeyUsageStats
+
+        Args:
+            apiKey : key the usage belongs to
+            usages : list of ApiKeyUsage
+        """
+        usages = [usage for usage in usages if usage.dateStamp is not None]
+        if not usages:
+            return
+        key = _keyLabel(apiKey)
+        self.keyUsage[key] = max(usages, key=lambda usage: usage.dateStamp).count
+        if self.listeners:
+            self._emit("keyUsage", {"key": key}, self.keyUsage[key])
+    @property
+    def hitRatio(self):
+        """
+        Share of cache lookups answered without downloading the body
+
+        Returns:
+            float : hits and revalidations divided by lookups, 0 before the first lookup
+        """
+        lookups = sum(self.cache.values())
+        if not lookups:
+            return 0.0
+        return sum(count for (_, outcome), count in self.cache.items() if outcome != "miss") / lookups
+    def exportPrometheus(self):
+        """
+        Renders metrics in Prometheus text exposition format
+
+        Returns:
+            str : metrics text
+        """
+        lines = []
+        def histogram(name:str, label:str, histograms:dict, description:str):
+            lines.extend((f"# HELP {name} {description}", f"# TYPE {name} histogram"))
+            for value, h in sorted(histograms.items()):
+                labels = f'{label}="{_escape(value)}"'
+                cumulative = 0
+                for bound, count in zip(h.bounds + (float("inf"),), h.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{"+Inf" if bound == float("inf") else repr(bound)}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels}}} {h.sum!r}")
+                lines.append(f"{name}_count{{{labels}}} {h.count}")
+        def series(name:str, kind:str, labels:tuple, values:dict, description:str):
+            lines.extend((f"# HELP {name} {description}", f"# TYPE {name} {kind}"))
+            for key, value in sorted(values.items()):
+                key = key if isinstance(key, tuple) else (key,)
+                text = ",".join(f'{label}="{_escape(part)}"' for label, part in zip(labels, key))
+                lines.append(f"{name}{{{text}}} {value}")
+        histogram("brickset_request_seconds", "method", self.requestLatency, "Latency of Brickset API requests")
+        series("brickset_requests_total", "counter", ("method", "status"), self.requests, "Responses of Brickset API by HTTP status")
+        series("brickset_received_bytes_total", "counter", ("method",), self.bytesReceived, "Size of received response bodies")
+        histogram("brickset_deserialize_seconds", "type", self.deserializeLatency, "Time spent deserializing responses")
+        series("brickset_deserialized_objects_total", "counter", ("type",), self.objects, "Number of deserialized objects")
+        series("brickset_cache_lookups_total", "counter", ("method", "outcome"), self.cache, "Response cache lookups by outcome")
+        lines.extend(("# HELP brickset_cache_hit_ratio Share of cache lookups answered without downloading the body", "# TYPE brickset_cache_hit_ratio gauge", f"brickset_cache_hit_ratio {self.hitRatio!r}"))
+        series("brickset_quota_used_total", "counter", ("key",), self.quotaUsed, "Requests sent by API key")
+        series("brickset_key_usage", "gauge", ("key",), self.keyUsage, "Calls of the last day reported by getKeyUsageStats")
+        return "\n".join(lines) + "\n"
+    def __str__(self):
+        """
+        String interpretation of Metrics class
+
+        Returns:
+            str : number of recorded requests
+        """
+        return f"Metrics of {sum(self.requests.values())} requests"
+
+def _keyLabel(apiKey:str):
+    return "..." + apiKey[-4:]
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
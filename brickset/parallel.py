@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+"""
+Parallel import of large getSets dumps
+
+The dump is split into byte ranges. Every worker process maps the file, finds the first set starting in its range
+and parses sets until the range ends, so no json crosses process boundaries. Workers send back a SetTable (typed
+arrays) or write a snapshot segment and send back its path, instead of pickled Sets objects.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import json
+import mmap
+import os
+import re
+
+from brickset.snapshot import save_snapshot
+from brickset.table import SetTable
+from brickset.types import Sets
+
+# objects of the sets array are the only ones with a setID key, and a quote inside a json string is always escaped
+_SET_START = re.compile(rb'\{\s*"setID"\s*:')
+_SET_ID_KEY = re.compile(rb'"setID"\s*:')
+
+def splitSource(source:str, chunkBytes:int=8 << 20):
+    """
+    Splits dump file or directory of page files into byte ranges
+
+    Args:
+        source : getSets response file or directory of such files
+        chunkBytes : size of one range
+
+    Returns:
+        list[tuple[str, int, int]] : path, start and end of every range
+    """
+    if os.path.isdir(source):
+        paths = sorted(os.path.join(source, name) for name in os.listdir(source) if not name.startswith("."))
+    else:
+        paths = [source]
+    ranges = []
+    for path in paths:
+        size = os.path.getsize(path)
+        ranges.extend((path, start, min(start + chunkBytes, size)) for start in range(0, size, chunkBytes))
+    return ranges
+
+def parseRange(path:str, start:int, end:int):
+    """
+    Parses sets starting inside byte range of a getSets response.
+    Raises ValueError when setID is not the first key of sets, e.g. the dump was written with sorted keys.
+
+    Args:
+        path : getSets response file
+        start : first byte of the range
+        end : byte after the range
+
+    Returns:
+        list[Sets] : sets starting in the range
+    """
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        key = _SET_ID_KEY.search(data, start, end)
+        if key is not None:
+            # sets are found by their first key, a setID key elsewhere means they would be skipped
+            before = key.start() - 1
+            while before >= 0 and data[before] in b" \t\r\n":
+                before -= 1
+            if before < 0 or data[before] != ord("{"):
+                raise ValueError(f"{path}: setID is not the first key of the set at byte {key.start()}, the dump can not be split")
+        first = _SET_START.search(data, start)
+        if first is None or first.start() >= end:
+            return []
+        following = _SET_START.search(data, end)
+        text = data[first.start():following.start() if following else len(data)].decode("utf-8")
+    decoder = json.JSONDecoder()
+    sets = []
+    position = 0
+    length = len(text)
+    while position < length and text[position] == "{":
+        obj, position = decoder.raw_decode(text, position)
+        sets.append(Sets.deJson(obj))
+        while position < length and text[position] in " \t\r\n,":
+            position += 1
+    return sets
+
+def _tableOfRange(task:tuple):
+    path, start, end = task
+    return SetTable.fromSets(parseRange(path, start, end))
+
+def _snapshotOfRange(task:tuple):
+    path, start, end, output = task
+    save_snapshot(parseRange(path, start, end), output)
+    return output
+
+def importTable(source:str, workers:int|None=None, chunkBytes:int=8 << 20):
+    """
+    Deserializes dump in a process pool into one SetTable
+
+    Args:
+        source : getSets response file or directory of such files
+        workers : number of processes, number of CPUs when None
+        chunkBytes : size of the range parsed by one task
+
+    Returns:
+        SetTable : table of all sets in dump order
+    """
+    table = SetTable()
+    with ProcessPoolExecutor(workers) as executor:
+        for part in executor.map(_tableOfRange, splitSource(source, chunkBytes)):
+            table.extendTable(part)
+    return table
+
+def importSnapshots(source:str, directory:str, workers:int|None=None, chunkBytes:int=8 << 20):
+    """
+    Deserializes dump in a process pool into snapshot segments, one per range
+
+    Args:
+        source : getSets response file or directory of such files
+        directory : where segments are written
+        workers : number of processes, number of CPUs when None
+        chunkBytes : size of the range parsed by one task
+
+    Returns:
+        list[str] : paths of segments in dump order, open them with load_snapshot
+    """
+    os.makedirs(directory, exist_ok=True)
+    tasks = [(path, start, end, os.path.join(directory, f"segment-{number:05d}.bsn")) for number, (path, start, end) in enumerate(splitSource(source, chunkBytes))]
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(_snapshotOfRange, tasks))
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+from threading import Lock
+
+class StringPool:
+    """
+    Pool of distinct strings with integer codes
+
+    Every distinct value is stored once; interned values are the same object, so equality checks
+    on them reduce to identity, and code gives a small integer usable for comparisons and arrays.
+
+    Attributes:
+        values : list[str]
+            distinct strings, index is the code
+    """
+    __slots__ = ("values", "_codes", "_lock")
+    def __init__(self):
+        """
+        Initialization of StringPool class
+        """
+        self.values = []
+        self._codes = {}
+        self._lock = Lock()
+    def code(self, value:str):
+        """
+        Returns code of string, adding it to the pool when it is new
+
+        Args:
+            value : string to encode
+
+        Returns:
+            int : code of the string
+        """
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = self._codes[value] = len(self.values)
+                    self.values.append(value)
+        return code
+    def intern(self, value:str|None):
+        """
+        Returns the pooled copy of string
+
+        Args:
+            value : string to intern, may be None
+
+        Returns:
+            str ? : pooled string equal to value
+        """
+        if value is None:
+            return None
+        return self.values[self.code(value)]
+    def lookup(self, code:int):
+        """
+        Returns string of code
+
+        Args:
+            code : code returned by code
+
+        Returns:
+            str : pooled string
+        """
+        return self.values[code]
+    def __len__(self):
+        """
+        Number of distinct strings
+
+        Returns:
+            int : size of the pool
+        """
+        return len(self.values)
+    def __contains__(self, value:str):
+        return value in self._codes
+    def __str__(self):
+        """
+        String interpretation of StringPool class
+
+        Returns:
+            str : number of pooled strings
+        """
+        return f"StringPool with {len(self)} strings"
+
+# pool shared by deserializers in brickset.types; only categorical fields such as theme, category or availability
+# are interned, so it grows with the number of distinct categories and never with free text
+STRINGS = StringPool()
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+from array import array
+from datetime import date
+from itertools import compress, repeat
+from operator import add, and_, ge, le, mul, or_, sub, truediv, xor
+
+from brickset.table import aggregateValues
+from brickset.types import LEGOCOM_REGIONS, Sets
+
+class PriceTable:
+    """
+    LEGO.com prices and availability of many sets in aligned arrays
+
+    Row i of every array belongs to setID[i]. Missing values are stored as 0 with 0 in the mask,
+    metrics are computed column by column with operator functions, masks decide which results are valid.
+    Dates are kept as proleptic Gregorian ordinals.
+
+    Attributes:
+        setID : array
+            IDs of sets, one per row
+        pieces : array
+            number of pieces
+        piecesMask : bytearray
+            1 where number of pieces is known and positive
+        prices : dict[str, array]
+            retail price by region
+        priceMasks : dict[str, bytearray]
+            1 where the price is known and positive
+        firstAvailable : dict[str, array]
+            ordinal of first day on LEGO.com by region
+        firstMasks : dict[str, bytearray]
+            1 where first day is known
+        lastAvailable : dict[str, array]
+            ordinal of last day on LEGO.com by region
+        lastMasks : dict[str, bytearray]
+            1 where last day is known
+    """
+    __slots__ = ("setID", "pieces", "piecesMask", "prices", "priceMasks", "firstAvailable", "firstMasks", "lastAvailable", "lastMasks")
+    def __init__(self):
+        """
+        Initialization of empty PriceTable class
+        """
+        self.setID = array("q")
+        self.pieces = array("q")
+        self.piecesMask = bytearray()
+        self.prices = {region: array("d") for region in LEGOCOM_REGIONS}
+        self.priceMasks = {region: bytearray() for region in LEGOCOM_REGIONS}
+        self.firstAvailable = {region: array("q") for region in LEGOCOM_REGIONS}
+        self.firstMasks = {region: bytearray() for region in LEGOCOM_REGIONS}
+        self.lastAvailable = {region: array("q") for region in LEGOCOM_REGIONS}
+        self.lastMasks = {region: bytearray() for region in LEGOCOM_REGIONS}
+    @classmethod
+    def fromSets(cls, sets):
+        """
+        Creates table from list or stream of sets
+
+        Args:
+            sets : iterable of Sets
+
+        Returns:
+            PriceTable : table with one row per set
+        """
+        table = cls()
+        table.extend(sets)
+        return table
+    def append(self, s:Sets):
+        """
+        Adds set as a new row
+
+        Args:
+            s : set to add
+        """
+        self.setID.append(s.setID)
+        pieces = s.pieces
+        present = pieces is not None and pieces > 0
+        self.pieces.append(pieces if present else 0)
+        self.piecesMask.append(present)
+        legoCom = s.legoCom
+        for region in LEGOCOM_REGIONS:
+            details = getattr(legoCom, region) if legoCom is not None else None
+            price = details.retailPrice if details is not None else None
+            present = price is not None and price > 0
+            self.prices[region].append(price if present else 0.0)
+            self.priceMasks[region].append(present)
+            for day, values, mask in ((details and details.dateFirstAvailable, self.firstAvailable, self.firstMasks), (details and details.dateLastAvailable, self.lastAvailable, self.lastMasks)):
+                values[region].append(day.toordinal() if day is not None else 0)
+                mask[region].append(day is not None)
+    def extend(self, sets):
+        """
+        Adds many sets as new rows
+
+        Args:
+            sets : iterable of Sets
+        """
+        for s in sets:
+            self.append(s)
+    def __len__(self):
+        """
+        Number of rows
+
+        Returns:
+            int : number of sets
+        """
+        return len(self.setID)
+    def pricePerPiece(self, region:str="US"):
+        """
+        Divides retail price by number of pieces
+
+        Args:
+            region : one of LEGOCOM_REGIONS
+
+        Returns:
+            tuple[array, bytearray] : price per piece and its mask
+        """
+        mask = _both(self.priceMasks[region], self.piecesMask)
+        return _divide(self.prices[region], self.pieces, mask), mask
+    def ratio(self, region:str, base:str="US"):
+        """
+        Divides retail price in region by retail price in base region, currencies are not converted
+
+        Args:
+            region : one of LEGOCOM_REGIONS
+            base : one of LEGOCOM_REGIONS
+
+        Returns:
+            tuple[array, bytearray] : price ratio and its mask
+        """
+        mask = _both(self.priceMasks[region], self.priceMasks[base])
+        return _divide(self.prices[region], self.prices[base], mask), mask
+    def shelfLife(self, region:str="US"):
+        """
+        Counts days between first and last availability
+
+        Args:
+            region : one of LEGOCOM_REGIONS
+
+        Returns:
+            tuple[array, bytearray] : number of days and its mask
+        """
+        mask = _both(self.firstMasks[region], self.lastMasks[region])
+        return array("q", map(mul, map(sub, self.lastAvailable[region], self.firstAvailable[region]), mask)), mask
+    def availableAt(self, day:date, region:str="US"):
+        """
+        Finds sets sold on LEGO.com on a day, a set without last day is treated as still available
+
+        Args:
+            day : day to check
+            region : one of LEGOCOM_REGIONS
+
+        Returns:
+            bytearray : 1 where the set was available
+        """
+        ordinal = repeat(day.toordinal())
+        started = map(and_, self.firstMasks[region], map(le, self.firstAvailable[region], ordinal))
+        notEnded = map(or_, _negate(self.lastMasks[region]), map(ge, self.lastAvailable[region], ordinal))
+        return bytearray(map(and_, started, notEnded))
+    def take(self, values, mask):
+        """
+        Selects valid values of a metric
+
+        Args:
+            values : array returned by a metric
+            mask : its mask
+
+        Returns:
+            tuple[list[int], list] : setIDs and values of valid rows
+        """
+        return list(compress(self.setID, mask)), list(compress(values, mask))
+    @staticmethod
+    def aggregate(values, mask, func:str="mean"):
+        """
+        Aggregates valid values of a metric
+
+        Args:
+            values : array returned by a metric
+            mask : its mask
+            func : one of count, sum, mean, min, max, std
+
+        Returns:
+            float ? : result, None when there are no valid values
+        """
+        return aggregateValues(list(compress(values, mask)), func)
+    def __str__(self):
+        """
+        String interpretation of PriceTable class
+
+        Returns:
+            str : number of rows
+        """
+        return f"PriceTable with {len(self)} sets"
+
+def _both(first:bytearray, second:bytearray):
+    return bytearray(map(and_, first, second))
+
+def _negate(mask:bytearray):
+    return map(xor, mask, repeat(1))
+
+def _divide(numerator:array, denominator:array, mask:bytearray):
+    """
+    Divides columns, rows outside mask get 0
+
+    Args:
+        numerator : numbers to divide
+        denominator : divisors, non zero where mask is 1
+        mask : valid rows
+
+    Returns:
+        array : quotients
+    """
+    # invalid rows compute 0 / 1, so no row needs its own check
+    divisors = map(add, map(mul, denominator, mask), _negate(mask))
+    return array("d", map(truediv, map(mul, numerator, mask), divisors))
@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import os
+from math import sqrt
+
+from brickset.types import Reviews
+
+DIMENSIONS = ("overall", "parts", "buildingExperience", "playability", "valueForMoney")
+
+class RunningStats:
+    """
+    Count, mean and variance of a stream of values updated with Welford's algorithm
+
+    Attributes:
+        count : int
+            number of values
+        mean : float
+            mean of values, 0.0 without values
+    """
+    __slots__ = ("count", "mean", "_m2")
+    def __init__(self):
+        """
+        Initialization of empty RunningStats class
+        """
+        self.count = 0
+        self.mean = 0.0
+        # sum of squared differences from the mean
+        self._m2 = 0.0
+    def add(self, value:float):
+        """
+        Folds value into the statistics
+
+        Args:
+            value : new value
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+    def merge(self, other:"RunningStats"):
+        """
+        Folds statistics of other values into these, e.g. computed by another worker
+
+        Args:
+            other : statistics to merge
+        """
+        count = self.count + other.count
+        if not count:
+            return
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+    @property
+    def variance(self):
+        """
+        Population variance of values
+
+        Returns:
+            float : variance, 0.0 for less than two values
+        """
+        return self._m2 / self.count if self.count > 1 else 0.0
+    @property
+    def stddev(self):
+        """
+        Population standard deviation of values
+
+        Returns:
+            float : standard deviation
+        """
+        return sqrt(self.variance)
+    def __str__(self):
+        """
+        String interpretation of RunningStats class
+
+        Returns:
+            str : mean and standard deviation
+        """
+        return f"{self.mean:.2f} ± {self.stddev:.2f} ({self.count})"
+
+class RatingAggregate:
+    """
+    Running statistics of every Rating dimension of reviews of one set
+
+    Dimensions missing in a review are not counted, so every dimension has its own count.
+
+    Attributes:
+        reviews : int
+            number of folded reviews
+        dimensions : dict[str, RunningStats]
+            statistics by name of Rating attribute
+    """
+    __slots__ = ("reviews", "dimensions")
+    def __init__(self):
+        """
+        Initialization of empty RatingAggregate class
+        """
+        self.reviews = 0
+        self.dimensions = {name: RunningStats() for name in DIMENSIONS}
+    @property
+    def overall(self):
+        """
+        Statistics of overall rating
+
+        Returns:
+            RunningStats : statistics of the dimension
+        """
+        return self.dimensions["overall"]
+    @property
+    def parts(self):
+        """
+        Statistics of parts rating
+
+        Returns:
+            RunningStats : statistics of the dimension
+        """
+        return self.dimensions["parts"]
+    @property
+    def buildingExperience(self):
+        """
+        Statistics of building experience rating
+
+        Returns:
+            RunningStats : statistics of the dimension
+        """
+        return self.dimensions["buildingExperience"]
+    @property
+    def playability(self):
+        """
+        Statistics of playability rating
+
+        Returns:
+            RunningStats : statistics of the dimension
+        """
+        return self.dimensions["playability"]
+    @property
+    def valueForMoney(self):
+        """
+        Statistics of value for money rating
+
+        Returns:
+            RunningStats : statistics of the dimension
+        """
+        return self.dimensions["valueForMoney"]
+    def add(self, review:Reviews):
+        """
+        Folds rating of review
+
+        Args:
+            review : review to count
+        """
+        self.reviews += 1
+        rating = review.rating
+        if rating is None:
+            return
+        for name, stats in self.dimensions.items():
+            value = getattr(rating, name)
+            if value is not None:
+                stats.add(value)
+    def merge(self, other:"RatingAggregate"):
+        """
+        Folds aggregate of other reviews of the same set
+
+        Args:
+            other : aggregate to merge
+        """
+        self.reviews += other.reviews
+        for name, stats in self.dimensions.items():
+            stats.merge(other.dimensions[name])
+    def __str__(self):
+        """
+        String interpretation of RatingAggregate class
+
+        Returns:
+            str : number of reviews and mean overall rating
+        """
+        return f"{self.reviews} reviews, overall {self.dimensions['overall']}"
+
+class ReviewSpill:
+    """
+    Append-only file of reviews by set, used to keep review text out of memory
+
+    Every line is json with setID and the review, or a marker dropping earlier reviews of the set.
+    Offsets of lines are kept in memory and rebuilt when an existing file is opened.
+
+    Attributes:
+        path : str
+            path of the file
+    """
+    __slots__ = ("path", "_file", "_offsets")
+    def __init__(self, path:str):
+        """
+        Initialization of ReviewSpill class, an existing file is reopened
+
+        Args:
+            path : path of the file
+        """
+        self.path = path
+        self._offsets = {}
+        self._file = open(path, "a+b")
+        self._file.seek(0)
+        offset = 0
+        for line in self._file:
+            if line.endswith(b"\n"):
+                record = json.loads(line)
+                if "replace" in record:
+                    self._offsets[record["setID"]] = []
+                else:
+                    self._offsets.setdefault(record["setID"], []).append(offset)
+                offset += len(line)
+            else:
+                # partly written line of an interrupted run
+                self._file.truncate(offset)
+                break
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc_info):
+        self.close()
+    def close(self):
+        """
+        Closes the file
+        """
+        self._file.close()
+    def __len__(self):
+        """
+        Number of sets with stored reviews
+
+        Returns:
+            int : number of sets
+        """
+        return len(self._offsets)
+    def __contains__(self, setID:int):
+        return setID in self._offsets
+    def append(self, setID:int, reviews, replace:bool=False):
+        """
+        Stores reviews of set after its previously stored reviews
+
+        Args:
+            setID : ID of reviewed set
+            reviews : list of Reviews
+            replace : check if previously stored reviews of the set are dropped
+        """
+        file = self._file
+        file.seek(0, os.SEEK_END)
+        lines = []
+        offset = file.tell()
+        if replace:
+            lines.append(json.dumps({"setID": setID, "replace": True}, separators=(",", ":")).encode("utf-8") + b"\n")
+            offset += len(lines[0])
+            self._offsets[setID] = []
+        offsets = self._offsets.setdefault(setID, [])
+        for review in reviews:
+            line = json.dumps({"setID": setID, "review": review.to_dict()}, separators=(",", ":")).encode("utf-8") + b"\n"
+            offsets.append(offset)
+            offset += len(line)
+            lines.append(line)
+        file.write(b"".join(lines))
+        file.flush()
+    def reviews(self, setID:int):
+        """
+        Reads stored reviews of set
+
+        Args:
+            setID : ID of reviewed set
+
+        Returns:
+            list[Reviews] : reviews in the order they were stored
+        """
+        file = self._file
+        result = []
+        for offset in self._offsets.get(setID, ()):
+            file.seek(offset)
+            result.append(Reviews.deJson(json.loads(file.readline())["review"]))
+        return result
+    def __str__(self):
+        """
+        String interpretation of ReviewSpill class
+
+        Returns:
+            str : path and number of sets
+        """
+        return f"ReviewSpill {self.path} of {len(self)} sets"
+
+class ReviewPipeline:
+    """
+    Fetches reviews of many sets concurrently and folds their ratings into per-set aggregates
+
+    Reviews are dropped after folding unless spill is given, which stores them on disk, so memory does not
+    grow with the number of reviews. getReviews returns all reviews of a set, so ingesting a set again replaces
+    its aggregate and stored reviews. A set whose reviews can not be fetched is reported in errors and
+    does not stop the other sets.
+
+    Attributes:
+        client : BricksetClient
+            client used for getReviews
+        concurrency : int
+            number of sets fetched at once
+        spill : ReviewSpill ?
+            store of review text
+        aggregates : dict[int, RatingAggregate]
+            aggregates by setID
+        errors : dict[int, Exception]
+            errors of the last ingest by setID
+    """
+    __slots__ = ("client", "concurrency", "spill", "aggregates", "errors")
+    def __init__(self, client, concurrency:int=8, spill:ReviewSpill|None=None):
+        """
+        Initialization of ReviewPipeline class
+
+        Args:
+            client : BricksetClient or any object with the same getReviews
+            concurrency : number of sets fetched at once
+            spill : store of review text, text is not kept when None
+        """
+        self.client = client
+        self.concurrency = concurrency
+        self.spill = spill
+        self.aggregates = {}
+        self.errors = {}
+    def add(self, setID:int, reviews, replace:bool=False):
+        """
+        Folds reviews of set
+
+        Args:
+            setID : ID of reviewed set
+            reviews : iterable of Reviews
+            replace : check if reviews folded and stored before are dropped
+
+        Returns:
+            RatingAggregate : updated aggregate of the set
+        """
+        if self.spill is not None:
+            reviews = list(reviews)
+        aggregate = None if replace else self.aggregates.get(setID)
+        if aggregate is None:
+            aggregate = RatingAggregate()
+        for review in reviews:
+            aggregate.add(review)
+        self.aggregates[setID] = aggregate
+        if self.spill is not None:
+            self.spill.append(setID, reviews, replace)
+        return aggregate
+    async def ingest(self, setIDs):
+        """
+        Fetches and folds all reviews of sets, replacing their earlier aggregates, concurrency workers take setIDs one by one
+
+        Args:
+            setIDs : iterable of set IDs, may be a generator
+
+        Returns:
+            dict[int, RatingAggregate] : aggregates of the sets fetched without error
+        """
+        pending = iter(setIDs)
+        done = {}
+        self.errors = {}
+        async def worker():
+            for setID in pending:
+                try:
+                    reviews = await self.client.getReviews(setID)
+                except Exception as e:
+                    self.errors[setID] = e
+                    continue
+                done[setID] = self.add(setID, reviews, replace=True)
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        return done
+    def __str__(self):
+        """
+        String interpretation of ReviewPipeline class
+
+        Returns:
+            str : number of aggregated sets
+        """
+        return f"ReviewPipeline of {len(self.aggregates)} sets"
@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+
+from collections import Counter
+
+from brickset.types import Sets, Subthemes, Themes, Years
+
+class _Aggregate:
+    """
+    Number of sets and their years in one theme or subtheme
+
+    Attributes:
+        setCount : int
+            number of sets
+        years : Counter
+            number of sets by year
+        subthemes : Counter
+            number of sets by subtheme, used by themes only
+        yearFrom : int ?
+            first year
+        yearTo : int ?
+            last year
+    """
+    __slots__ = ("setCount", "years", "subthemes", "yearFrom", "yearTo")
+    def __init__(self):
+        """
+        Initialization of empty _Aggregate class
+        """
+        self.setCount = 0
+        self.years = Counter()
+        self.subthemes = Counter()
+        self.yearFrom = None
+        self.yearTo = None
+    def add(self, year:int|None, subtheme:str|None=None):
+        """
+        Counts a set
+
+        Args:
+            year : year of the set
+            subtheme : subtheme of the set
+        """
+        self.setCount += 1
+        if subtheme is not None:
+            self.subthemes[subtheme] += 1
+        if year is not None:
+            self.years[year] += 1
+            if self.yearFrom is None or year < self.yearFrom:
+                self.yearFrom = year
+            if self.yearTo is None or year > self.yearTo:
+                self.yearTo = year
+    def remove(self, year:int|None, subtheme:str|None=None):
+        """
+        Stops counting a set
+
+        Args:
+            year : year of the set
+            subtheme : subtheme of the set
+        """
+        self.setCount -= 1
+        if subtheme is not None:
+            _decrement(self.subthemes, subtheme)
+        if year is not None and _decrement(self.years, year) and year in (self.yearFrom, self.yearTo):
+            # only a boundary year leaving needs a scan of the remaining years
+            self.yearFrom = min(self.years, default=None)
+            self.yearTo = max(self.years, default=None)
+
+class CatalogueRollup:
+    """
+    Themes, Subthemes and Years derived from a local collection of sets and kept up to date on every change
+
+    Counts are adjusted when a set is inserted, updated or deleted, so every view is read without scanning sets.
+    When index is given, the rollup wraps it - changes are forwarded to it and the rollup can be passed
+    to CatalogueSync instead of the index. Sets without subtheme are not counted in any subtheme.
+    Like getYears, years are returned as strings.
+
+    Attributes:
+        index : SetIndex ?
+            wrapped collection of sets
+    """
+    __slots__ = ("index", "_members", "_themes", "_subthemes", "_years")
+    def __init__(self, sets=(), index=None):
+        """
+        Initialization of CatalogueRollup class
+
+        Args:
+            sets : iterable of sets to count
+            index : collection of sets to wrap, its sets are counted
+        """
+        self.index = index
+        # setID -> (theme, subtheme, year) as counted
+        self._members = {}
+        self._themes = {}
+        self._subthemes = {}
+        self._years = {}
+        if index is not None:
+            for s in index:
+                self._add(s)
+        for s in sets:
+            self.insert(s)
+    def __len__(self):
+        """
+        Number of counted sets
+
+        Returns:
+            int : number of sets
+        """
+        return len(self._members)
+    def __contains__(self, setID:int):
+        return setID in self._members
+    def __iter__(self):
+        """
+        Iterates over sets of the wrapped index
+
+        Returns:
+            iterator : Sets
+        """
+        return iter(self.index if self.index is not None else ())
+    def _add(self, s:Sets):
+        """
+        Counts set
+
+        Args:
+            s : set to count
+        """
+        theme, subtheme, year = s.theme, s.subtheme, s.year
+        self._members[s.setID] = (theme, subtheme, year)
+        aggregate = self._themes.get(theme)
+        if aggregate is None:
+            aggregate = self._themes[theme] = _Aggregate()
+        aggregate.add(year, subtheme)
+        if subtheme is not None:
+            aggregate = self._subthemes.get((theme, subtheme))
+            if aggregate is None:
+                aggregate = self._subthemes[theme, subtheme] = _Aggregate()
+            aggregate.add(year)
+        if year is not None:
+            self._years[theme, year] = self._years.get((theme, year), 0) + 1
+    def _remove(self, setID:int):
+        """
+        Stops counting set
+
+        Args:
+            setID : ID of Lego set
+        """
+        member = self._members.pop(setID, None)
+        if member is None:
+            return
+        theme, subtheme, year = member
+        aggregate = self._themes[theme]
+        aggregate.remove(year, subtheme)
+        if not aggregate.setCount:
+            del self._themes[theme]
+        if subtheme is not None:
+            aggregate = self._subthemes[theme, subtheme]
+            aggregate.remove(year)
+            if not aggregate.setCount:
+                del self._subthemes[theme, subtheme]
+        if year is not None:
+            _decrement(self._years, (theme, year))
+    def insert(self, s:Sets):
+        """
+        Adds set, set with the same ID is replaced
+
+        Args:
+            s : set to add
+        """
+        if self.index is not None:
+            self.index.insert(s)
+        self._remove(s.setID)
+        self._add(s)
+    def update(self, s:Sets):
+        """
+        Replaces set when the wrapped index accepts the new version, always without index
+
+        Args:
+            s : new version of the set
+
+        Returns:
+            bool : True when the set was replaced
+        """
+        if self.index is not None and not self.index.update(s):
+            return False
+        self._remove(s.setID)
+        self._add(s)
+        return True
+    def delete(self, setID:int):
+        """
+        Removes set
+
+        Args:
+            setID : ID of Lego set
+
+        Returns:
+            Sets ? : set removed from the wrapped index
+        """
+        self._remove(setID)
+        return self.index.delete(setID) if self.index is not None else None
+    def get(self, setID:int):
+        """
+        Finds set in the wrapped index
+
+        Args:
+            setID : ID of Lego set
+
+        Returns:
+            Sets ? : set with given ID
+        """
+        return self.index.get(setID) if self.index is not None else None
+    def byTheme(self, theme:str):
+        """
+        Finds sets of theme in the wrapped index
+
+        Args:
+            theme : name of theme
+
+        Returns:
+            list[Sets] : sets of the theme
+        """
+        return self.index.byTheme(theme) if self.index is not None else []
+    def themeCount(self, theme:str):
+        """
+        Counts sets of theme
+
+        Args:
+            theme : name of theme
+
+        Returns:
+            int : number of sets
+        """
+        aggregate = self._themes.get(theme)
+        return 0 if aggregate is None else aggregate.setCount
+    def theme(self, theme:str):
+        """
+        Returns rollup of one theme
+
+        Args:
+            theme : name of theme
+
+        Returns:
+            Themes ? : counts of the theme, None when it has no sets
+        """
+        aggregate = self._themes.get(theme)
+        if aggregate is None:
+            return None
+        return Themes(theme, aggregate.setCount, len(aggregate.subthemes), aggregate.yearFrom, aggregate.yearTo)
+    def themes(self):
+        """
+        Returns rollups of all themes
+
+        Returns:
+            list[Themes] : themes ordered by name
+        """
+        return [self.theme(theme) for theme in sorted(self._themes, key=_sortKey)]
+    def subthemes(self, theme:str):
+        """
+        Returns rollups of subthemes of theme
+
+        Args:
+            theme : name of theme
+
+        Returns:
+            list[Subthemes] : subthemes ordered by name
+        """
+        aggregate = self._themes.get(theme)
+        if aggregate is None:
+            return []
+        result = []
+        for subtheme in sorted(aggregate.subthemes):
+            counts = self._subthemes[theme, subtheme]
+            result.append(Subthemes(theme, subtheme, counts.setCount, counts.yearFrom, counts.yearTo))
+        return result
+    def years(self, theme:str):
+        """
+        Returns number of sets of theme in every year
+
+        Args:
+            theme : name of theme
+
+        Returns:
+            list[Years] : years in ascending order
+        """
+        aggregate = self._themes.get(theme)
+        if aggregate is None:
+            return []
+        return [Years(theme, str(year), self._years[theme, year]) for year in sorted(aggregate.years)]
+    async def getThemes(self):
+        """
+        Returns all themes, same as BricksetClient.getThemes
+
+        Returns:
+            list[Themes] : themes
+        """
+        return self.themes()
+    async def getSubthemes(self, theme:str):
+        """
+        Returns subthemes of theme, same as BricksetClient.getSubthemes
+
+        Args:
+            theme : name of theme
+
+        Returns:
+            list[Subthemes] : subthemes
+        """
+        return self.subthemes(theme)
+    async def getYears(self, theme:str):
+        """
+        Returns years in which theme was produced, same as BricksetClient.getYears
+
+        Args:
+            theme : name of theme
+
+        Returns:
+            list[Years] : years with number of sets
+        """
+        return self.years(theme)
+    def __str__(self):
+        """
+        String interpretation of CatalogueRollup class
+
+        Returns:
+            str : number of themes and sets
+        """
+        return f"Rollup of {len(self._themes)} themes, {len(self)} sets"
+
+def _decrement(counter:dict, key):
+    """
+    Decreases count and drops keys reaching zero
+
+    Args:
+        counter : counts by key
+        key : key to decrease
+
+    Returns:
+        bool : True when the key was dropped
+    """
+    count = counter[key] - 1
+    if count:
+        counter[key] = count
+        return False
+    del counter[key]
+    return True
+
+def _sortKey(theme:str|None):
+    return (theme is None, theme or "")
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from heapq import heappop, heappush
+from itertools import count
+import time
+
+from brickset.client import BricksetError
+from brickset.types import ApiKeyUsage
+
+INTERACTIVE = 0
+BULK = 10
+
+_priority = ContextVar("brickset_priority", default=INTERACTIVE)
+
+class QuotaExceededError(BricksetError):
+    """
+    Raised when no API key has quota left for the request
+    """
+
+class TokenBucket:
+    """
+    Token bucket rate limiter
+
+    Attributes:
+        rate : float
+            number of tokens added per second
+        capacity : float
+            maximal number of stored tokens, i.e. size of a burst
+        tokens : float
+            currently available tokens
+    """
+    __slots__ = ("rate", "capacity", "tokens", "_updated")
+    def __init__(self, rate:float, capacity:float):
+        """
+        Initialization of TokenBucket class
+
+        Args:
+            rate : number of tokens added per second
+            capacity : maximal number of stored tokens
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    async def take(self):
+        """
+        Waits until a token is available and takes it
+        """
+        self._refill()
+        while self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+    def refund(self):
+        """
+        Returns unused token
+        """
+        self.tokens = min(self.capacity, self.tokens + 1)
+    def __str__(self):
+        """
+        String interpretation of TokenBucket class
+
+        Returns:
+            str : rate of the bucket
+        """
+        return f"{self.rate}/s, burst {self.capacity}"
+
+class KeyState:
+    """
+    Usage of one API key during the current day
+
+    Attributes:
+        apiKey : str
+            Brickset API key
+        dailyQuota : int
+            number of calls allowed per day
+        used : int
+            number of calls made today
+        day : date
+            day to which used belongs, UTC
+    """
+    __slots__ = ("apiKey", "dailyQuota", "used", "day")
+    def __init__(self, apiKey:str, dailyQuota:int):
+        """
+        Initialization of KeyState class
+
+        Args:
+            apiKey : Brickset API key
+            dailyQuota : number of calls allowed per day
+        """
+        self.apiKey = apiKey
+        self.dailyQuota = dailyQuota
+        self.used = 0
+        self.day = _today()
+    @property
+    def remaining(self):
+        """
+        Number of calls left today
+
+        Returns:
+            int : remaining quota
+        """
+        today = _today()
+        if self.day != today:
+            self.day = today
+            self.used = 0
+        return self.dailyQuota - self.used
+    def __str__(self):
+        """
+        String interpretation of KeyState class
+
+        Returns:
+            str : used and allowed calls
+        """
+        return f"{self.used}/{self.dailyQuota} on {self.day}"
+
+class RequestScheduler:
+    """
+    Hands out API keys to requests
+
+    Requests wait for a token of the rate limiter and are served by priority, lower number first.
+    Every request gets the key with the most quota left. Requests with priority BULK or lower
+    leave bulkReserve calls of every key for interactive requests.
+
+    Attributes:
+        keys : list[KeyState]
+            usage of every key
+        bucket : TokenBucket
+            rate limiter shared by all keys
+        bulkReserve : int
+            calls per key that only interactive requests may use
+    """
+    def __init__(self, apiKeys, dailyQuota:int=10000, rate:float=5.0, burst:float=10.0, bulkReserve:int=0):
+        """
+        Initialization of RequestScheduler class
+
+        Args:
+            apiKeys : Brickset API keys
+            dailyQuota : number of calls allowed per key per day
+            rate : number of requests per second
+            burst : number of requests that may be sent at once
+            bulkReserve : calls per key that only interactive requests may use
+        """
+        self.keys = [KeyState(apiKey, dailyQuota) for apiKey in apiKeys]
+        self.bucket = TokenBucket(rate, burst)
+        self.bulkReserve = bulkReserve
+        self._waiting = []
+        self._sequence = count()
+        self._task = None
+    @staticmethod
+    @contextmanager
+    def priority(level:int):
+        """
+        Sets priority of requests made inside the block, including tasks started from it
+
+        Args:
+            level : INTERACTIVE, BULK or any other number, lower is served first
+        """
+        token = _priority.set(level)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+    async def acquire(self):
+        """
+        Waits for the turn of the request and returns API key it should use
+
+        Returns:
+            str : API key
+        """
+        future = asyncio.get_running_loop().create_future()
+        heappush(self._waiting, (_priority.get(), next(self._sequence), future))
+        if self._task is None:
+            self._task = asyncio.create_task(self._dispatch())
+        return await future
+    async def _dispatch(self):
+        """
+        Serves waiting requests by priority as tokens become available
+        """
+        try:
+            while self._waiting:
+                await self.bucket.take()
+                while self._waiting:
+                    priority, _, future = heappop(self._waiting)
+                    if not future.cancelled():
+                        break
+                else:
+                    self.bucket.refund()
+                    break
+                key = self._pickKey(priority)
+                if key is None:
+                    self.bucket.refund()
+                    future.set_exception(QuotaExceededError("Daily quota of all API keys is used"))
+                    continue
+                key.used += 1
+                future.set_result(key.apiKey)
+        finally:
+            self._task = None
+    def _pickKey(self, priority:int):
+        """
+        Returns key with the most quota left
+
+        Args:
+            priority : priority of the request
+
+        Returns:
+            KeyState ? : key to use, None when the quota is used up
+        """
+        reserve = self.bulkReserve if priority >= BULK else 0
+        key = max(self.keys, key=lambda k: k.remaining, default=None)
+        if key is None or key.remaining <= reserve:
+            return None
+        return key
+    def markExhausted(self, apiKey:str):
+        """
+        Marks key as having no quota left today, e.g. after the API refused it
+
+        Args:
+            apiKey : Brickset API key
+        """
+        for key in self.keys:
+            if key.apiKey == apiKey:
+                key.used = key.dailyQuota
+    async def refreshUsage(self, client):
+        """
+        Loads usage of every key from getKeyUsageStats
+
+        Args:
+            client : BricksetClient used for the calls
+        """
+        today = _today()
+        for key in self.keys:
+            data = await client.request("getKeyUsageStats", apiKey=key.apiKey)
+            used = 0
+            for usage in map(ApiKeyUsage.deJson, data.get("apiKeyUsage", ())):
+                if usage.dateStamp == today:
+                    used = usage.count or 0
+            key.day = today
+            key.used = max(key.used, used)
+    @property
+    def remaining(self):
+        """
+        Number of calls left today on all keys
+
+        Returns:
+            int : remaining quota
+        """
+        return sum(key.remaining for key in self.keys)
+    def __str__(self):
+        """
+        String interpretation of RequestScheduler class
+
+        Returns:
+            str : remaining quota and number of waiting requests
+        """
+        return f"{self.remaining} calls left on {len(self.keys)} keys, {len(self._waiting)} waiting"
+
+def _today():
+    """
+    Returns current day in UTC, Brickset counts usage per UTC day
+
+    Returns:
+        date : today
+    """
+    return datetime.now(timezone.utc).date()
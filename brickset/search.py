@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+
+from bisect import bisect_left, insort
+from heapq import nlargest
+from html.parser import HTMLParser
+from math import log
+import re
+
+from brickset.types import Sets
+
+_TOKEN = re.compile(r"\w+")
+_QUERY = re.compile(r'"([^"]*)"|(\S+)')
+# positions skipped between fields, so a phrase never spans two of them
+_FIELD_GAP = 16
+
+def tokenize(text:str|None):
+    """
+    Splits text into lower case words
+
+    Args:
+        text : text to split, may be None
+
+    Returns:
+        list[str] : words
+    """
+    return _TOKEN.findall(text.lower()) if text else []
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+    def handle_data(self, data):
+        self.parts.append(data)
+    def handle_starttag(self, tag, attrs):
+        self.parts.append(" ")
+    def handle_endtag(self, tag):
+        self.parts.append(" ")
+
+def stripHTML(text:str):
+    """
+    Removes tags from HTML and decodes its entities
+
+    Args:
+        text : HTML text
+
+    Returns:
+        str : plain text, tags are replaced by spaces
+    """
+    extractor = _TextExtractor()
+    extractor.feed(text)
+    extractor.close()
+    return "".join(extractor.parts)
+
+class SearchIndex:
+    """
+    Inverted index of set names, descriptions, tags, notes and reviews ranked with BM25
+
+    Every set is one document, reviews added for a set are part of its document. Documents can be added,
+    replaced and removed at any time. Queries are words, word* for prefixes and "quoted phrases";
+    a document has to match all of them.
+
+    Attributes:
+        k1 : float
+            BM25 term frequency saturation
+        b : float
+            BM25 length normalization
+        postings : dict[str, dict[int, list[int]]]
+            positions of word in every document by word
+        lengths : dict[int, int]
+            number of words by setID
+    """
+    __slots__ = ("k1", "b", "postings", "lengths", "_fields", "_totalLength", "_vocabulary")
+    def __init__(self, k1:float=1.2, b:float=0.75):
+        """
+        Initialization of SearchIndex class
+
+        Args:
+            k1 : BM25 term frequency saturation
+            b : BM25 length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.lengths = {}
+        self._fields = {}
+        self._totalLength = 0
+        # sorted words, built by the first expand and kept sorted by later changes
+        self._vocabulary = None
+    def __len__(self):
+        """
+        Number of indexed documents
+
+        Returns:
+            int : number of sets
+        """
+        return len(self.lengths)
+    def __contains__(self, setID:int):
+        return setID in self.lengths
+    def addSet(self, s:Sets):
+        """
+        Indexes name, description, notes and tags of set, replacing its previous text
+
+        Args:
+            s : set to index
+        """
+        fields = [tokenize(s.name)]
+        extendedData = s.extendedData
+        if extendedData is not None:
+            fields.append(tokenize(extendedData.description))
+            fields.append(tokenize(extendedData.notes))
+            fields.extend(tokenize(tag) for tag in extendedData.tags or ())
+        self._fields.setdefault(s.setID, {})["set"] = fields
+        self._reindex(s.setID)
+    def addSets(self, sets):
+        """
+        Indexes many sets
+
+        Args:
+            sets : iterable of Sets
+        """
+        for s in sets:
+            self.addSet(s)
+    def addReviews(self, setID:int, reviews):
+        """
+        Indexes reviews of set, replacing its previously added reviews
+
+        Args:
+            setID : ID of reviewed set
+            reviews : list of Reviews
+        """
+        fields = []
+        for review in reviews:
+            fields.append(tokenize(review.title))
+            fields.append(tokenize(stripHTML(review.review) if review.HTML and review.review else review.review))
+        self._fields.setdefault(setID, {})["reviews"] = fields
+        self._reindex(setID)
+    def remove(self, setID:int):
+        """
+        Removes set and its reviews from the index
+
+        Args:
+            setID : ID of Lego set
+        """
+        self._unindex(setID)
+        self._fields.pop(setID, None)
+    def _unindex(self, setID:int):
+        """
+        Removes postings of document
+
+        Args:
+            setID : ID of Lego set
+        """
+        length = self.lengths.pop(setID, None)
+        if length is None:
+            return
+        self._totalLength -= length
+        vocabulary = self._vocabulary
+        for source in self._fields[setID].values():
+            for tokens in source:
+                for token in tokens:
+                    documents = self.postings.get(token)
+                    if documents is not None and documents.pop(setID, None) is not None and not documents:
+                        del self.postings[token]
+                        if vocabulary is not None:
+                            del vocabulary[bisect_left(vocabulary, token)]
+    def _reindex(self, setID:int):
+        """
+        Rebuilds postings of document from its fields
+
+        Args:
+            setID : ID of Lego set
+        """
+        self._unindex(setID)
+        postings = self.postings
+        vocabulary = self._vocabulary
+        position = 0
+        length = 0
+        for source in self._fields[setID].values():
+            for tokens in source:
+                for token in tokens:
+                    documents = postings.get(token)
+                    if documents is None:
+                        documents = postings[token] = {}
+                        if vocabulary is not None:
+                            insort(vocabulary, token)
+                    positions = documents.get(setID)
+                    if positions is None:
+                        positions = documents[setID] = []
+                    positions.append(position)
+                    position += 1
+                length += len(tokens)
+                position += _FIELD_GAP
+        self.lengths[setID] = length
+        self._totalLength += length
+    def expand(self, prefix:str):
+        """
+        Finds indexed words starting with prefix
+
+        Args:
+            prefix : beginning of words
+
+        Returns:
+            list[str] : matching words in alphabetical order
+        """
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        vocabulary = self._vocabulary
+        start = bisect_left(vocabulary, prefix)
+        stop = start
+        while stop < len(vocabulary) and vocabulary[stop].startswith(prefix):
+            stop += 1
+        return vocabulary[start:stop]
+    def _phrase(self, words:list):
+        """
+        Finds documents containing words next to each other
+
+        Args:
+            words : words of the phrase
+
+        Returns:
+            set[int] : matching setIDs
+        """
+        lists = [self.postings.get(word) for word in words]
+        if not all(lists):
+            return set()
+        lists.sort(key=len)
+        found = set()
+        for setID in lists[0].keys() & set.intersection(*(set(documents) for documents in lists[1:])):
+            # start positions of the phrase consistent with every word
+            starts = set(self.postings[words[0]][setID])
+            for offset, word in enumerate(words[1:], 1):
+                starts.intersection_update([position - offset for position in self.postings[word][setID]])
+                if not starts:
+                    break
+            else:
+                found.add(setID)
+        return found
+    def search(self, query:str, limit:int|None=10):
+        """
+        Finds sets matching all words, prefixes and phrases of query
+
+        Args:
+            query : e.g. 'millennium falc* "ultimate collector"'
+            limit : maximal number of results, all when None
+
+        Returns:
+            list[tuple[int, float]] : setID and BM25 score, best first
+        """
+        candidates = None
+        scored = []
+        for phrase, word in _QUERY.findall(query):
+            words = tokenize(phrase or word)
+            if not words:
+                continue
+            if phrase and len(words) > 1:
+                matches = self._phrase(words)
+            else:
+                if word.endswith("*"):
+                    # only the last word of e.g. x-wi* is a prefix
+                    expanded = self.expand(words.pop())
+                    matches = set()
+                    for match in expanded:
+                        matches.update(self.postings[match])
+                    scored.extend(expanded)
+                else:
+                    matches = None
+                for w in words:
+                    documents = self.postings.get(w, ())
+                    matches = set(documents) if matches is None else matches.intersection(documents)
+            scored.extend(words)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+        if not candidates:
+            return []
+        scores = dict.fromkeys(candidates, 0.0)
+        count = len(self.lengths)
+        averageLength = self._totalLength / count or 1.0
+        k1 = self.k1
+        b = self.b
+        lengths = self.lengths
+        for word in set(scored):
+            documents = self.postings.get(word)
+            if not documents:
+                continue
+            idf = log(1 + (count - len(documents) + 0.5) / (len(documents) + 0.5))
+            for setID in candidates.intersection(documents):
+                frequency = len(documents[setID])
+                scores[setID] += idf * frequency * (k1 + 1) / (frequency + k1 * (1 - b + b * lengths[setID] / averageLength))
+        ranked = scores.items()
+        return sorted(ranked, key=lambda item: -item[1]) if limit is None else nlargest(limit, ranked, key=lambda item: item[1])
+    def __str__(self):
+        """
+        String interpretation of SearchIndex class
+
+        Returns:
+            str : number of documents and words
+        """
+        return f"SearchIndex of {len(self)} sets and {len(self.postings)} words"
@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+
+"""
+Binary snapshot of a Sets catalogue
+
+Layout of the file, all numbers little endian:
+    header : magic, version, record size, number of records, offset of string tables, offset of heap
+    records : one fixed size record per set, sorted by setID
+    string tables : for every categorical field a count followed by heap references of its distinct values
+    heap : utf-8 text of all strings
+
+Strings are referenced by (offset, length) into the heap, length 0xFFFFFFFF means None.
+Categorical fields hold an index into their string table. Missing numbers are stored as sentinels.
+"""
+
+from bisect import bisect_left
+from datetime import date, datetime, timedelta, timezone
+import math
+import mmap
+import os
+import struct
+
+from brickset.pool import STRINGS
+from brickset.types import AgeRange, Barcodes, Collection, Collections, Dimensions, ExtendedData, Image, LEGOCOM_REGIONS, LEGOCom, LEGOComDetails, Sets
+
+MAGIC = b"BRSN"
+VERSION = 1
+CATEGORICAL_FIELDS = ("theme", "themeGroup", "subtheme", "category", "packagingType", "availability")
+
+_HEADER = struct.Struct("<4sHIIQQ")
+_RECORD = struct.Struct("<iiibiidiii" + "II" * 5 + "I" * 6 + "bbiiII" + "ii" + "dii" * 4 + "ii" + "dddd" + "II" * 5 + "q")
+_SETID = struct.Struct("<i")
+_COUNT = struct.Struct("<I")
+_REF = struct.Struct("<II")
+
+_NULL_INT = -2**31
+_NULL_LONG = -2**63
+_NULL_REF = 0xFFFFFFFF
+_TAG_SEPARATOR = "\x1f"
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def save_snapshot(sets, path:str):
+    """
+    Writes sets to a snapshot file, the file is replaced atomically
+
+    Args:
+        sets : iterable of Sets
+        path : path of the snapshot
+    """
+    heap = bytearray()
+    heapRefs = {}
+    def ref(value:str|None):
+        if value is None:
+            return _NULL_REF, 0
+        found = heapRefs.get(value)
+        if found is None:
+            data = value.encode("utf-8")
+            found = heapRefs[value] = (len(heap), len(data))
+            heap.extend(data)
+        return found
+    tables = {name: {} for name in CATEGORICAL_FIELDS}
+    def code(name:str, value:str|None):
+        table = tables[name]
+        found = table.get(value)
+        if found is None:
+            found = table[value] = len(table)
+        return found
+    records = bytearray()
+    for s in sorted(sets, key=lambda s: s.setID):
+        fields = [s.setID, _int(s.numberVariant), _int(s.year), _bool(s.released), _int(s.pieces), _int(s.minifigs), _float(s.rating),
+                  _int(s.reviewCount), _int(s.instructionsCount), _int(s.additionalImageCount)]
+        image = s.image or Image(None, None)
+        for value in (s.number, s.name, s.bricksetURL, image.thumbnailURL, image.imageURL):
+            fields.extend(ref(None if value is None else str(value)))
+        fields.extend(code(name, getattr(s, name)) for name in CATEGORICAL_FIELDS)
+        collection = s.collection or Collection(None, None, None, None, None)
+        fields.extend((_bool(collection.owned), _bool(collection.wanted), _int(collection.qtyOwned), _int(collection.rating)))
+        fields.extend(ref(collection.notes))
+        collections = s.collections or Collections(None, None)
+        fields.extend((_int(collections.ownedBy), _int(collections.wantedBy)))
+        for region in LEGOCOM_REGIONS:
+            details = getattr(s.legoCom, region, None) if s.legoCom is not None else None
+            if details is None:
+                fields.extend((math.nan, 0, 0))
+            else:
+                fields.extend((_float(details.retailPrice), _ordinal(details.dateFirstAvailable), _ordinal(details.dateLastAvailable)))
+        ageRange = s.ageRange or AgeRange(None, None)
+        fields.extend((_int(ageRange.min_s), _int(ageRange.max_s)))
+        dimensions = s.dimensions or Dimensions(None, None, None, None)
+        fields.extend((_float(dimensions.height), _float(dimensions.width), _float(dimensions.depth), _float(dimensions.weight)))
+        barcode = s.barcode or Barcodes(None, None)
+        fields.extend(ref(barcode.EAN))
+        fields.extend(ref(barcode.UPC))
+        extendedData = s.extendedData or ExtendedData(None, None, None)
+        fields.extend(ref(extendedData.notes))
+        fields.extend(ref(None if extendedData.tags is None else _TAG_SEPARATOR.join(extendedData.tags)))
+        fields.extend(ref(extendedData.description))
+        fields.append(_micros(s.lastUpdated))
+        records.extend(_RECORD.pack(*fields))
+    tableData = bytearray()
+    for name in CATEGORICAL_FIELDS:
+        values = tables[name]
+        tableData.extend(_COUNT.pack(len(values)))
+        for value in values:
+            tableData.extend(_REF.pack(*ref(value)))
+    tablesOffset = _HEADER.size + len(records)
+    heapOffset = tablesOffset + len(tableData)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, _RECORD.size, len(records) // _RECORD.size, tablesOffset, heapOffset))
+        file.write(records)
+        file.write(tableData)
+        file.write(heap)
+    os.replace(temporary, path)
+
+def load_snapshot(path:str):
+    """
+    Opens snapshot file, Sets are built only when accessed
+
+    Args:
+        path : path of the snapshot
+
+    Returns:
+        Snapshot : memory mapped snapshot
+    """
+    return Snapshot(path)
+
+class Snapshot:
+    """
+    Memory mapped snapshot of sets
+
+    The file is mapped read only, so its pages are shared between processes that open it.
+    Every access builds a new Sets object from its record.
+
+    Attributes:
+        path : str
+            path of the snapshot
+        categories : dict[str, list[str]]
+            distinct values of categorical fields
+    """
+    def __init__(self, path:str):
+        """
+        Initialization of Snapshot class
+
+        Args:
+            path : path of the snapshot
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, recordSize, count, tablesOffset, heapOffset = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION or recordSize != _RECORD.size:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a snapshot of version {VERSION}")
+        self._count = count
+        self._heapOffset = heapOffset
+        self.categories = {}
+        offset = tablesOffset
+        for name in CATEGORICAL_FIELDS:
+            size, = _COUNT.unpack_from(self._mmap, offset)
+            offset += _COUNT.size
+            values = []
+            for _ in range(size):
+                value = self._string(*_REF.unpack_from(self._mmap, offset))
+                values.append(STRINGS.intern(value))
+                offset += _REF.size
+            self.categories[name] = values
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc_info):
+        self.close()
+    def close(self):
+        """
+        Unmaps the file
+        """
+        self._mmap.close()
+    def __len__(self):
+        """
+        Number of sets
+
+        Returns:
+            int : number of records
+        """
+        return self._count
+    def __getitem__(self, position:int):
+        """
+        Builds set stored at position, sets are ordered by setID
+
+        Args:
+            position : index of the record
+
+        Returns:
+            Sets : deserialized set
+        """
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError("snapshot index out of range")
+        return self._build(_RECORD.unpack_from(self._mmap, _HEADER.size + position * _RECORD.size))
+    def __iter__(self):
+        """
+        Iterates over all sets
+
+        Returns:
+            generator : Sets ordered by setID
+        """
+        unpack = _RECORD.unpack_from
+        for offset in range(_HEADER.size, _HEADER.size + self._count * _RECORD.size, _RECORD.size):
+            yield self._build(unpack(self._mmap, offset))
+    def setID(self, position:int):
+        """
+        Reads setID of record without building the set
+
+        Args:
+            position : index of the record
+
+        Returns:
+            int : ID of Lego set
+        """
+        return _SETID.unpack_from(self._mmap, _HEADER.size + position * _RECORD.size)[0]
+    def get(self, setID:int):
+        """
+        Finds set by its ID using binary search
+
+        Args:
+            setID : ID of Lego set
+
+        Returns:
+            Sets ? : set with given ID
+        """
+        position = bisect_left(range(self._count), setID, key=self.setID)
+        if position < self._count and self.setID(position) == setID:
+            return self[position]
+        return None
+    def _string(self, offset:int, length:int):
+        """
+        Decodes string from the heap
+
+        Args:
+            offset : position in the heap
+            length : length in bytes
+
+        Returns:
+            str ? : decoded string
+        """
+        if offset == _NULL_REF:
+            return None
+        start = self._heapOffset + offset
+        return self._mmap[start:start + length].decode("utf-8")
+    def _build(self, f:tuple):
+        """
+        Builds set from unpacked record
+
+        Args:
+            f : fields of the record
+
+        Returns:
+            Sets : deserialized set
+        """
+        string = self._string
+        categories = self.categories
+        theme, themeGroup, subtheme, category, packagingType, availability = (categories[name][code] for name, code in zip(CATEGORICAL_FIELDS, f[20:26]))
+        legoCom = LEGOCom(*(LEGOComDetails(_unfloat(f[34 + i]), _unordinal(f[35 + i]), _unordinal(f[36 + i])) for i in range(0, 12, 3)))
+        tags = string(f[58], f[59])
+        return Sets(f[0], string(f[10], f[11]), _unint(f[1]), string(f[12], f[13]), _unint(f[2]), theme, themeGroup, subtheme, category, _unbool(f[3]),
+                    _unint(f[4]), _unint(f[5]), Image(string(f[16], f[17]), string(f[18], f[19])), string(f[14], f[15]),
+                    Collection(_unbool(f[26]), _unbool(f[27]), _unint(f[28]), _unint(f[29]), string(f[30], f[31])),
+                    Collections(_unint(f[32]), _unint(f[33])), legoCom, _unfloat(f[6]), _unint(f[7]), packagingType, availability,
+                    _unint(f[8]), _unint(f[9]), AgeRange(_unint(f[46]), _unint(f[47])),
+                    Dimensions(_unfloat(f[48]), _unfloat(f[49]), _unfloat(f[50]), _unfloat(f[51])),
+                    Barcodes(string(f[52], f[53]), string(f[54], f[55])),
+                    ExtendedData(string(f[56], f[57]), [] if not tags else tags.split(_TAG_SEPARATOR), string(f[60], f[61])),
+                    _unmicros(f[62]))
+    def __str__(self):
+        """
+        String interpretation of Snapshot class
+
+        Returns:
+            str : path and number of sets
+        """
+        return f"Snapshot {self.path} with {self._count} sets"
+
+def _int(value):
+    return _NULL_INT if value is None else int(value)
+
+def _unint(value:int):
+    return None if value == _NULL_INT else value
+
+def _float(value):
+    return math.nan if value is None else float(value)
+
+def _unfloat(value:float):
+    return None if value != value else value
+
+def _bool(value):
+    return -1 if value is None else int(bool(value))
+
+def _unbool(value:int):
+    return None if value < 0 else bool(value)
+
+def _ordinal(value:date|None):
+    return 0 if value is None else value.toordinal()
+
+def _unordinal(value:int):
+    return None if not value else date.fromordinal(value)
+
+def _micros(value:date|None):
+    if value is None:
+        return _NULL_LONG
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+def _unmicros(value:int):
+    return None if value == _NULL_LONG else _EPOCH + timedelta(microseconds=value)
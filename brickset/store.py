@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timezone
+import sqlite3
+
+from brickset.types import LEGOCOM_REGIONS, Sets
+
+MAX_PAGE_SIZE = 500
+
+# orderBy values of getSets, every order ends with number, variant and setID so paging is stable
+ORDERS = {
+    "Number": ("CAST(number AS INTEGER)", "number"),
+    "YearFrom": ("year",),
+    "Pieces": ("pieces",),
+    "Minifigs": ("minifigs",),
+    "Rating": ("rating",),
+    "USRetailPrice": ("USRetailPrice",),
+    "UKRetailPrice": ("UKRetailPrice",),
+    "CARetailPrice": ("CARetailPrice",),
+    "DERetailPrice": ("DERetailPrice",),
+    "USPricePerPiece": ("USRetailPrice / NULLIF(pieces, 0)",),
+    "UKPricePerPiece": ("UKRetailPrice / NULLIF(pieces, 0)",),
+    "CAPricePerPiece": ("CARetailPrice / NULLIF(pieces, 0)",),
+    "DEPricePerPiece": ("DERetailPrice / NULLIF(pieces, 0)",),
+    "Theme": ("theme",),
+    "Subtheme": ("subtheme",),
+    "Name": ("name",),
+    "Random": ("RANDOM()",),
+    "QtyOwned": ("qtyOwned",),
+    "OwnCount": ("ownedBy",),
+    "WantCount": ("wantedBy",),
+    "UserRating": ("userRating",),
+}
+
+_COLUMNS = ("setID", "number", "numberVariant", "name", "year", "theme", "themeGroup", "subtheme", "category", "pieces", "minifigs", "rating", "ownedBy", "wantedBy",
+            "owned", "wanted", "qtyOwned", "userRating", "USRetailPrice", "UKRetailPrice", "CARetailPrice", "DERetailPrice", "lastUpdated", "body")
+
+class LocalStore:
+    """
+    Local copy of the catalogue in SQLite answering getSets queries
+
+    getSets, getAllSets and iterSets take the same arguments and return the same types as BricksetClient,
+    so either of them can serve a caller. The store also has the methods of SetIndex used by CatalogueSync,
+    which can keep it up to date.
+
+    Every set is stored as its to_json encoding next to indexed columns used for filtering and ordering.
+    """
+    def __init__(self, path:str=":memory:"):
+        """
+        Initialization of LocalStore class
+
+        Args:
+            path : path of the SQLite database
+        """
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS sets (setID INTEGER PRIMARY KEY, number TEXT, numberVariant INTEGER, name TEXT COLLATE NOCASE, year INTEGER,
+                            theme TEXT COLLATE NOCASE, themeGroup TEXT, subtheme TEXT COLLATE NOCASE, category TEXT, pieces INTEGER, minifigs INTEGER, rating REAL,
+                            ownedBy INTEGER, wantedBy INTEGER, owned INTEGER, wanted INTEGER, qtyOwned INTEGER, userRating REAL,
+                            USRetailPrice REAL, UKRetailPrice REAL, CARetailPrice REAL, DERetailPrice REAL, lastUpdated TEXT, body BLOB NOT NULL)""")
+        self._db.execute("CREATE TABLE IF NOT EXISTS tags (tag TEXT COLLATE NOCASE, setID INTEGER, PRIMARY KEY (tag, setID)) WITHOUT ROWID")
+        for name, columns in (("themeYear", "theme, year"), ("subtheme", "subtheme"), ("year", "year"), ("number", "number, numberVariant"), ("lastUpdated", "lastUpdated")):
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS sets_{name} ON sets ({columns})")
+        self._db.execute("CREATE INDEX IF NOT EXISTS tags_setID ON tags (setID)")
+    def close(self):
+        """
+        Closes the database
+        """
+        self._db.close()
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, *exc_info):
+        self.close()
+    def __len__(self):
+        """
+        Number of stored sets
+
+        Returns:
+            int : number of sets
+        """
+        return self._db.execute("SELECT COUNT(*) FROM sets").fetchone()[0]
+    def __contains__(self, setID:int):
+        return self._db.execute("SELECT 1 FROM sets WHERE setID = ?", (setID,)).fetchone() is not None
+    def __iter__(self):
+        """
+        Iterates over all sets
+
+        Returns:
+            iterator : Sets ordered by setID
+        """
+        return (Sets.deJson(body) for body, in self._db.execute("SELECT body FROM sets ORDER BY setID"))
+    def get(self, setID:int):
+        """
+        Finds set by its ID
+
+        Args:
+            setID : ID of Lego set
+
+        Returns:
+            Sets ? : set with given ID
+        """
+        row = self._db.execute("SELECT body FROM sets WHERE setID = ?", (setID,)).fetchone()
+        return None if row is None else Sets.deJson(row[0])
+    def insert(self, s:Sets):
+        """
+        Stores set, set with the same ID is replaced
+
+        Args:
+            s : set to store
+        """
+        self.insertMany((s,))
+    def insertMany(self, sets):
+        """
+        Stores many sets in one transaction
+
+        Args:
+            sets : iterable of Sets
+        """
+        with self._transaction():
+            for s in sets:
+                self._db.execute(f"INSERT OR REPLACE INTO sets ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})", _row(s))
+                self._db.execute("DELETE FROM tags WHERE setID = ?", (s.setID,))
+                extendedData = s.extendedData
+                if extendedData is not None and extendedData.tags:
+                    self._db.executemany("INSERT OR IGNORE INTO tags (tag, setID) VALUES (?, ?)", ((tag, s.setID) for tag in extendedData.tags))
+    def update(self, s:Sets):
+        """
+        Replaces stored set when the new one was updated later
+
+        Args:
+            s : new version of the set
+
+        Returns:
+            bool : True when the store was changed
+        """
+        row = self._db.execute("SELECT lastUpdated FROM sets WHERE setID = ?", (s.setID,)).fetchone()
+        lastUpdated = _timestamp(s.lastUpdated)
+        if row is not None and row[0] is not None and lastUpdated is not None and lastUpdated <= row[0]:
+            return False
+        self.insert(s)
+        return True
+    def delete(self, setID:int):
+        """
+        Removes set from the store
+
+        Args:
+            setID : ID of Lego set
+
+        Returns:
+            Sets ? : removed set
+        """
+        s = self.get(setID)
+        if s is not None:
+            with self._transaction():
+                self._db.execute("DELETE FROM sets WHERE setID = ?", (setID,))
+                self._db.execute("DELETE FROM tags WHERE setID = ?", (setID,))
+        return s
+    def byTheme(self, theme:str):
+        """
+        Finds sets of theme
+
+        Args:
+            theme : name of theme
+
+        Returns:
+            list[Sets] : sets of the theme
+        """
+        return [Sets.deJson(body) for body, in self._db.execute("SELECT body FROM sets WHERE theme = ?", (theme,))]
+    def themeCount(self, theme:str):
+        """
+        Counts sets of theme
+
+        Args:
+            theme : name of theme
+
+        Returns:
+            int : number of sets
+        """
+        return self._db.execute("SELECT COUNT(*) FROM sets WHERE theme = ?", (theme,)).fetchone()[0]
+    def _transaction(self):
+        return _Transaction(self._db)
+    def query(self, **params):
+        """
+        Answers getSets query
+
+        Args:
+            params : getSets parameters - setID, query, theme, subtheme, setNumber, year, tag, owned, wanted,
+                     updatedSince, orderBy, pageSize, pageNumber and extendedData, lists are comma separated
+
+        Returns:
+            tuple[list[Sets], int] : sets on the page and number of all matching sets
+        """
+        params = dict(params)
+        pageSize = min(int(params.pop("pageSize", 20)), MAX_PAGE_SIZE)
+        pageNumber = max(int(params.pop("pageNumber", 1)), 1)
+        orderBy = str(params.pop("orderBy", "Number"))
+        params.pop("extendedData", None)
+        descending = orderBy.endswith("DESC")
+        order = ORDERS.get(orderBy[:-4] if descending else orderBy)
+        if order is None:
+            raise ValueError(f"Unknown orderBy {orderBy}")
+        where, arguments = _conditions(params)
+        direction = " DESC" if descending else ""
+        orderClause = ", ".join(f"{expression}{direction}" for expression in order)
+        matches = self._db.execute(f"SELECT COUNT(*) FROM sets WHERE {where}", arguments).fetchone()[0]
+        rows = self._db.execute(f"SELECT body FROM sets WHERE {where} ORDER BY {orderClause}, number, numberVariant, setID LIMIT ? OFFSET ?", arguments + [pageSize, (pageNumber - 1) * pageSize])
+        return [Sets.deJson(body) for body, in rows], matches
+    async def getSets(self, **params):
+        """
+        Finds sets, see getSets documentation for available params
+
+        Args:
+            params : query parameters, e.g. theme, year, pageSize, pageNumber
+
+        Returns:
+            list[Sets] : matching sets
+        """
+        return self.query(**params)[0]
+    async def getAllSets(self, pageSize:int=500, **params):
+        """
+        Finds sets on all pages
+
+        Args:
+            pageSize : number of sets on one page
+            params : query parameters, e.g. theme, year
+
+        Returns:
+            list[Sets] : matching sets in page order
+        """
+        return [s async for s in self.iterSets(pageSize, **params)]
+    async def iterSets(self, pageSize:int=500, prefetch:int=2, **params):
+        """
+        Yields sets from all pages
+
+        Args:
+            pageSize : number of sets on one page
+            prefetch : accepted for compatibility with BricksetClient, pages are read on demand
+            params : query parameters, e.g. theme, year
+
+        Returns:
+            async generator : Sets in page order
+        """
+        pageNumber = 1
+        while True:
+            sets, matches = self.query(**params, pageSize=pageSize, pageNumber=pageNumber)
+            for s in sets:
+                yield s
+            if pageNumber * pageSize >= matches or not sets:
+                return
+            pageNumber += 1
+    def __str__(self):
+        """
+        String interpretation of LocalStore class
+
+        Returns:
+            str : number of stored sets
+        """
+        return f"LocalStore with {len(self)} sets"
+
+class _Transaction:
+    """
+    Context manager wrapping statements in one transaction
+    """
+    __slots__ = ("_db",)
+    def __init__(self, db:sqlite3.Connection):
+        self._db = db
+    def __enter__(self):
+        self._db.execute("BEGIN")
+    def __exit__(self, excType, *exc_info):
+        self._db.execute("ROLLBACK" if excType is not None else "COMMIT")
+
+def _split(value):
+    return [part.strip() for part in str(value).split(",") if part.strip()]
+
+def _conditions(params:dict):
+    """
+    Translates getSets filters to SQL
+
+    Args:
+        params : filters of the query
+
+    Returns:
+        tuple[str, list] : where clause and its arguments
+    """
+    clauses = ["1"]
+    arguments = []
+    def anyOf(column:str, values:list):
+        clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+        arguments.extend(values)
+    for name, value in params.items():
+        if value is None or value == "":
+            continue
+        if name == "setID":
+            anyOf("setID", [int(part) for part in _split(value)])
+        elif name in ("theme", "subtheme"):
+            anyOf(name, _split(value))
+        elif name == "year":
+            anyOf("year", [int(part) for part in _split(value)])
+        elif name == "setNumber":
+            numbers = []
+            for part in _split(value):
+                number, _, variant = part.partition("-")
+                numbers.append("(number = ? AND numberVariant = ?)" if variant else "number = ?")
+                arguments.extend((number, int(variant)) if variant else (number,))
+            clauses.append(f"({' OR '.join(numbers)})")
+        elif name == "tag":
+            clauses.append(f"setID IN (SELECT setID FROM tags WHERE tag IN ({', '.join('?' * len(_split(value)))}))")
+            arguments.extend(_split(value))
+        elif name in ("owned", "wanted"):
+            if int(value):
+                clauses.append(f"{name} = 1")
+        elif name == "updatedSince":
+            clauses.append("lastUpdated >= ?")
+            arguments.append(str(value))
+        elif name == "query":
+            for word in str(value).split():
+                pattern = "%" + word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                clauses.append("(name LIKE ? ESCAPE '\\' OR number LIKE ? ESCAPE '\\' OR theme LIKE ? ESCAPE '\\' OR subtheme LIKE ? ESCAPE '\\'"
+                               " OR setID IN (SELECT setID FROM tags WHERE tag LIKE ? ESCAPE '\\'))")
+                arguments.extend([pattern] * 5)
+        else:
+            raise ValueError(f"Unsupported getSets parameter {name}")
+    return " AND ".join(clauses), arguments
+
+def _timestamp(value):
+    """
+    Formats lastUpdated so that text order is time order
+
+    Args:
+        value : date or datetime, may be None
+
+    Returns:
+        str ? : ISO timestamp in UTC with microseconds
+    """
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        return value.isoformat()
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(timespec="microseconds")
+
+def _row(s:Sets):
+    """
+    Builds row of sets table
+
+    Args:
+        s : set to store
+
+    Returns:
+        tuple : values in order of _COLUMNS
+    """
+    collection = s.collection
+    collections = s.collections
+    legoCom = s.legoCom
+    prices = [getattr(getattr(legoCom, region), "retailPrice", None) if legoCom is not None else None for region in LEGOCOM_REGIONS]
+    return (s.setID, s.number, s.numberVariant, s.name, s.year, s.theme, s.themeGroup, s.subtheme, s.category, s.pieces, s.minifigs, s.rating,
+            getattr(collections, "ownedBy", None), getattr(collections, "wantedBy", None),
+            getattr(collection, "owned", None), getattr(collection, "wanted", None), getattr(collection, "qtyOwned", None), getattr(collection, "rating", None),
+            *prices, _timestamp(s.lastUpdated), s.to_json(cache=False))
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import os
+
+from brickset.index import SetIndex
+from brickset.scheduler import BULK, RequestScheduler
+
+class SyncReport:
+    """
+    Result of a catalogue sync
+
+    Attributes:
+        added : int
+            number of sets new in the local store
+        changed : int
+            number of sets replaced by a newer version
+        removed : int
+            number of sets no longer returned by the API
+    """
+    __slots__ = ("added", "changed", "removed")
+    def __init__(self, added:int=0, changed:int=0, removed:int=0):
+        """
+        Initialization of SyncReport class
+
+        Args:
+            added : number of sets new in the local store
+            changed : number of sets replaced by a newer version
+            removed : number of sets no longer returned by the API
+        """
+        self.added = added
+        self.changed = changed
+        self.removed = removed
+    def __iadd__(self, other:"SyncReport"):
+        self.added += other.added
+        self.changed += other.changed
+        self.removed += other.removed
+        return self
+    def __str__(self):
+        """
+        String interpretation of SyncReport class
+
+        Returns:
+            str : counts of changes
+        """
+        return f"{self.added} added, {self.changed} changed, {self.removed} removed"
+
+class CatalogueSync:
+    """
+    Keeps local store of sets up to date using lastUpdated as a per-theme high-water mark
+
+    Only sets updated since the mark are requested. A theme is listed in full only on its first sync and when
+    the number of its sets in the local store differs from the uncached count of getThemes; its set IDs are
+    then compared to find removed sets. A removal is missed only when the count is balanced by a set which
+    was added with lastUpdated older than the mark, dropping marks makes the next sync list everything.
+    Merging is idempotent - a set is replaced only by a version with a later lastUpdated.
+
+    Attributes:
+        client : BricksetClient
+            client used for the calls
+        index : SetIndex
+            local store of sets
+        marks : dict[str, str]
+            highest lastUpdated seen per theme, ISO format
+        statePath : str ?
+            json file where marks are kept between runs
+        pageSize : int
+            number of sets requested on one page
+    """
+    def __init__(self, client, index:SetIndex|None=None, statePath:str|None=None, pageSize:int=500):
+        """
+        Initialization of CatalogueSync class
+
+        Args:
+            client : BricksetClient used for the calls
+            index : local store of sets, a new empty one when None
+            statePath : json file where marks are kept between runs
+            pageSize : number of sets requested on one page
+        """
+        self.client = client
+        self.index = SetIndex() if index is None else index
+        self.statePath = statePath
+        self.pageSize = pageSize
+        self.marks = {}
+        if statePath is not None and os.path.exists(statePath):
+            with open(statePath, encoding="utf-8") as file:
+                self.marks = json.load(file)
+    def saveState(self):
+        """
+        Writes marks to statePath atomically
+        """
+        if self.statePath is None:
+            return
+        temporary = self.statePath + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(self.marks, file, indent=1, sort_keys=True)
+        os.replace(temporary, self.statePath)
+    async def sync(self, themes=None):
+        """
+        Syncs themes as bulk requests
+
+        Sets updated since the oldest mark of the synced themes are requested with one getAllSets call and split
+        by theme. Themes without a mark are listed in full, all of them with one call on the first sync of the
+        whole catalogue.
+
+        Args:
+            themes : names of themes to sync, all themes when None
+
+        Returns:
+            SyncReport : counts of changes in all themes
+        """
+        with RequestScheduler.priority(BULK):
+            # a cached response would hide sets removed since it was stored
+            remote = {theme.theme: theme.setCount for theme in await self.client.getThemes(useCache=False)}
+            names = list(remote) if themes is None else list(themes)
+            fetched = {name: [] for name in names}
+            marked = [name for name in names if name in self.marks]
+            if themes is None and not marked:
+                full = set(names)
+                calls = [self.client.getAllSets(self.pageSize)]
+            else:
+                full = {name for name in names if name not in self.marks}
+                calls = [self.client.getAllSets(self.pageSize, theme=name) for name in full]
+                if marked:
+                    since = min(self.marks[name] for name in marked)
+                    calls.append(self.client.getAllSets(self.pageSize, updatedSince=since[:10]))
+            for sets in await asyncio.gather(*calls):
+                for s in sets:
+                    bucket = fetched.get(s.theme)
+                    if bucket is not None:
+                        bucket.append(s)
+            reports = await asyncio.gather(*(self._update(name, fetched[name], name in full, remote.get(name, 0)) for name in names))
+        report = SyncReport()
+        for themeReport in reports:
+            report += themeReport
+        self.saveState()
+        return report
+    async def syncTheme(self, theme:str, setCount:int|None=None):
+        """
+        Syncs one theme
+
+        Args:
+            theme : name of theme
+            setCount : number of sets in the theme reported by getThemes, removals are not checked when None
+
+        Returns:
+            SyncReport : counts of changes in the theme
+        """
+        mark = self.marks.get(theme)
+        if mark is None:
+            sets = await self.client.getAllSets(self.pageSize, theme=theme)
+        else:
+            sets = await self.client.getAllSets(self.pageSize, theme=theme, updatedSince=mark[:10])
+        return await self._update(theme, sets, mark is None, setCount)
+    async def _update(self, theme:str, sets, full:bool, setCount:int|None):
+        """
+        Merges fetched sets of theme, lists the theme in full to find removed sets when counts differ
+
+        Args:
+            theme : name of theme
+            sets : sets of the theme fetched from the API
+            full : check if sets are all sets of the theme
+            setCount : number of sets in the theme reported by getThemes, removals are not checked when None
+
+        Returns:
+            SyncReport : counts of changes in the theme
+        """
+        report = SyncReport()
+        self._merge(sets, report)
+        if setCount is not None and self.index.themeCount(theme) != setCount:
+            if not full:
+                sets = await self.client.getAllSets(self.pageSize, theme=theme)
+                self._merge(sets, report)
+            current = {s.setID for s in sets}
+            for s in self.index.byTheme(theme):
+                if s.setID not in current:
+                    self.index.delete(s.setID)
+                    report.removed += 1
+        mark = self.marks.get(theme)
+        latest = max((s.lastUpdated for s in sets if s.lastUpdated is not None), default=None)
+        if latest is not None and (mark is None or latest.isoformat() > mark):
+            self.marks[theme] = latest.isoformat()
+        return report
+    def _merge(self, sets, report:SyncReport):
+        """
+        Merges fetched sets into the index
+
+        Args:
+            sets : fetched sets
+            report : report to update
+        """
+        index = self.index
+        for s in sets:
+            if s.setID not in index:
+                index.insert(s)
+                report.added += 1
+            elif index.update(s):
+                report.changed += 1
+    def __str__(self):
+        """
+        String interpretation of CatalogueSync class
+
+        Returns:
+            str : number of tracked themes and sets
+        """
+        return f"Sync of {len(self.marks)} themes, {len(self.index)} sets"
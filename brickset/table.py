@@ -0,0 +1,509 @@
+# -*- coding: utf-8 -*-
+
+from array import array
+from bisect import bisect_right
+from collections import Counter, defaultdict, deque
+from collections.abc import Mapping
+from itertools import compress, repeat
+from math import sqrt
+from operator import add, attrgetter, eq, ge, gt, le, lt, ne, not_, truediv
+
+from brickset.types import Sets
+
+_OPERATORS = {"==": eq, "!=": ne, "<": lt, "<=": le, ">": gt, ">=": ge}
+
+# bytes.translate table turning a mask of 0 and 1 into its inverse
+_INVERT = bytes([1, 0]) + bytes(254)
+
+class SetTable:
+    """
+    Columnar view over many sets - every field is kept in one typed array
+
+    Numeric columns are array('q') or array('d') with a bytearray mask, where 1 means the value is present.
+    String columns are dictionary encoded - array('I') of codes and a list of distinct values.
+    A filtered table is a view - it keeps a bytearray selecting rows of the table it was filtered from and copies
+    a column only when the column is read, so chained filters only combine selections. Appending to a view copies
+    all its columns first.
+
+    Attributes:
+        setID : array
+            IDs of sets, one per row
+        numeric : dict[str, array]
+            numeric columns by name
+        masks : dict[str, bytearray]
+            masks of numeric columns by name
+        codes : dict[str, array]
+            codes of string columns by name
+        categories : dict[str, list[str]]
+            distinct values of string columns, index is the code
+    """
+    __slots__ = ("_setID", "_numeric", "_masks", "_codes", "categories", "_lookup", "_base", "_selected", "_rows")
+
+    INT_COLUMNS = {
+        "year": attrgetter("year"),
+        "pieces": attrgetter("pieces"),
+        "minifigs": attrgetter("minifigs"),
+        "reviewCount": attrgetter("reviewCount"),
+        "instructionsCount": attrgetter("instructionsCount"),
+        "additionalImageCount": attrgetter("additionalImageCount"),
+        "ownedBy": attrgetter("collections.ownedBy"),
+        "wantedBy": attrgetter("collections.wantedBy"),
+    }
+    FLOAT_COLUMNS = {
+        "rating": attrgetter("rating"),
+        "height": attrgetter("dimensions.height"),
+        "width": attrgetter("dimensions.width"),
+        "depth": attrgetter("dimensions.depth"),
+        "weight": attrgetter("dimensions.weight"),
+        "USRetailPrice": attrgetter("legoCom.US.retailPrice"),
+        "UKRetailPrice": attrgetter("legoCom.UK.retailPrice"),
+        "CARetailPrice": attrgetter("legoCom.CA.retailPrice"),
+        "DERetailPrice": attrgetter("legoCom.DE.retailPrice"),
+    }
+    STRING_COLUMNS = {
+        "theme": attrgetter("theme"),
+        "themeGroup": attrgetter("themeGroup"),
+        "subtheme": attrgetter("subtheme"),
+        "category": attrgetter("category"),
+        "packagingType": attrgetter("packagingType"),
+        "availability": attrgetter("availability"),
+    }
+
+    def __init__(self):
+        """
+        Initialization of empty SetTable class
+        """
+        self._setID = array("q")
+        self._numeric = {name: array("q") for name in self.INT_COLUMNS}
+        self._numeric.update({name: array("d") for name in self.FLOAT_COLUMNS})
+        self._masks = {name: bytearray() for name in self._numeric}
+        self._codes = {name: array("I") for name in self.STRING_COLUMNS}
+        self.categories = {name: [] for name in self.STRING_COLUMNS}
+        self._lookup = {name: {} for name in self.STRING_COLUMNS}
+        # table the view selects rows of, 1 for every selected row and indexes of the rows, None for tables owning their columns
+        self._base = None
+        self._selected = None
+        self._rows = None
+    @property
+    def setID(self):
+        """
+        IDs of sets, one per row
+
+        Returns:
+            array : setIDs
+        """
+        if self._setID is None:
+            self._setID = array("q", map(self._base._setID.__getitem__, self._rowIndexes()))
+        return self._setID
+    @property
+    def numeric(self):
+        """
+        Numeric columns by name
+
+        Returns:
+            Mapping[str, array] : columns
+        """
+        return self._numeric
+    @property
+    def masks(self):
+        """
+        Masks of numeric columns by name, 1 means the value is present
+
+        Returns:
+            Mapping[str, bytearray] : masks
+        """
+        return self._masks
+    @property
+    def codes(self):
+        """
+        Codes of string columns by name
+
+        Returns:
+            Mapping[str, array] : codes
+        """
+        return self._codes
+    @classmethod
+    def fromSets(cls, sets):
+        """
+        Creates table from list or stream of sets
+
+        Args:
+            sets : iterable of Sets
+
+        Returns:
+            SetTable : table with one row per set
+        """
+        table = cls()
+        table.extend(sets)
+        return table
+    def append(self, s:Sets):
+        """
+        Adds set as a new row
+
+        Args:
+            s : set to add
+        """
+        self._own()
+        self._setID.append(s.setID)
+        numeric = self._numeric
+        masks = self._masks
+        for columns in (self.INT_COLUMNS, self.FLOAT_COLUMNS):
+            for name, getter in columns.items():
+                value = getter(s)
+                if value is None:
+                    numeric[name].append(0)
+                    masks[name].append(0)
+                else:
+                    numeric[name].append(value)
+                    masks[name].append(1)
+        for name, getter in self.STRING_COLUMNS.items():
+            self._codes[name].append(self.encode(name, getter(s)))
+    def extend(self, sets):
+        """
+        Adds many sets as new rows
+
+        Args:
+            sets : iterable of Sets
+        """
+        for s in sets:
+            self.append(s)
+    def extendTable(self, other:"SetTable"):
+        """
+        Appends rows of another table, its string codes are translated to this table
+
+        Args:
+            other : table to append
+        """
+        self._own()
+        self._setID.extend(other.setID)
+        for name, values in self._numeric.items():
+            values.extend(other.numeric[name])
+            self._masks[name].extend(other.masks[name])
+        for name, codes in self._codes.items():
+            translation = [self.encode(name, value) for value in other.categories[name]]
+            codes.extend(map(translation.__getitem__, other.codes[name]))
+    def _own(self):
+        """
+        Turns view into a table owning copies of its columns
+        """
+        if self._base is None:
+            return
+        self._setID = self.setID
+        self._numeric = dict(self._numeric.items())
+        self._masks = dict(self._masks.items())
+        self._codes = dict(self._codes.items())
+        self._base = None
+        self._selected = None
+        self._rows = None
+    def _rowIndexes(self):
+        """
+        Returns indexes of rows of a view in the table it selects from
+
+        Returns:
+            array : indexes of selected rows
+        """
+        if self._rows is None:
+            self._rows = array("q", compress(range(len(self._selected)), self._selected))
+        return self._rows
+    def encode(self, name:str, value:str|None):
+        """
+        Returns code of string value, adding it to the dictionary when it is new
+
+        Args:
+            name : name of string column
+            value : value to encode
+
+        Returns:
+            int : code of the value
+        """
+        lookup = self._lookup[name]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self.categories[name])
+            self.categories[name].append(value)
+        return code
+    def __len__(self):
+        """
+        Number of rows
+
+        Returns:
+            int : number of sets in table
+        """
+        return self._selected.count(1) if self._base is not None else len(self._setID)
+    def column(self, name:str):
+        """
+        Returns values of column, None where value is missing
+
+        Args:
+            name : name of column
+
+        Returns:
+            list : values of column in row order
+        """
+        if name == "setID":
+            return list(self.setID)
+        if name in self.codes:
+            return list(map(self.categories[name].__getitem__, self.codes[name]))
+        values = self.numeric[name].tolist()
+        missing = self.masks[name].translate(_INVERT)
+        for row in compress(range(len(values)), missing):
+            values[row] = None
+        return values
+    def _matches(self, name:str, op:str, value):
+        """
+        Evaluates condition for every row of a table owning its columns
+
+        Args:
+            name : name of column
+            op : comparison operator, one of == != < <= > >= in
+            value : value to compare with, collection of values for in
+
+        Returns:
+            bytearray : 1 for rows matching the condition
+        """
+        if name in self._codes:
+            lookup = self._lookup[name]
+            codes = self._codes[name]
+            if op == "in":
+                wanted = {lookup[v] for v in value if v is not None and v in lookup}
+                return bytearray(map(wanted.__contains__, codes))
+            if op not in ("==", "!="):
+                raise ValueError(f"Operator {op} is not supported for string column {name}")
+            matches = bytearray(map(_OPERATORS[op], codes, repeat(-1 if value is None else lookup.get(value, -1))))
+            # missing values have a code too, != must not match them
+            if op == "!=" and None in lookup:
+                matches = _and(matches, bytearray(map(ne, codes, repeat(lookup[None]))))
+            return matches
+        values = self._setID if name == "setID" else self._numeric[name]
+        if op == "in":
+            test = set(value).__contains__
+            matches = bytearray(map(test, values))
+        else:
+            compare = _OPERATORS[op]
+            test = lambda v: compare(v, value)
+            matches = bytearray(map(compare, values, repeat(value)))
+        # missing values are stored as 0, the mask is needed only when 0 matches
+        if name == "setID" or not test(0):
+            return matches
+        return _and(matches, self._masks[name])
+    def take(self, rows):
+        """
+        Creates table containing only given rows; string dictionaries are shared
+
+        Args:
+            rows : indexes of rows to keep
+
+        Returns:
+            SetTable : new table
+        """
+        rows = list(rows)
+        table = SetTable.__new__(SetTable)
+        table._setID = array("q", map(self.setID.__getitem__, rows))
+        table._numeric = {name: array(values.typecode, map(values.__getitem__, rows)) for name, values in self.numeric.items()}
+        table._masks = {name: bytearray(map(mask.__getitem__, rows)) for name, mask in self.masks.items()}
+        table._codes = {name: array("I", map(codes.__getitem__, rows)) for name, codes in self.codes.items()}
+        table.categories = self.categories
+        table._lookup = self._lookup
+        table._base = None
+        table._selected = None
+        table._rows = None
+        return table
+    def filter(self, name:str, op:str, value):
+        """
+        Selects rows matching a condition, rows with missing value never match.
+        Calls can be chained to combine conditions.
+
+        Args:
+            name : name of column
+            op : comparison operator, one of == != < <= > >= in
+            value : value to compare with, collection of values for in
+
+        Returns:
+            SetTable : view of matching rows
+        """
+        if self._base is None:
+            return SetTable._view(self, self._matches(name, op, value))
+        return SetTable._view(self._base, _and(self._base._matches(name, op, value), self._selected))
+    @staticmethod
+    def _view(base:"SetTable", selected:bytearray):
+        """
+        Creates view of rows of a table owning its columns
+
+        Args:
+            base : table owning its columns
+            selected : 1 for every selected row of base
+
+        Returns:
+            SetTable : view
+        """
+        table = SetTable.__new__(SetTable)
+        table._setID = None
+        table._numeric = _Columns(base._numeric, table)
+        table._masks = _Columns(base._masks, table)
+        table._codes = _Columns(base._codes, table)
+        table.categories = base.categories
+        table._lookup = base._lookup
+        table._base = base
+        table._selected = selected
+        table._rows = None
+        return table
+    def aggregate(self, name:str, func:str="mean"):
+        """
+        Aggregates numeric column, missing values are skipped
+
+        Args:
+            name : name of numeric column
+            func : one of count, sum, mean, min, max, std
+
+        Returns:
+            float ? : result, None when there are no values
+        """
+        values = list(compress(self.numeric[name], self.masks[name]))
+        return aggregateValues(values, func)
+    def groupBy(self, keys, name:str|None=None, func:str="count"):
+        """
+        Groups rows by one or more key columns and aggregates numeric column in every group
+
+        Args:
+            keys : name of key column or tuple of names
+            name : name of aggregated numeric column, not needed for count
+            func : one of count, sum, mean, min, max, std
+
+        Returns:
+            dict : aggregate by key value, tuple of values for more keys
+        """
+        if isinstance(keys, str):
+            rowKeys = self.column(keys)
+        else:
+            rowKeys = zip(*map(self.column, keys))
+        if name is None:
+            return dict(Counter(rowKeys))
+        present = self.masks[name]
+        groups = defaultdict(list)
+        # appends every present value to the list of its key without a Python level loop
+        deque(map(list.append, map(groups.__getitem__, compress(rowKeys, present)), compress(self.numeric[name], present)), maxlen=0)
+        return {key: aggregateValues(values, func) for key, values in groups.items()}
+    def divide(self, numerator:str, denominator:str):
+        """
+        Divides two numeric columns row by row, e.g. price per piece
+
+        Args:
+            numerator : name of numeric column
+            denominator : name of numeric column
+
+        Returns:
+            tuple[array, bytearray] : quotients and their mask, 0.0 where a value is missing or the denominator is 0
+        """
+        divisors = self.numeric[denominator]
+        zero = bytearray(map(not_, divisors))
+        # zero divisors, also stored for missing values, become 1 and their quotients are set to 0.0
+        quotients = array("d", map(truediv, self.numeric[numerator], map(add, divisors, zero)))
+        for row in compress(range(len(quotients)), zero):
+            quotients[row] = 0.0
+        mask = _and(_and(self.masks[numerator], self.masks[denominator]), zero.translate(_INVERT))
+        return quotients, mask
+    def histogram(self, name:str, bins):
+        """
+        Counts values of numeric column in bins
+
+        Args:
+            name : name of numeric column
+            bins : ascending bin edges, last edge is inclusive
+
+        Returns:
+            list[int] : count of values in every bin
+        """
+        edges = list(bins)
+        counts = [0] * (len(edges) - 1)
+        last = len(counts) - 1
+        for value in compress(self.numeric[name], self.masks[name]):
+            if edges[0] <= value <= edges[-1]:
+                counts[min(bisect_right(edges, value) - 1, last)] += 1
+        return counts
+    def __str__(self):
+        """
+        String interpretation of SetTable class
+
+        Returns:
+            str : number of rows
+        """
+        return f"SetTable with {len(self)} sets"
+
+class _Columns(Mapping):
+    """
+    Columns of a view, a column is copied from the selected rows of its source on first read
+
+    Attributes:
+        source : dict[str, array|bytearray]
+            columns of the table owning them
+        view : SetTable
+            view selecting the rows
+        copied : dict[str, array|bytearray]
+            columns already copied
+    """
+    __slots__ = ("source", "view", "copied")
+    def __init__(self, source:dict, view:SetTable):
+        """
+        Initialization of _Columns class
+
+        Args:
+            source : columns of the table owning them
+            view : view selecting the rows
+        """
+        self.source = source
+        self.view = view
+        self.copied = {}
+    def __getitem__(self, name:str):
+        column = self.copied.get(name)
+        if column is None:
+            values = self.source[name]
+            selected = map(values.__getitem__, self.view._rowIndexes())
+            column = self.copied[name] = bytearray(selected) if isinstance(values, bytearray) else array(values.typecode, selected)
+        return column
+    def __contains__(self, name):
+        return name in self.source
+    def __iter__(self):
+        return iter(self.source)
+    def __len__(self):
+        return len(self.source)
+
+def _and(a:bytearray, b:bytearray):
+    """
+    Combines two masks of the same length, bytes are 0 or 1 so one integer and covers all rows
+
+    Args:
+        a : first mask
+        b : second mask
+
+    Returns:
+        bytearray : 1 where both masks are 1
+    """
+    return bytearray((int.from_bytes(a, "little") & int.from_bytes(b, "little")).to_bytes(len(a), "little"))
+
+def aggregateValues(values:list, func:str):
+    """
+    Aggregates list of numbers, shared by SetTable, its groups and PriceTable
+
+    Args:
+        values : numbers to aggregate
+        func : one of count, sum, mean, min, max, std
+
+    Returns:
+        float ? : result, None when there are no values
+    """
+    if func == "count":
+        return len(values)
+    if not values:
+        return None
+    if func == "sum":
+        return sum(values)
+    if func == "mean":
+        return sum(values) / len(values)
+    if func == "min":
+        return min(values)
+    if func == "max":
+        return max(values)
+    if func == "std":
+        mean = sum(values) / len(values)
+        return sqrt(sum((v - mean) ** 2 for v in values) / len(values))
+    raise ValueError(f"Unknown aggregate {func}")
@@ -1,23 +1,359 @@
 # -*- coding: utf-8 -*-
 
-from datetime import date
+import asyncio
+import codecs
+from datetime import date, datetime
+import json
+from operator import attrgetter
+import os
 import re
 from types import ClassMethodDescriptorType
 
+from brickset.encoding import packb
+from brickset.pool import STRINGS, StringPool
+
+LEGOCOM_REGIONS = ("US", "UK", "CA", "DE")
+
+def _parseDate(value:str|None):
+    """
+    Parses date returned by Brickset API
+
+    Args:
+        value : ISO formatted date or timestamp, may be empty
+
+    Returns:
+        date ? : date part of the value
+    """
+    if not value:
+        return None
+    return date.fromisoformat(value[:10])
+
+def _parseDateTime(value:str|None):
+    """
+    Parses timestamp returned by Brickset API
+
+    Args:
+        value : ISO formatted timestamp, may be empty
+
+    Returns:
+        datetime ? : parsed timestamp
+    """
+    if not value:
+        return None
+    return datetime.fromisoformat(value)
+
 class JsonDeserializable():
     """
  Subclasses of this class are guaranteed to be able to be created from a json formatted string.
     All subclasses of this class must override deJson.
     """
+    # encodings made by to_json and to_msgpack with cache, dropped by invalidate
+    __slots__ = ("_encoded",)
 
-    def deJson(self, json_string):
+    @classmethod
+    def deJson(cls, json_string):
         """
         Returns an instance of this class from the given json string.
         This function must be overridden by subclasses.
         """
         raise NotImplementedError
 
-class ApiKeyUsage:
+    @staticmethod
+    def checkJson(json_type):
+        """
+        Checks whether json_type is a dict or a string.
+        Strings are parsed, dicts are returned as they are.
+
+        Args:
+            json_type : json formatted string or already parsed dict
+
+        Returns:
+            dict : parsed json
+        """
+        if isinstance(json_type, dict):
+            return json_type
+        if isinstance(json_type, (str, bytes)):
+            return json.loads(json_type)
+        raise ValueError("json_type should be a json dict or string.")
+
+    # json keys of attributes named differently than in Brickset API
+    _jsonNames = {}
+
+    def to_dict(self, fields=None):
+        """
+        Converts object to dict with keys and value formats of Brickset API, deJson accepts the result.
+        Nested objects not yet built by lazy Sets are returned as the json they were parsed from.
+
+        Args:
+            fields : keys of the top level to include, all when None
+
+        Returns:
+            dict : json compatible dict
+        """
+        result = {}
+        for key, getter in _jsonFields(type(self)):
+            if fields is None or key in fields:
+                result[key] = _toJsonValue(getter(self))
+        return result
+
+    def to_json(self, fields=None, cache:bool=False):
+        """
+        Encodes object as compact utf-8 json
+
+        Args:
+            fields : keys of the top level to include, all when None
+            cache : check if the encoding is kept in and reused from the object until invalidate is called
+
+        Returns:
+            bytes : encoded object
+        """
+        return self._encode("json", fields, _dumpJson, cache)
+
+    def to_msgpack(self, fields=None, cache:bool=False):
+        """
+        Encodes object as MessagePack
+
+        Args:
+            fields : keys of the top level to include, all when None
+            cache : check if the encoding is kept in and reused from the object until invalidate is called
+
+        Returns:
+            bytes : encoded object
+        """
+        return self._encode("msgpack", fields, packb, cache)
+
+    def _encode(self, kind:str, fields, dump, cache:bool):
+        """
+        Returns kept encoding or encodes the object
+
+        Args:
+            kind : name of the format
+            fields : keys of the top level to include, all when None
+            dump : function encoding result of to_dict
+            cache : check if the encoding is kept in and reused from the object
+
+        Returns:
+            bytes : encoded object
+        """
+        if not cache:
+            return dump(self.to_dict(fields))
+        key = (kind, None if fields is None else tuple(fields))
+        try:
+            encodings = self._encoded
+        except AttributeError:
+            encodings = self._encoded = {}
+        data = encodings.get(key)
+        if data is None:
+            data = encodings[key] = dump(self.to_dict(fields))
+        return data
+
+    def invalidate(self):
+        """
+        Drops encodings kept by to_json and to_msgpack of the object and of all objects inside it.
+        Modifications are not tracked, so after modifying an object encoded with cache it must be called
+        on the outermost encoded object containing the modified one.
+        """
+        pending = [self]
+        while pending:
+            current = pending.pop()
+            try:
+                del current._encoded
+            except AttributeError:
+                pass
+            for _, getter in _jsonFields(type(current)):
+                value = getter(current)
+                if isinstance(value, JsonDeserializable):
+                    pending.append(value)
+
+    def __getstate__(self):
+        # copies and pickles get the attributes without the encodings
+        cls = type(self)
+        return None, {name: getter(self) for name, (_, getter) in zip(cls.__slots__, _jsonFields(cls))}
+
+_fieldsByClass = {}
+
+def _jsonFields(cls:type):
+    """
+    Returns json keys of class with functions reading their values
+
+    Args:
+        cls : subclass of JsonDeserializable
+
+    Returns:
+        list[tuple[str, callable]] : json key and getter of every attribute
+    """
+    fields = _fieldsByClass.get(cls)
+    if fields is None:
+        fields = []
+        for name in cls.__slots__:
+            descriptor = getattr(cls, name)
+            # lazy fields are read without building their objects
+            getter = descriptor.slot.__get__ if isinstance(descriptor, _LazyField) else attrgetter(name)
+            fields.append((cls._jsonNames.get(name, name), getter))
+        fields = _fieldsByClass[cls] = fields
+    return fields
+
+def _toJsonValue(value):
+    """
+    Converts attribute value to its json form
+
+    Args:
+        value : value of an attribute
+
+    Returns:
+        json compatible value, dates are formatted as in Brickset API
+    """
+    if isinstance(value, JsonDeserializable):
+        return value.to_dict()
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    if isinstance(value, date):
+        return f"{value.isoformat()}T00:00:00Z"
+    if isinstance(value, list):
+        return [_toJsonValue(item) for item in value]
+    return value
+
+def _dumpJson(value:dict):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class _JsonStream:
+    """
+    Incremental reader of a json document coming from a file like object.
+    Keeps only the unparsed part of the document in memory.
+
+    Attributes:
+        buffer : str
+            decoded but not yet consumed data
+        pos : int
+            position of the first unconsumed character in buffer
+        eof : bool
+            check if the underlying stream is exhausted
+    """
+    __slots__ = ("_read", "_textDecoder", "_chunkSize", "buffer", "pos", "eof")
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, fileobj, chunkSize:int):
+        """
+        Initialization of _JsonStream class
+
+        Args:
+            fileobj : binary or text stream to read json from
+            chunkSize : number of bytes read at once
+        """
+        self._read = fileobj.read
+        self._textDecoder = codecs.getincrementaldecoder("utf-8")()
+        self._chunkSize = chunkSize
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+    def fill(self):
+        """
+        Reads next chunk from the stream and drops the consumed part of the buffer
+
+        Returns:
+            bool : False when the stream is exhausted
+        """
+        if self.eof:
+            return False
+        chunk = self._read(self._chunkSize)
+        if not chunk:
+            self.eof = True
+        if isinstance(chunk, bytes):
+            chunk = self._textDecoder.decode(chunk, final=self.eof)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return not self.eof
+    def peek(self):
+        """
+        Skips whitespace and returns the next character without consuming it
+
+        Returns:
+            str : next character, empty string at the end of the stream
+        """
+        while True:
+            buffer = self.buffer
+            pos = self.pos
+            length = len(buffer)
+            while pos < length and buffer[pos] in " \t\n\r":
+                pos += 1
+            self.pos = pos
+            if pos < length:
+                return buffer[pos]
+            if not self.fill():
+                return ""
+    def expect(self, char:str):
+        """
+        Consumes the next non whitespace character
+
+        Args:
+            char : character that has to come next
+        """
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at position {self.pos}, found {found!r}")
+        self.pos += 1
+    def value(self):
+        """
+        Decodes the next json value, reading more data when it is incomplete
+
+        Returns:
+            object : decoded json value
+        """
+        self.peek()
+        while True:
+            try:
+                result, end = self._decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # a number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return result
+
+def _iterJsonArray(fileobj, key:str, chunkSize:int=65536):
+    """
+    Yields elements of the array stored under key in the top level object of a Brickset response
+
+    Args:
+        fileobj : binary or text stream with the response
+        key : name of the array in the response, e.g. sets
+        chunkSize : number of bytes read at once
+
+    Returns:
+        generator : parsed elements of the array
+    """
+    stream = _JsonStream(fileobj, chunkSize)
+    status = None
+    message = None
+    stream.expect("{")
+    while stream.peek() != "}":
+        name = stream.value()
+        stream.expect(":")
+        if name != key:
+            value = stream.value()
+            if name == "status":
+                status = value
+            elif name == "message":
+                message = value
+        else:
+            stream.expect("[")
+            if stream.peek() == "]":
+                return
+            while True:
+                yield stream.value()
+                if stream.peek() == "]":
+                    return
+                stream.expect(",")
+        if stream.peek() == ",":
+            stream.pos += 1
+    if status is not None and status != "success":
+        raise ValueError(f"Brickset API error: {message}")
+
+class ApiKeyUsage(JsonDeserializable):
     """
     A class for keeping score of current API usage
     
@@ -27,6 +363,7 @@ class ApiKeyUsage:
         count : int 
             number of spiKeyUsage
     """
+    __slots__ = ("dateStamp", "count")
     def __init__(self, dateStamp:date, count:int):
         """
         Initialization of apiKeyUsage class
@@ -37,6 +374,19 @@ class ApiKeyUsage:
         """
         self.dateStamp = dateStamp
         self.count = count
+    @classmethod
+    def deJson(cls, json_string):
+        """
+        Creates usage statistics from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+
+        Returns:
+            ApiKeyUsage : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        return cls(_parseDate(obj.get('dateStamp')), obj.get('count'))
     def __str__(self):
         """
         String interpretation of apiKeyUsage class
@@ -46,7 +396,7 @@ class ApiKeyUsage:
         """
         return f"{self.dateStamp} ({self.count})"
 
-class UserMinifigNotes:
+class UserMinifigNotes(JsonDeserializable):
     """
     This object is used to keep track of your notes for minifigs
 
@@ -56,6 +406,7 @@ class UserMinifigNotes:
         notes : str 
             notes about particular minifigure
     """
+    __slots__ = ("minifigNumber", "notes")
     def __init__(self, minifigNumber:int, notes:str):
         """
         Initialization of userMinifigNotes class
@@ -66,6 +417,19 @@ class UserMinifigNotes:
         """
         self.minifigNumber = minifigNumber
         self.notes = notes
+    @classmethod
+    def deJson(cls, json_string):
+        """
+        Creates minifigure notes from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+
+        Returns:
+            UserMinifigNotes : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        return cls(obj.get('minifigNumber'), obj.get('notes'))
     def __str__(self):
         """
         String interpretation of userMinifigNotes class
@@ -75,7 +439,7 @@ class UserMinifigNotes:
         """
         return self.notes
 
-class UserNotes:
+class UserNotes(JsonDeserializable):
     """
     Object to keep user's notes
 
@@ -85,6 +449,7 @@ class UserNotes:
         notes : str
             Notes about particular set
     """
+    __slots__ = ("setID", "notes")
     def __init__(self, setID:int, notes:str):
         """
         Initialization of userNotes class
@@ -95,6 +460,19 @@ class UserNotes:
         """
         self.setID = setID
         self.notes = notes
+    @classmethod
+    def deJson(cls, json_string):
+        """
+        Creates set notes from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+
+        Returns:
+            UserNotes : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        return cls(obj.get('setID'), obj.get('notes'))
     def __str__(self):
         """
         String interpretation of userMinifigNotes class
@@ -104,7 +482,7 @@ class UserNotes:
         """
         return self.notes
 
-class Instructions:
+class Instructions(JsonDeserializable):
     """
     Class to keep track of instructions for sets
 
@@ -114,6 +492,7 @@ class Instructions:
         description : str
             Description of the set
     """
+    __slots__ = ("URL", "description")
     def __init__(self, URL:str, description: str):
         """
         Initialization of instructions class
@@ -134,15 +513,38 @@ class Instructions:
         return self.URL
     def downloadInstruction(self, location:str):
         """
-        Downloads instruction for user
+        Downloads instruction for user, must not be called from a running event loop.
+        Use brickset.download.Downloader to download many instructions concurrently.
         
         Args: 
-            location : specifies download location
+            location : specifies download location - path of the file or existing directory
 
         Returns:
-            str: operation status
+            str: operation status - downloaded, resumed or unchanged
+        """
+        # imported here because brickset.download depends on this module
+        from brickset.download import Downloader
+        if os.path.isdir(location):
+            directory, path = location, None
+        else:
+            directory, path = os.path.dirname(location) or ".", location
+        async def download():
+            async with Downloader(directory) as downloader:
+                return await downloader.download(self.URL, path)
+        return asyncio.run(download())
+    @classmethod
+    def deJson(cls, json_string):
+        """
+        Creates instructions entry from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+
+        Returns:
+            Instructions : deserialized object
         """
-        return 0
+        obj = cls.checkJson(json_string)
+        return cls(obj.get('URL'), obj.get('description'))
     def __str__(self):
         """
         String interpretation of instructions class
@@ -152,7 +554,7 @@ class Instructions:
         """
         return self.description
 
-class Years:
+class Years(JsonDeserializable):
     """
     An object that tracks the total number of sets in year, theme
 
@@ -164,6 +566,7 @@ class Years:
         setCount : int
             Number of sets in specified year and theme
     """
+    __slots__ = ("theme", "year", "setCount")
     def __init__(self, theme:str, year:str, setCount:int):
         """
         Initialization of instructions class
@@ -175,6 +578,21 @@ class Years:
         self.theme = theme
         self.year = year
         self.setCount = setCount
+    @classmethod
+    def deJson(cls, json_string, pool:StringPool|None=None):
+        """
+        Creates years entry from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+            pool : pool of categorical strings, STRINGS when None
+
+        Returns:
+            Years : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        intern = (STRINGS if pool is None else pool).intern
+        return cls(intern(obj.get('theme')), obj.get('year'), obj.get('setCount'))
     def __str__(self):
         """
         String interpretation of instructions class
@@ -185,7 +603,7 @@ class Years:
         """
         return f"Set of {self.theme} from {self.year}"
 
-class Subthemes:
+class Subthemes(JsonDeserializable):
     """
     A class to track subthemes of the theme
 
@@ -201,6 +619,7 @@ class Subthemes:
         yearTo : int
             year to which subtheme was produced
      """
+    __slots__ = ("theme", "subtheme", "setCount", "yearFrom", "yearTo")
     def __init__(self, theme:str, subtheme:str, setCount:int, yearFrom:int, yearTo:int):
         """
         Initialization of subthemes class
@@ -217,6 +636,21 @@ class Subthemes:
         self.setCount = setCount
         self.yearFrom = yearFrom
         self.yearTo = yearTo
+    @classmethod
+    def deJson(cls, json_string, pool:StringPool|None=None):
+        """
+        Creates subtheme entry from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+            pool : pool of categorical strings, STRINGS when None
+
+        Returns:
+            Subthemes : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        intern = (STRINGS if pool is None else pool).intern
+        return cls(intern(obj.get('theme')), intern(obj.get('subtheme')), obj.get('setCount'), obj.get('yearFrom'), obj.get('yearTo'))
     def __str__(self):
         """
         String interpretation of subthemes class
@@ -226,7 +660,7 @@ class Subthemes:
         """
         return f"{self.subtheme} produced in {self.yearFrom}-{self.yearTo}"
 
-class Themes:
+class Themes(JsonDeserializable):
     """
     A class describing theme of Lego
 
@@ -242,6 +676,7 @@ class Themes:
         yearTo : int
             year till which theme was produced
     """
+    __slots__ = ("theme", "setCount", "subthemeCount", "yearFrom", "yearTo")
     def __init__(self, theme:str, setCount:int, subthemeCount:int, yearFrom:int, yearTo:int):
         """
         Initialization of theme class
@@ -258,6 +693,21 @@ class Themes:
         self.subthemeCount = subthemeCount
         self.yearFrom = yearFrom
         self.yearTo = yearTo
+    @classmethod
+    def deJson(cls, json_string, pool:StringPool|None=None):
+        """
+        Creates theme entry from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+            pool : pool of categorical strings, STRINGS when None
+
+        Returns:
+            Themes : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        intern = (STRINGS if pool is None else pool).intern
+        return cls(intern(obj.get('theme')), obj.get('setCount'), obj.get('subthemeCount'), obj.get('yearFrom'), obj.get('yearTo'))
     def __str__(self):
         """
         String interpretation of themes class
@@ -267,7 +717,7 @@ class Themes:
         """
         return f"{self.theme} produced in {self.yearFrom}-{self.yearTo}"
 
-class MinifigCollection:
+class MinifigCollection(JsonDeserializable):
     """
     Data about minifigure collections
     
@@ -288,6 +738,7 @@ class MinifigCollection:
             tick if collection is wanted
 
     """
+    __slots__ = ("minifigNumber", "name", "category", "ownedInSets", "ownedLoose", "ownedTotal", "wanted")
     def __init__(self, minifigNumber:str, name:str, category:str, ownedInSets:int, ownedLoose:int, ownedTotal:int, wanted:bool):
         """
             Initialization of minifigCollection class
@@ -308,6 +759,21 @@ class MinifigCollection:
         self.ownedLoose = ownedLoose
         self.ownedTotal = ownedTotal
         self.wanted = wanted
+    @classmethod
+    def deJson(cls, json_string, pool:StringPool|None=None):
+        """
+        Creates minifig collection entry from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+            pool : pool of categorical strings, STRINGS when None
+
+        Returns:
+            MinifigCollection : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        intern = (STRINGS if pool is None else pool).intern
+        return cls(obj.get('minifigNumber'), obj.get('name'), intern(obj.get('category')), obj.get('ownedInSets'), obj.get('ownedLoose'), obj.get('ownedTotal'), obj.get('wanted'))
     def __str__(self):
         """
         String interpretation of minifigCollection class
@@ -317,7 +783,7 @@ class MinifigCollection:
         """
         return f"{self.ownedTotal} in {self.name} collection"
 
-class Rating:
+class Rating(JsonDeserializable):
     """
     Data about set
 
@@ -333,6 +799,7 @@ class Rating:
         valueForMoney : int
             how valuable the set is for its price
     """
+    __slots__ = ("overall", "parts", "buildingExperience", "playability", "valueForMoney")
     def __init__(self, overall:int, parts:int, buildingExperience:int, playability:int, valueForMoney:int):
         """
         Initialization of rating class
@@ -349,6 +816,19 @@ class Rating:
         self.buildingExperience = buildingExperience
         self.playability = playability
         self.valueForMoney = valueForMoney
+    @classmethod
+    def deJson(cls, json_string):
+        """
+        Creates review rating from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+
+        Returns:
+            Rating : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        return cls(obj.get('overall'), obj.get('parts'), obj.get('buildingExperience'), obj.get('playability'), obj.get('valueForMoney'))
     def __str__(self):
         """
         String interpretation of rating class
@@ -358,7 +838,7 @@ class Rating:
         """
         return f"{self.overall}"
 
-class Reviews:
+class Reviews(JsonDeserializable):
     """
     Class that describes the reviews left about Lego sets
     
@@ -374,6 +854,7 @@ class Reviews:
         HTML : bool
             Checks if the review is HTML compatible
     """
+    __slots__ = ("author", "datePosted", "rating", "title", "review", "HTML")
     def __init__(self, author:str, datePosted:date, rating: Rating, title:str, review:str,HTML:bool):
         """
         Initialization of reviews class
@@ -391,6 +872,19 @@ class Reviews:
         self.title = title
         self.review = review
         self.HTML = HTML
+    @classmethod
+    def deJson(cls, json_string):
+        """
+        Creates review from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+
+        Returns:
+            Reviews : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        return cls(obj.get('author'), _parseDateTime(obj.get('datePosted')), Rating.deJson(obj.get('rating') or {}), obj.get('title'), obj.get('review'), obj.get('HTML'))
     def __str__(self):
         """
         String interpretation of reviews class
@@ -400,7 +894,7 @@ class Reviews:
         """
         return f"{self.title}: {self.review}"
 
-class Image:
+class Image(JsonDeserializable):
     """
     Image class containing thumbnail and image
 
@@ -410,6 +904,7 @@ class Image:
         imageURL : str
             URL of an image
     """
+    __slots__ = ("thumbnailURL", "imageURL")
     def __init__(self, thumbnailURL:str, imageURL:str):
         """
         Initialization of image Class
@@ -420,6 +915,19 @@ class Image:
         """
         self.thumbnailURL = thumbnailURL
         self.imageURL = imageURL
+    @classmethod
+    def deJson(cls, json_string):
+        """
+        Creates image from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+
+        Returns:
+            Image : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        return cls(obj.get('thumbnailURL'), obj.get('imageURL'))
     def __str__(self):
         """
         String interpretation of image class
@@ -429,7 +937,7 @@ class Image:
         """
         return self.imageURL
 
-class AgeRange:
+class AgeRange(JsonDeserializable):
     """
     Age range for Lego sets
 
@@ -439,6 +947,8 @@ class AgeRange:
         max_s : int ?
             maximum age requirement for Lego set
     """
+    __slots__ = ("min_s", "max_s")
+    _jsonNames = {"min_s": "min", "max_s": "max"}
     def __init__(self,min_s:int|None, max_s:int|None):
         """
         Initialization of ageRange class
@@ -447,10 +957,21 @@ class AgeRange:
             min_s : minimal age requirement for Lego set - may be -1 - means None
             max_s : maximum age requirement for Lego set - may be -1 - means None
         """
-        if min_s is not None:
-            self.min_s = min_s
-        if max_s is not None:
-            self.max_s = max_s
+        self.min_s = min_s
+        self.max_s = max_s
+    @classmethod
+    def deJson(cls, json_string):
+        """
+        Creates age range from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+
+        Returns:
+            AgeRange : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        return cls(obj.get('min'), obj.get('max'))
     def __str__(self):
         """
         String interpretation of ageRange class
@@ -466,7 +987,7 @@ class AgeRange:
             return f"{self.min_s} - {self.max_s}"
         return "No age requirement"
 
-class Barcodes:
+class Barcodes(JsonDeserializable):
     """
     Class for keeping barcodes
 
@@ -476,6 +997,7 @@ class Barcodes:
         UPC : str
             UPC type barcode
     """
+    __slots__ = ("EAN", "UPC")
     def __init__(self, EAN:str, UPC:str):
         """
         Initialization of barcodes class
@@ -486,6 +1008,19 @@ class Barcodes:
         """
         self.EAN = EAN
         self.UPC = UPC
+    @classmethod
+    def deJson(cls, json_string):
+        """
+        Creates barcodes from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+
+        Returns:
+            Barcodes : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        return cls(obj.get('EAN'), obj.get('UPC'))
     def __str__(self):
         """
         String interpretation of barcodes class
@@ -495,7 +1030,7 @@ class Barcodes:
         """
         return f"EAN:{self.EAN} UPC:{self.UPC}"
 
-class Collections:
+class Collections(JsonDeserializable):
     """
     Statistic data about Lego collections
 
@@ -505,6 +1040,7 @@ class Collections:
         wantedBy : int ?
             number of sets wanted by user
     """
+    __slots__ = ("ownedBy", "wantedBy")
     def __init__(self, ownedBy:int|None, wantedBy:int|None):
         """
         Initialization of collections class
@@ -514,10 +1050,21 @@ class Collections:
             wantedBy : number of sets wanted by user
 
         """
-        if ownedBy is not None:
-            self.ownedBy = ownedBy
-        if wantedBy is not None:
-            self.wantedBy = wantedBy
+        self.ownedBy = ownedBy
+        self.wantedBy = wantedBy
+    @classmethod
+    def deJson(cls, json_string):
+        """
+        Creates collections statistics from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+
+        Returns:
+            Collections : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        return cls(obj.get('ownedBy'), obj.get('wantedBy'))
     def __str__(self):
         """
         String interpretation of collections class
@@ -533,7 +1080,7 @@ class Collections:
             return f"wanted {self.wantedBy}"
         return "No sets owned or wanted by user"
 
-class Collection:
+class Collection(JsonDeserializable):
     """
     Class describes collection of Lego based on user
 
@@ -549,6 +1096,7 @@ class Collection:
         notes : str
             notes about the collection
     """
+    __slots__ = ("owned", "wanted", "qtyOwned", "rating", "notes")
     def __init__(self, owned:bool|None, wanted:bool|None, qtyOwned:int|None, rating:int|None, notes:str):
         """
         Initialization of collection class
@@ -565,6 +1113,19 @@ class Collection:
         self.qtyOwned = qtyOwned
         self.rating = rating
         self.notes = notes
+    @classmethod
+    def deJson(cls, json_string):
+        """
+        Creates user collection from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+
+        Returns:
+            Collection : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        return cls(obj.get('owned'), obj.get('wanted'), obj.get('qtyOwned'), obj.get('rating'), obj.get('notes'))
     def __str__(self):
         """
         String interpretation of collection class
@@ -574,7 +1135,7 @@ class Collection:
         """
         return self.notes
 
-class ExtendedData:
+class ExtendedData(JsonDeserializable):
     """
     Some more data
 
@@ -586,6 +1147,7 @@ class ExtendedData:
         description : str
             short description
     """
+    __slots__ = ("notes", "tags", "description")
     def __init__(self, notes:str, tags:list[str], description:str):
         """
         Initialization of extendedData class
@@ -598,6 +1160,19 @@ class ExtendedData:
         self.notes = notes
         self.tags = tags
         self.description = description
+    @classmethod
+    def deJson(cls, json_string):
+        """
+        Creates extended data from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+
+        Returns:
+            ExtendedData : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        return cls(obj.get('notes'), list(obj.get('tags') or ()), obj.get('description'))
     def __str__(self):
         """
         String interpretation of extendedData class
@@ -607,7 +1182,7 @@ class ExtendedData:
         """
         return self.description
 
-class Dimensions:
+class Dimensions(JsonDeserializable):
     """
     Size of the Lego set 
 
@@ -621,6 +1196,7 @@ class Dimensions:
         weight : int ?
             weight of the set
     """
+    __slots__ = ("height", "width", "depth", "weight")
     def __init__(self, height:int|None, width:int|None, depth:int|None, weight:int|None):
         """
         Initialization of dimensions class
@@ -635,6 +1211,19 @@ class Dimensions:
         self.width = width
         self.depth = depth
         self.weight = weight
+    @classmethod
+    def deJson(cls, json_string):
+        """
+        Creates dimensions from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+
+        Returns:
+            Dimensions : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        return cls(obj.get('height'), obj.get('width'), obj.get('depth'), obj.get('weight'))
     def __str__(self):
         """
         String interpretation of dimensions class
@@ -650,7 +1239,7 @@ class Dimensions:
             return f"Weights {self.weight}"
         return ""
 
-class LEGOComDetails:
+class LEGOComDetails(JsonDeserializable):
     """
     Details about set from Lego.com
 
@@ -662,6 +1251,7 @@ class LEGOComDetails:
         dateLastAvailable : date ?
             last time the set was available
     """
+    __slots__ = ("retailPrice", "dateFirstAvailable", "dateLastAvailable")
     def __init__(self, retailPrice:int|None, dateFirstAvailable:date|None, dateLastAvailable:date|None):
         """
         Initialization of LEGOComDetails class
@@ -674,6 +1264,19 @@ class LEGOComDetails:
         self.retailPrice = retailPrice
         self.dateFirstAvailable = dateFirstAvailable
         self.dateLastAvailable = dateLastAvailable
+    @classmethod
+    def deJson(cls, json_string):
+        """
+        Creates LEGO.com details from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+
+        Returns:
+            LEGOComDetails : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        return cls(obj.get('retailPrice'), _parseDate(obj.get('dateFirstAvailable')), _parseDate(obj.get('dateLastAvailable')))
     def __str__(self):
         if (self.retailPrice is not None) and (self.dateFirstAvailable is not None) and (self.dateLastAvailable is not None):
             return f"Was available from {self.dateFirstAvailable} to {self.dateLastAvailable} and cost {self.retailPrice}"
@@ -681,7 +1284,7 @@ class LEGOComDetails:
             return f"Costs {self.retailPrice}"
         return "No info available from LEGO.com"
 
-class LEGOCom:
+class LEGOCom(JsonDeserializable):
     """
     Collection of Lego.com data for different countries
 
@@ -695,6 +1298,7 @@ class LEGOCom:
         DE : LEGOComDetails
             data for Germany
     """
+    __slots__ = ("US", "UK", "CA", "DE")
     def __init__(self, US:LEGOComDetails, UK:LEGOComDetails,CA:LEGOComDetails,DE:LEGOComDetails):
         """
         Initialization of LEGOCom class
@@ -709,6 +1313,19 @@ class LEGOCom:
         self.UK = UK
         self.CA = CA
         self.DE = DE
+    @classmethod
+    def deJson(cls, json_string):
+        """
+        Creates LEGO.com data from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+
+        Returns:
+            LEGOCom : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        return cls(*(LEGOComDetails.deJson(obj.get(region) or {}) for region in LEGOCOM_REGIONS))
     def __str__(self):
         """
         String interpretation of LEGOCom class
@@ -718,7 +1335,7 @@ class LEGOCom:
         """
         return f"US: {self.US}\nUK: {self.UK}\nCA: {self.CA}\nDE: {self.DE}"
 
-class Sets:
+class Sets(JsonDeserializable):
     """
     Set description - the main class
 
@@ -780,6 +1397,8 @@ class Sets:
         lastUpdated : date
             last time Lego set data was updated
     """
+    __slots__ = ("setID", "number", "numberVariant", "name", "year", "theme", "themeGroup", "subtheme", "category", "released", "pieces", "minifigs", "image", "bricksetURL", "collection", "collections", "legoCom", "rating", "reviewCount", "packagingType", "availability", "instructionsCount", "additionalImageCount", "ageRange", "dimensions", "barcode", "extendedData", "lastUpdated")
+    _jsonNames = {"legoCom": "LEGOCom"}
     def __init__(self, setID:int, number:int, numberVariant:int, name:str, year:int, theme:str, themeGroup:str, subtheme:str, category:str, released:bool, pieces:int|None, minifigs:int|None, image:Image, bricksetURL:str, collection:Collection, collections:Collections, legoCom:LEGOCom, rating:int, reviewCount:int, packagingType:str, availability:str, instructionsCount:int, additionalImageCount:int, ageRange:AgeRange, dimensions:Dimensions, barcode:Barcodes, extendedData:ExtendedData, lastUpdated:date):
         """
         Initialization of set class
@@ -842,6 +1461,49 @@ class Sets:
         self.barcode = barcode
         self.extendedData = extendedData
         self.lastUpdated = lastUpdated
+    @classmethod
+    def deJson(cls, json_string, lazy:bool=False, pool:StringPool|None=None):
+        """
+        Creates set with all nested objects from json
+
+        Args:
+            json_string : json formatted string or already parsed dict
+            lazy : keep nested objects other than image as parsed json until they are first accessed
+            pool : pool of categorical strings, STRINGS when None
+
+        Returns:
+            Sets : deserialized object
+        """
+        obj = cls.checkJson(json_string)
+        get = obj.get
+        intern = (STRINGS if pool is None else pool).intern
+        if lazy:
+            return cls(get('setID'), get('number'), get('numberVariant'), get('name'), get('year'), intern(get('theme')), intern(get('themeGroup')), intern(get('subtheme')), intern(get('category')), get('released'), get('pieces'), get('minifigs'),
+                       Image.deJson(get('image') or {}), get('bricksetURL'), get('collection') or {}, get('collections') or {}, get('LEGOCom') or {},
+                       get('rating'), get('reviewCount'), intern(get('packagingType')), intern(get('availability')), get('instructionsCount'), get('additionalImageCount'),
+                       get('ageRange') or {}, get('dimensions') or {}, get('barcode') or {}, get('extendedData') or {},
+                       _parseDateTime(get('lastUpdated')))
+        return cls(get('setID'), get('number'), get('numberVariant'), get('name'), get('year'), intern(get('theme')), intern(get('themeGroup')), intern(get('subtheme')), intern(get('category')), get('released'), get('pieces'), get('minifigs'),
+                   Image.deJson(get('image') or {}), get('bricksetURL'), Collection.deJson(get('collection') or {}), Collections.deJson(get('collections') or {}), LEGOCom.deJson(get('LEGOCom') or {}),
+                   get('rating'), get('reviewCount'), intern(get('packagingType')), intern(get('availability')), get('instructionsCount'), get('additionalImageCount'),
+                   AgeRange.deJson(get('ageRange') or {}), Dimensions.deJson(get('dimensions') or {}), Barcodes.deJson(get('barcode') or {}), ExtendedData.deJson(get('extendedData') or {}),
+                   _parseDateTime(get('lastUpdated')))
+    @classmethod
+    def iter_from_stream(cls, fileobj, chunkSize:int=65536, lazy:bool=False, pool:StringPool|None=None):
+        """
+        Yields sets one at a time from a getSets response without loading the whole response
+
+        Args:
+            fileobj : binary or text stream with getSets response
+            chunkSize : number of bytes read at once
+            lazy : keep nested objects as parsed json until they are first accessed
+            pool : pool of categorical strings, STRINGS when None
+
+        Returns:
+            generator : fully built Sets objects
+        """
+        for obj in _iterJsonArray(fileobj, "sets", chunkSize):
+            yield cls.deJson(obj, lazy, pool)
     def __str__(self):
         """
         String interpretation of Sets class
@@ -850,3 +1512,41 @@ class Sets:
             str : set name
         """
         return self.name
+
+class _LazyField:
+    """
+    Descriptor wrapping a slot of Sets, parsed json stored in the slot is deserialized on first access and cached
+
+    Attributes:
+        slot : member_descriptor
+            original slot descriptor
+        type : type
+            class used to deserialize the json
+    """
+    __slots__ = ("slot", "type")
+    def __init__(self, slot, type:type):
+        """
+        Initialization of _LazyField class
+
+        Args:
+            slot : original slot descriptor
+            type : class used to deserialize the json
+        """
+        self.slot = slot
+        self.type = type
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = self.slot.__get__(obj, owner)
+        if value.__class__ is dict:
+            value = self.type.deJson(value)
+            self.slot.__set__(obj, value)
+        return value
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+    def __delete__(self, obj):
+        self.slot.__delete__(obj)
+
+for _name, _type in (("collection", Collection), ("collections", Collections), ("legoCom", LEGOCom), ("ageRange", AgeRange), ("dimensions", Dimensions), ("barcode", Barcodes), ("extendedData", ExtendedData)):
+    setattr(Sets, _name, _LazyField(Sets.__dict__[_name], _type))
+del _name, _type
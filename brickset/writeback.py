@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import os
+
+class WriteBehindQueue:
+    """
+    Write-behind queue of setCollection calls
+
+    Updates return at once and are merged per setID - the last value of every param wins, so many clicks on
+    one set become one call. Waiting updates are sent together delay seconds after the first of them, or at once
+    when maxPending sets wait. A failed call is merged with newer updates of its set and retried after
+    exponential backoff; after retries failed attempts it is reported in errors and kept in failed, its update is
+    never dropped. Failed updates are sent again with the next flush, merged under newer updates of their set.
+    setCollection is idempotent, so an update is safe to send more than once.
+
+    With logPath every update is appended to a json lines log before put returns and every sent update is marked
+    in it, so updates not yet sent, failed ones included, are replayed by the next queue opened on the log. The log
+    is truncated whenever nothing waits or failed.
+
+    Attributes:
+        client : BricksetClient
+            client sending the calls
+        delay : float
+            seconds updates wait for more updates
+        maxPending : int
+            number of waiting sets which triggers an immediate flush
+        retries : int
+            attempts of a call before it is kept in failed
+        backoff : float
+            seconds before the first retry, doubled after every failed flush
+        maxBackoff : float
+            maximal seconds between retries
+        updates : int
+            number of updates put into the queue
+        upstreamCalls : int
+            number of setCollection calls sent
+        errors : dict[int, Exception]
+            last error of every set in failed
+    """
+    def __init__(self, client, logPath:str|None=None, delay:float=1.0, maxPending:int=50, retries:int=5, backoff:float=0.5, maxBackoff:float=30.0, fsync:bool=True):
+        """
+        Initialization of WriteBehindQueue class, updates left in an existing log are queued again
+
+        Args:
+            client : BricksetClient or any object with the same setCollection
+            logPath : path of the durable log, updates are kept only in memory when None
+            delay : seconds updates wait for more updates
+            maxPending : number of waiting sets which triggers an immediate flush
+            retries : attempts of a call before it is kept in failed
+            backoff : seconds before the first retry
+            maxBackoff : maximal seconds between retries
+            fsync : check if the log is synced to disk on every update
+        """
+        self.client = client
+        self.delay = delay
+        self.maxPending = maxPending
+        self.retries = retries
+        self.backoff = backoff
+        self.maxBackoff = maxBackoff
+        self.updates = 0
+        self.upstreamCalls = 0
+        self.errors = {}
+        self._fsync = fsync
+        # setID -> [merged params, sequence number of the last update]
+        self._pending = {}
+        # setID -> [merged params, sequence number] of updates which failed retries attempts
+        self._failed = {}
+        self._attempts = {}
+        self._failures = 0
+        self._sequence = 0
+        self._timer = None
+        self._task = None
+        self._lock = asyncio.Lock()
+        self._log = None
+        if logPath is not None:
+            self._replay(logPath)
+    @property
+    def pending(self):
+        """
+        Updates waiting to be sent
+
+        Returns:
+            dict[int, dict] : merged params by setID
+        """
+        return {setID: dict(entry[0]) for setID, entry in self._pending.items()}
+    @property
+    def failed(self):
+        """
+        Updates which failed retries attempts, sent again with the next flush
+
+        Returns:
+            dict[int, dict] : merged params by setID
+        """
+        return {setID: dict(entry[0]) for setID, entry in self._failed.items()}
+    def __len__(self):
+        """
+        Number of sets with waiting updates
+
+        Returns:
+            int : number of sets
+        """
+        return len(self._pending)
+    def _replay(self, path:str):
+        """
+        Queues updates of the log which were not sent and rewrites the log with them only
+
+        Args:
+            path : path of the log
+        """
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        # partly written record of a crash, its put never returned
+                        break
+                    record = json.loads(line)
+                    setID = record["setID"]
+                    entry = self._pending.get(setID)
+                    if "done" in record:
+                        if entry is not None and entry[1] <= record["done"]:
+                            del self._pending[setID]
+                    else:
+                        if entry is None:
+                            entry = self._pending[setID] = [{}, 0]
+                        entry[0].update(record["params"])
+                        entry[1] = record["seq"]
+                        self._sequence = max(self._sequence, record["seq"])
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as file:
+            for setID, (params, seq) in self._pending.items():
+                file.write(_record(setID=setID, params=params, seq=seq))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+        self._log = open(path, "ab")
+    def _write(self, **record):
+        """
+        Appends record to the log
+
+        Args:
+            record : fields of the record
+        """
+        log = self._log
+        if log is None:
+            return
+        log.write(_record(**record))
+        log.flush()
+        if self._fsync:
+            os.fsync(log.fileno())
+    def put(self, setID:int, **params):
+        """
+        Queues update of set, must be called from a running event loop
+
+        Args:
+            setID : ID of Lego set
+            params : changed values, own, want (0 or 1), qtyOwned, notes or rating
+        """
+        self.updates += 1
+        self._sequence += 1
+        self._write(setID=setID, params=params, seq=self._sequence)
+        entry = self._pending.get(setID)
+        if entry is None:
+            self._pending[setID] = [dict(params), self._sequence]
+        else:
+            entry[0].update(params)
+            entry[1] = self._sequence
+        if len(self._pending) >= self.maxPending and not self._failures:
+            self._schedule(0)
+        else:
+            self._schedule(self.delay)
+    async def setCollection(self, setID:int, **params):
+        """
+        Queues update of set, same arguments as BricksetClient.setCollection
+
+        Args:
+            setID : ID of Lego set
+            params : changed values, own, want (0 or 1), qtyOwned, notes or rating
+        """
+        self.put(setID, **params)
+    def _schedule(self, delay:float):
+        """
+        Starts flush after delay unless one is already planned or running
+
+        Args:
+            delay : seconds to wait
+        """
+        if self._task is not None:
+            return
+        if self._timer is not None:
+            if delay:
+                return
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._start)
+    def _start(self):
+        self._timer = None
+        self._task = asyncio.ensure_future(self._run())
+    async def _run(self):
+        """
+        Flushes waiting updates and plans the next flush
+        """
+        try:
+            await self.flush()
+        finally:
+            self._task = None
+        if self._pending:
+            if self._failures:
+                self._schedule(min(self.maxBackoff, self.backoff * 2 ** (self._failures - 1)))
+            else:
+                self._schedule(0 if len(self._pending) >= self.maxPending else self.delay)
+    async def flush(self):
+        """
+        Sends all waiting and failed updates at once, failed ones are queued again
+
+        Returns:
+            dict[int, None|Exception] : None or error by setID
+        """
+        async with self._lock:
+            batch, self._pending = self._pending, {}
+            for setID, (params, seq) in self._failed.items():
+                entry = batch.get(setID)
+                if entry is None:
+                    batch[setID] = [params, seq]
+                else:
+                    params.update(entry[0])
+                    entry[0] = params
+            self._failed = {}
+            if not batch:
+                return {}
+            setIDs = list(batch)
+            self.upstreamCalls += len(setIDs)
+            results = await asyncio.gather(*(self.client.setCollection(setID, **batch[setID][0]) for setID in setIDs), return_exceptions=True)
+            failed = False
+            for setID, result in zip(setIDs, results):
+                params, seq = batch[setID]
+                if result is not None:
+                    newer = self._pending.pop(setID, None)
+                    if newer is not None:
+                        params.update(newer[0])
+                        seq = newer[1]
+                    attempts = self._attempts.get(setID, 0) + 1
+                    if attempts < self.retries:
+                        self._attempts[setID] = attempts
+                        failed = True
+                        self._pending[setID] = [params, seq]
+                    else:
+                        # stays unmarked in the log, so it is replayed by the next queue as well
+                        self._attempts.pop(setID, None)
+                        self.errors[setID] = result
+                        self._failed[setID] = [params, seq]
+                    continue
+                self._attempts.pop(setID, None)
+                self.errors.pop(setID, None)
+                self._write(setID=setID, done=seq)
+            self._failures = self._failures + 1 if failed else 0
+            if not self._pending and not self._failed and self._log is not None:
+                self._log.truncate(0)
+            return dict(zip(setIDs, results))
+    async def close(self):
+        """
+        Sends waiting updates once and closes the log, updates which failed stay in it
+        """
+        if self._task is not None:
+            await asyncio.shield(self._task)
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    def __str__(self):
+        """
+        String interpretation of WriteBehindQueue class
+
+        Returns:
+            str : numbers of waiting sets and sent calls
+        """
+        return f"WriteBehindQueue of {len(self)} sets, {self.upstreamCalls} calls for {self.updates} updates"
+
+def _record(**fields):
+    return json.dumps(fields, separators=(",", ":")).encode("utf-8") + b"\n"
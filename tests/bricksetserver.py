@@ -0,0 +1,146 @@
+"""
+Local stand-in for the Brickset API used by the tests
+"""
+
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+
+
+class FakeBricksetServer:
+    """
+    Minimal keep-alive HTTP/1.1 server answering Brickset API methods from in-memory data.
+
+    handlers maps method name to a function taking the query dict and returning
+    (status, headers, body); tests may replace them.
+    """
+
+    def __init__(self, sets=(), delay=0.0):
+        self.sets = list(sets)
+        self.delay = delay
+        self.calls = []
+        self.connections = 0
+        self.active = 0
+        self.maxActive = 0
+        # name -> number of body bytes sent before the connection is dropped
+        self.truncate = {}
+        self.handlers = {
+            "getSets": self.getSets,
+            "getThemes": lambda query: self.success(themes=[{"theme": "Star Wars", "setCount": 2, "subthemeCount": 1, "yearFrom": 1999, "yearTo": 2024}]),
+            "getSubthemes": lambda query: self.success(subthemes=[{"theme": query["Theme"], "subtheme": "Episode IV", "setCount": 2, "yearFrom": 1999, "yearTo": 2024}]),
+            "getYears": lambda query: self.success(years=[{"theme": query["Theme"], "year": "2019", "setCount": 2}]),
+            "getReviews": lambda query: self.success(reviews=[{"author": "x", "datePosted": "2020-01-01T00:00:00Z", "rating": {"overall": 4}, "title": "t", "review": "r", "HTML": False}]),
+            "getInstructions": lambda query: self.success(instructions=[{"URL": "http://example/x.pdf", "description": f"Instructions for {query['setID']}"}]),
+            "getMinifigCollection": lambda query: self.success(minifigs=[{"minifigNumber": "sw0001", "name": "Luke", "category": "Star Wars", "ownedInSets": 1, "ownedLoose": 0, "ownedTotal": 1, "wanted": False}]),
+            "setCollection": lambda query: self.success(),
+            "getUserMinifigNotes": lambda query: self.success(userMinifigNotes=[{"minifigNumber": "sw0001", "notes": "helmet missing"}]),
+            "setMinifigCollection": lambda query: self.success(),
+            "getKeyUsageStats": lambda query: self.success(apiKeyUsage=[{"dateStamp": "2024-01-02T00:00:00Z", "count": 10}]),
+        }
+
+    async def route(self, name, query, headers):
+        handler = self.handlers.get(name)
+        if handler is None:
+            return 404, {}, b"not found"
+        return await handler(query) if asyncio.iscoroutinefunction(handler) else handler(query)
+
+    @staticmethod
+    def success(**fields):
+        lists = [value for value in fields.values() if isinstance(value, list)]
+        body = dict(status="success", matches=len(lists[0]) if lists else 0, **fields)
+        return 200, {}, json.dumps(body).encode("utf-8")
+
+    def getSets(self, query):
+        params = json.loads(query.get("params", "{}"))
+        sets = self.sets
+        if "setID" in params:
+            wanted = {int(value) for value in str(params["setID"]).split(",")}
+            sets = [s for s in sets if s["setID"] in wanted]
+        if "theme" in params:
+            sets = [s for s in sets if s["theme"] == params["theme"]]
+        if "updatedSince" in params:
+            sets = [s for s in sets if s["lastUpdated"][:10] >= params["updatedSince"]]
+        pageSize = int(params.get("pageSize", 20))
+        pageNumber = int(params.get("pageNumber", 1))
+        page = sets[(pageNumber - 1) * pageSize:pageNumber * pageSize]
+        body = {"status": "success", "matches": len(sets), "sets": page}
+        return 200, {}, json.dumps(body).encode("utf-8")
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{self.port}/api/v3.asmx"
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if "content-length" in headers:
+                    await reader.readexactly(int(headers["content-length"]))
+                url = urlsplit(target)
+                query = {name: values[0] for name, values in parse_qs(url.query).items()}
+                apiMethod = url.path.rsplit("/", 1)[-1]
+                self.calls.append((apiMethod, query, headers))
+                self.active += 1
+                self.maxActive = max(self.maxActive, self.active)
+                try:
+                    if self.delay:
+                        await asyncio.sleep(self.delay)
+                    status, extra, body = await self.route(apiMethod, query, headers)
+                finally:
+                    self.active -= 1
+                lines = [f"HTTP/1.1 {status} X", f"Content-Length: {len(body)}"] + [f"{name}: {value}" for name, value in extra.items()]
+                cut = self.truncate.pop(apiMethod, None)
+                writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body[:cut])
+                await writer.drain()
+                if cut is not None:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+class FakeFileServer(FakeBricksetServer):
+    """
+    Static file server with ETag, If-None-Match and Range support
+    """
+
+    def __init__(self, files, **kwargs):
+        super().__init__(**kwargs)
+        self.files = files
+
+    async def route(self, name, query, headers):
+        if name.startswith("moved-"):
+            return 302, {"Location": name[len("moved-"):]}, b""
+        if name not in self.files:
+            return 404, {}, b"not found"
+        body = self.files[name]
+        etag = '"%x"' % hash(body)
+        if headers.get("if-none-match") == etag:
+            return 304, {"ETag": etag}, b""
+        if "range" in headers and headers.get("if-range", etag) == etag:
+            start = int(headers["range"].split("=")[1].rstrip("-"))
+            if start >= len(body):
+                return 416, {}, b""
+            return 206, {"ETag": etag, "Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"}, body[start:]
+        return 200, {"ETag": etag}, body
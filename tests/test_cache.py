@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+from brickset.cache import ResponseCache
+from brickset.client import BricksetClient
+
+from bricksetserver import FakeBricksetServer
+
+
+def test_lru_eviction_and_counters():
+    cache = ResponseCache(maxBytes=25)
+    cache.store("getThemes", {}, b"x" * 10)
+    cache.store("getYears", {"Theme": "City"}, b"y" * 10)
+    assert cache.lookup("getThemes", {}).fresh
+    cache.store("getYears", {"Theme": "Technic"}, b"z" * 10)
+    assert cache.evictions == 1
+    assert cache.lookup("getYears", {"Theme": "City"}) is None
+    assert cache.lookup("getThemes", {}).body == b"x" * 10
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert cache.size == 20
+
+
+def test_ttl_per_endpoint(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), ttls={"getThemes": 100, "getSets": 100}, userTTL=0.01)
+    cache.store("getKeyUsageStats", {}, b"{}")
+    assert cache.lookup("getKeyUsageStats", {}) is None
+    cache.store("getSets", {"userHash": "u", "params": {}}, b"{}")
+    time.sleep(0.02)
+    assert not cache.lookup("getSets", {"userHash": "u", "params": {}}).fresh
+    cache.store("getThemes", {"apiKey": "a"}, b"{}")
+    cache.close()
+    assert ResponseCache(str(tmp_path / "cache.db")).lookup("getThemes", {"apiKey": "b"}).fresh
+
+
+def test_client_hits_and_revalidation():
+    async def run():
+        async with FakeBricksetServer() as server:
+            cache = ResponseCache(ttls={"getThemes": 100, "getYears": 0.01})
+            body = server.success(years=[{"theme": "City", "year": "2019", "setCount": 5}])[2]
+
+            def getYears(query):
+                if server.calls[-1][2].get("if-none-match") == '"v1"':
+                    return 304, {"ETag": '"v1"'}, b""
+                return 200, {"ETag": '"v1"'}, body
+            server.handlers["getYears"] = getYears
+            async with BricksetClient("key", baseURL=server.url, cache=cache) as client:
+                for _ in range(3):
+                    assert (await client.getThemes())[0].theme == "Star Wars"
+                assert len(server.calls) == 1 and cache.hits == 2
+                assert (await client.getYears("City"))[0].setCount == 5
+                await asyncio.sleep(0.02)
+                assert (await client.getYears("City"))[0].setCount == 5
+                assert cache.revalidations == 1
+                assert server.calls[-1][2]["if-none-match"] == '"v1"'
+    asyncio.run(run())
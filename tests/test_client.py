@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+import pytest
+
+from brickset.client import BricksetClient, BricksetError
+
+from bricksetserver import FakeBricksetServer
+from test_types import SET_JSON
+
+
+def makeServer(count=0, **kwargs):
+    return FakeBricksetServer([dict(SET_JSON, setID=i, theme="Star Wars" if i % 2 else "City") for i in range(count)], **kwargs)
+
+
+def test_typed_methods():
+    async def run():
+        async with makeServer(3) as server, BricksetClient("key", baseURL=server.url) as client:
+            sets = await client.getSets(theme="City")
+            assert [s.setID for s in sets] == [0, 2]
+            assert (await client.getThemes())[0].theme == "Star Wars"
+            assert (await client.getSubthemes("Star Wars"))[0].subtheme == "Episode IV"
+            assert (await client.getYears("Star Wars"))[0].setCount == 2
+            assert (await client.getReviews(1))[0].rating.overall == 4
+            assert (await client.getInstructions(7))[0].description == "Instructions for 7"
+            assert (await client.getMinifigCollection(owned=1))[0].minifigNumber == "sw0001"
+            assert (await client.getUserMinifigNotes())[0].notes == "helmet missing"
+            await client.setMinifigCollection("sw0001", own=1, qtyOwned=2)
+            assert json.loads(server.calls[-1][1]["params"]) == {"own": 1, "qtyOwned": 2}
+            assert (await client.getKeyUsageStats())[0].count == 10
+            assert server.connections == 1
+            assert server.calls[0][1]["apiKey"] == "key"
+    asyncio.run(run())
+
+
+def test_get_all_sets_is_bounded_and_pooled():
+    async def run():
+        async with makeServer(95, delay=0.01) as server, BricksetClient("key", baseURL=server.url, maxConnections=3, concurrency=3) as client:
+            sets = await client.getAllSets(pageSize=10, theme="Star Wars")
+            assert [s.setID for s in sets] == list(range(1, 95, 2))
+            assert server.maxActive <= 3
+            assert server.connections <= 3
+    asyncio.run(run())
+
+
+def test_pipelining():
+    async def run():
+        async with makeServer(10) as server, BricksetClient("key", baseURL=server.url, maxConnections=1, pipelineDepth=4) as client:
+            results = await asyncio.gather(*(client.getSets(setID=i) for i in range(10)))
+            assert [r[0].setID for r in results] == list(range(10))
+            assert server.connections == 1
+    asyncio.run(run())
+
+
+def test_errors():
+    async def run():
+        async with makeServer() as server, BricksetClient("key", baseURL=server.url) as client:
+            server.handlers["getThemes"] = lambda query: (200, {}, b'{"status": "error", "message": "Invalid API key"}')
+            with pytest.raises(BricksetError, match="Invalid API key"):
+                await client.getThemes()
+            with pytest.raises(BricksetError):
+                await client.request("unknownMethod")
+    asyncio.run(run())
+
+
+def test_iter_sets_prefetches_with_backpressure():
+    async def run():
+        async with makeServer(50) as server, BricksetClient("key", baseURL=server.url) as client:
+            seen = []
+            requested = []
+            async for s in client.iterSets(pageSize=5, prefetch=2):
+                seen.append(s.setID)
+                if s.setID % 5 == 4:
+                    await asyncio.sleep(0.01)
+                    requested.append(len(server.calls))
+            assert seen == list(range(50))
+            # after finishing page n at most pages up to n + prefetch were requested
+            assert all(count <= page + 3 for page, count in enumerate(requested))
+            assert requested[0] == 3
+
+            iterator = client.iterSets(pageSize=5, prefetch=3)
+            assert (await iterator.__anext__()).setID == 0
+            await asyncio.sleep(0.01)
+            assert len(server.calls) == 14
+            await iterator.aclose()
+            await asyncio.sleep(0.01)
+            assert len(server.calls) == 14
+    asyncio.run(run())
+
+
+def test_iter_sets_without_prefetch_fetches_on_demand():
+    async def run():
+        async with makeServer(30) as server, BricksetClient("key", baseURL=server.url) as client:
+            seen = []
+            async for s in client.iterSets(pageSize=5, prefetch=0):
+                seen.append(s.setID)
+                # only the page being consumed was requested
+                assert len(server.calls) == s.setID // 5 + 1
+            assert seen == list(range(30))
+    asyncio.run(run())
+
+
+def test_slow_connect_does_not_block_idle_connections(monkeypatch):
+    async def run():
+        async with makeServer(3) as server, BricksetClient("key", baseURL=server.url, maxConnections=2) as client:
+            await client.getThemes()
+            connect = asyncio.open_connection
+            async def slowConnect(*args, **kwargs):
+                await asyncio.sleep(0.5)
+                return await connect(*args, **kwargs)
+            monkeypatch.setattr(asyncio, "open_connection", slowConnect)
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            # the first call takes the idle connection, the second one opens a new connection
+            first = asyncio.ensure_future(client.getThemes())
+            second = asyncio.ensure_future(client.getReviews(1))
+            await first
+            await client.getYears("City")
+            assert loop.time() - start < 0.3
+            await second
+            assert server.connections == 2
+    asyncio.run(run())
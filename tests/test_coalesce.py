@@ -0,0 +1,58 @@
+import asyncio
+
+from brickset.client import BricksetClient, BricksetError
+from brickset.coalesce import CoalescingClient
+
+from test_client import makeServer
+
+
+def test_identical_calls_share_one_request():
+    async def run():
+        async with makeServer(3, delay=0.02) as server, CoalescingClient(BricksetClient("key", baseURL=server.url)) as client:
+            results = await asyncio.gather(*(client.getReviews(1) for _ in range(5)), client.getReviews(2), *(client.getSets(theme="City") for _ in range(3)))
+            assert all(result is results[0] for result in results[1:5])
+            assert [s.setID for s in results[6]] == [0, 2]
+            assert [call[0] for call in server.calls].count("getReviews") == 2
+            assert [call[0] for call in server.calls].count("getSets") == 1
+            assert client.coalesced == 6
+            await client.getReviews(1)
+            assert len(server.calls) == 4
+    asyncio.run(run())
+
+
+def test_set_lookups_are_batched():
+    async def run():
+        async with makeServer(10) as server, CoalescingClient(BricksetClient("key", baseURL=server.url), maxBatch=4) as client:
+            found = await asyncio.gather(*(client.getSet(setID) for setID in (1, 2, 1, 3, 42)))
+            assert [s and s.setID for s in found] == [1, 2, 1, 3, None]
+            assert found[0] is found[2]
+            assert len(server.calls) == 1
+            assert '"setID": "1,2,3,42"' in server.calls[0][1]["params"]
+            found = await asyncio.gather(*(client.getSet(setID) for setID in range(6)))
+            assert [s.setID for s in found] == list(range(6))
+            assert len(server.calls) == 3
+    asyncio.run(run())
+
+
+def test_batch_errors_reach_every_caller():
+    async def run():
+        async with makeServer(3) as server, CoalescingClient(BricksetClient("key", baseURL=server.url)) as client:
+            server.handlers["getSets"] = lambda query: (500, {}, b"down")
+            results = await asyncio.gather(client.getSet(1), client.getSet(2), return_exceptions=True)
+            assert all(isinstance(result, BricksetError) for result in results)
+            server.handlers["getSets"] = server.getSets
+            assert (await client.getSet(1)).setID == 1
+    asyncio.run(run())
+
+
+def test_cancelled_batch_releases_callers():
+    async def run():
+        async with makeServer(3, delay=0.5) as server, CoalescingClient(BricksetClient("key", baseURL=server.url)) as client:
+            lookups = [asyncio.ensure_future(client.getSet(setID)) for setID in (1, 2)]
+            await asyncio.sleep(0.05)
+            for batch in list(client._batches):
+                batch.cancel()
+            results = await asyncio.wait_for(asyncio.gather(*lookups, return_exceptions=True), 1)
+            assert all(isinstance(result, asyncio.CancelledError) for result in results)
+            assert not client._lookups
+    asyncio.run(run())
@@ -0,0 +1,94 @@
+import asyncio
+import os
+
+from brickset import download
+from brickset.download import DOWNLOADED, RESUMED, UNCHANGED, Downloader, DownloadError
+from brickset.types import Image, Instructions
+
+from bricksetserver import FakeFileServer
+
+
+def test_bulk_download_resume_and_skip(tmp_path):
+    files = {f"{i}.pdf": os.urandom(200000 + i) for i in range(5)}
+    files["1-1.jpg"] = b"image"
+    progress = []
+
+    async def run():
+        async with FakeFileServer(files) as server:
+            base = f"http://127.0.0.1:{server.port}/files/"
+            items = [Instructions(base + f"{i}.pdf", "") for i in range(5)] + [Image("", base + "1-1.jpg"), base + "missing.pdf"]
+            server.truncate["3.pdf"] = 70000
+            async with Downloader(str(tmp_path), maxConnections=2, progress=lambda *args: progress.append(args)) as downloader:
+                results = await downloader.downloadAll(items)
+            assert [results[base + f"{i}.pdf"] for i in (0, 1, 2, 4)] == [DOWNLOADED] * 4
+            assert isinstance(results[base + "3.pdf"], ConnectionError)
+            assert isinstance(results[base + "missing.pdf"], DownloadError)
+            assert os.path.getsize(tmp_path / "3.pdf.part") == 70000
+            assert server.connections <= 3
+
+            async with Downloader(str(tmp_path)) as downloader:
+                results = await downloader.downloadAll(items[:6])
+                assert results[base + "3.pdf"] == RESUMED
+                assert results[base + "0.pdf"] == UNCHANGED
+                assert await downloader.download(base + "moved-1-1.jpg", str(tmp_path / "copy.jpg")) == DOWNLOADED
+            assert [call[2].get("range") for call in server.calls if call[0] == "3.pdf"][-1] == "bytes=70000-"
+            for name, body in files.items():
+                assert (tmp_path / name).read_bytes() == body
+            assert (tmp_path / "copy.jpg").read_bytes() == b"image"
+    asyncio.run(run())
+    assert progress[-1][2] is not None
+    assert max(received for url, received, total in progress if url.endswith("0.pdf")) == len(files["0.pdf"])
+
+
+def test_download_instruction(tmp_path):
+    async def start():
+        server = FakeFileServer({"x.pdf": b"pdf"})
+        return await server.start()
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(start())
+    thread = __import__("threading").Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        instructions = Instructions(f"http://127.0.0.1:{server.port}/x.pdf", "manual")
+        assert instructions.downloadInstruction(str(tmp_path)) == DOWNLOADED
+        assert (tmp_path / "x.pdf").read_bytes() == b"pdf"
+        assert instructions.downloadInstruction(str(tmp_path / "x.pdf")) == UNCHANGED
+    finally:
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def test_same_file_name_from_two_urls(tmp_path):
+    async def run():
+        async with FakeFileServer({"a.pdf": b"first", "b.pdf": b"second"}) as server:
+            base = f"http://127.0.0.1:{server.port}/"
+            first, second = base + "one/a.pdf", base + "two/a.pdf"
+            async with Downloader(str(tmp_path)) as downloader:
+                results = await downloader.downloadAll([first, second, first])
+                assert results[first] == DOWNLOADED
+                assert isinstance(results[second], DownloadError)
+                assert await downloader.download(second, str(tmp_path / "b.pdf")) == DOWNLOADED
+                assert set(downloader.manifest) == {first, second}
+            async with Downloader(str(tmp_path)) as downloader:
+                assert await downloader.download(first) == UNCHANGED
+            assert len([call for call in server.calls if call[0] == "a.pdf"]) == 3
+    asyncio.run(run())
+
+
+def test_manifest_is_written_once_per_batch(tmp_path, monkeypatch):
+    writes = []
+    replace = download._replaceFile
+    monkeypatch.setattr(download, "_replaceFile", lambda path, data: writes.append(path) or replace(path, data))
+    async def run():
+        async with FakeFileServer({f"{i}.pdf": b"pdf" * i for i in range(10)}) as server:
+            base = f"http://127.0.0.1:{server.port}/"
+            async with Downloader(str(tmp_path), saveInterval=60) as downloader:
+                results = await downloader.downloadAll(base + f"{i}.pdf" for i in range(10))
+                assert set(results.values()) == {DOWNLOADED}
+                assert len(writes) == 1
+            assert len(writes) == 1
+            async with Downloader(str(tmp_path)) as downloader:
+                assert len(downloader.manifest) == 10
+    asyncio.run(run())
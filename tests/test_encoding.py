@@ -0,0 +1,90 @@
+import json
+import pickle
+import struct
+
+from brickset.encoding import packb
+from brickset.types import Reviews, Sets
+
+from test_types import SET_JSON
+
+
+def unpack(data):
+    # decoder of the MessagePack subset written by packb
+    formats = {0xcb: ">d", 0xcc: ">B", 0xcd: ">H", 0xce: ">I", 0xcf: ">Q", 0xd0: ">b", 0xd1: ">h", 0xd2: ">i", 0xd3: ">q"}
+    def number(fmt, pos):
+        return struct.unpack_from(fmt, data, pos)[0], pos + struct.calcsize(fmt)
+    def read(pos):
+        tag = data[pos]
+        pos += 1
+        if tag <= 0x7f or tag >= 0xe0:
+            return tag - (tag >= 0xe0) * 0x100, pos
+        if tag in (0xc0, 0xc2, 0xc3):
+            return {0xc0: None, 0xc2: False, 0xc3: True}[tag], pos
+        if tag in formats:
+            return number(formats[tag], pos)
+        if 0xa0 <= tag <= 0xbf or tag == 0xd9:
+            size, pos = (tag & 0x1f, pos) if tag != 0xd9 else number(">B", pos)
+            return data[pos:pos + size].decode(), pos + size
+        if 0x80 <= tag <= 0x9f:
+            size, isMap = tag & 0x0f, tag < 0x90
+        else:
+            size, pos = number(">H", pos)
+            isMap = tag == 0xde
+        items = []
+        for _ in range(size * (1 + isMap)):
+            item, pos = read(pos)
+            items.append(item)
+        return (dict(zip(items[::2], items[1::2])) if isMap else items), pos
+    return read(0)[0]
+
+
+def test_json_round_trip_and_projection():
+    s = Sets.deJson(SET_JSON)
+    encoded = s.to_json()
+    again = Sets.deJson(encoded)
+    assert again.to_json() == encoded
+    assert again.legoCom.US.dateFirstAvailable == s.legoCom.US.dateFirstAvailable
+    assert again.lastUpdated == s.lastUpdated
+    assert json.loads(encoded)["LEGOCom"]["US"]["retailPrice"] == SET_JSON["LEGOCom"]["US"]["retailPrice"]
+    assert json.loads(s.to_json(["setID", "name"])) == {"setID": SET_JSON["setID"], "name": SET_JSON["name"]}
+    assert s.to_dict(["ageRange"]) == {"ageRange": {"min": SET_JSON["ageRange"]["min"], "max": SET_JSON["ageRange"].get("max")}}
+    review = Reviews.deJson({"author": "x", "datePosted": "2020-01-01T10:00:00Z", "rating": {"overall": 4}, "title": "t", "review": "r", "HTML": False})
+    assert review.to_dict()["datePosted"] == "2020-01-01T10:00:00Z"
+
+
+def test_msgpack_matches_dict():
+    s = Sets.deJson(SET_JSON)
+    assert unpack(s.to_msgpack()) == s.to_dict()
+    values = [0, 127, 128, 70000, 2**40, -1, -33, -200, -40000, -2**40, 1.5, "x" * 40, [1] * 20, {str(i): i for i in range(20)}]
+    assert unpack(packb(values[:13])) == values[:13]
+    assert unpack(packb(values[13])) == values[13]
+
+
+def test_cache_is_dropped_by_invalidate():
+    s = Sets.deJson(SET_JSON)
+    first = s.to_json(cache=True)
+    assert s.to_json(cache=True) is first and s.to_json() is not first
+    assert type(s) is Sets and type(s.legoCom.US).__name__ == "LEGOComDetails"
+    s.legoCom.US.retailPrice = 1.5
+    s.extendedData.tags.append("modified")
+    s.invalidate()
+    second = s.to_json(cache=True)
+    assert json.loads(second)["LEGOCom"]["US"]["retailPrice"] == 1.5
+    assert json.loads(second)["extendedData"]["tags"][-1] == "modified"
+    assert unpack(s.to_msgpack(cache=True))["extendedData"]["tags"][-1] == "modified"
+    nested = s.extendedData.to_json(cache=True)
+    s.extendedData.notes = "changed"
+    s.invalidate()
+    assert s.extendedData.to_json(cache=True) is not nested
+    assert json.loads(s.to_json(cache=True))["extendedData"]["notes"] == "changed"
+    copy = pickle.loads(pickle.dumps(s))
+    assert not hasattr(copy, "_encoded")
+    assert type(copy) is Sets and copy.to_json() == s.to_json(cache=True)
+
+
+def test_lazy_sets_encode_without_building():
+    s = Sets.deJson(SET_JSON, lazy=True)
+    assert json.loads(s.to_json())["LEGOCom"] == SET_JSON["LEGOCom"]
+    assert Sets.__dict__["legoCom"].slot.__get__(s).__class__ is dict
+    s.legoCom.US.retailPrice = 2.5
+    assert json.loads(s.to_json())["LEGOCom"]["US"]["retailPrice"] == 2.5
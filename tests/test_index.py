@@ -0,0 +1,46 @@
+from datetime import date, datetime, timezone
+
+import pytest
+
+from brickset.index import SetIndex
+from brickset.types import Sets
+
+from test_types import SET_JSON
+
+
+def makeSet(setID, **fields):
+    data = dict(SET_JSON, setID=setID, number=str(10000 + setID), barcode={"EAN": f"EAN{setID}", "UPC": f"UPC{setID}"})
+    data.update(fields)
+    return Sets.deJson(data)
+
+
+def test_lookups():
+    index = SetIndex([makeSet(1, year=2019, pieces=100), makeSet(2, year=2020, pieces=None), makeSet(3, year=2019, subtheme="Other", pieces=900)])
+    assert [s.setID for s in index.byThemeYear("Creator Expert", 2019)] == [1, 3]
+    assert [s.setID for s in index.bySubtheme("Other")] == [3]
+    assert index.byBarcode("UPC2").setID == 2
+    assert [s.setID for s in index.byNumber("10001", 1)] == [1]
+    assert index.byNumber("10001", 2) == []
+    assert [s.setID for s in index.range("year", 2019, 2019)] == [1, 3]
+    assert [s.setID for s in index.range("pieces", low=50)] == [1, 3]
+    assert [s.setID for s in index.range("pieces", high=500)] == [1]
+
+
+def test_update_and_delete():
+    index = SetIndex([makeSet(1, year=2019, lastUpdated="2021-01-01T00:00:00Z")])
+    assert not index.update(makeSet(1, year=2020, lastUpdated="2020-01-01T00:00:00Z"))
+    assert index.update(makeSet(1, year=2020, lastUpdated="2022-01-01T00:00:00Z"))
+    assert index.byThemeYear("Creator Expert", 2019) == []
+    assert [s.setID for s in index.byThemeYear("Creator Expert", 2020)] == [1]
+    assert [s.setID for s in index.range("lastUpdated", datetime(2021, 6, 1, tzinfo=timezone.utc))] == [1]
+    assert index.delete(1).setID == 1
+    assert len(index) == 0 and index.byBarcode("EAN1") is None and index.range("year") == []
+
+
+def test_last_updated_bounds():
+    index = SetIndex([makeSet(1, lastUpdated="2021-01-01T00:00:00Z"), makeSet(2, lastUpdated="2021-01-01T23:30:00Z"), makeSet(3, lastUpdated="2021-01-02T00:00:00Z")])
+    assert [s.setID for s in index.range("lastUpdated", date(2021, 1, 1), date(2021, 1, 1))] == [1, 2]
+    assert [s.setID for s in index.range("lastUpdated", low=date(2021, 1, 2))] == [3]
+    assert [s.setID for s in index.range("lastUpdated", datetime(2021, 1, 1, 12), datetime(2021, 1, 2))] == [2, 3]
+    with pytest.raises(TypeError, match="date or datetime"):
+        index.range("lastUpdated", "2021-01-01")
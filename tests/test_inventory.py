@@ -0,0 +1,52 @@
+import asyncio
+import json
+import random
+
+from brickset.client import BricksetClient
+from brickset.inventory import MinifigInventory, pushChanges
+from brickset.types import MinifigCollection, UserMinifigNotes
+
+from test_client import makeServer
+
+
+def minifig(number, inSets=0, loose=0, wanted=False):
+    return MinifigCollection(number, f"Minifig {number}", "Star Wars", inSets, loose, inSets + loose, wanted)
+
+
+def test_diff_produces_only_pushable_changes():
+    old = MinifigInventory([minifig("sw1", 1, 2), minifig("sw2", 1), minifig("sw3", wanted=True), minifig("sw4", 0, 1)],
+                           [UserMinifigNotes("sw1", "scratched"), UserMinifigNotes("sw4", "")])
+    new = MinifigInventory([minifig("sw1", 1, 2), minifig("sw2", 2), minifig("sw4", 0, 3, True), minifig("sw5", 0, 1)],
+                           [UserMinifigNotes("sw4", "boxed")])
+    diff = old.diff(new)
+    assert diff.owned == {"sw2": 1, "sw4": 2, "sw5": 1}
+    assert diff.wantedAdded == {"sw4"} and diff.wantedRemoved == {"sw3"}
+    assert diff.notes == {"sw1": None, "sw4": "boxed"}
+    assert [str(change) for change in diff.changes] == ["sw1: notes=", "sw3: want=0", "sw4: own=1, qtyOwned=3, want=1, notes=boxed", "sw5: own=1, qtyOwned=1"]
+    assert not new.diff(new)
+    old.apply(diff.changes)
+    assert [str(change) for change in old.diff(new).changes] == []
+    assert "sw3" not in old and old.get("sw4")[1] == "boxed"
+
+
+def test_diff_of_large_collections():
+    rng = random.Random(3)
+    old = MinifigInventory([minifig(f"m{i}", rng.randrange(2), rng.randrange(3), rng.random() < 0.2) for i in range(50000)],
+                           [UserMinifigNotes(f"m{i}", "note") for i in range(0, 50000, 7)])
+    new = MinifigInventory(list(old.minifigs.values())[:-10] + [minifig("m5", 9, 9)], [UserMinifigNotes(f"m{i}", "note") for i in range(0, 50000, 7)])
+    diff = old.diff(new)
+    assert len(diff.changes) <= 11 and diff.owned["m5"] == 18 - old.minifigs["m5"].ownedTotal
+
+
+def test_fetch_and_push():
+    async def run():
+        async with makeServer() as server, BricksetClient("key", "hash", baseURL=server.url) as client:
+            old = await MinifigInventory.fromClient(client)
+            assert len(old) == 1 and old.get("sw0001")[1] == "helmet missing"
+            new = MinifigInventory([minifig("sw0001", 1, 1)])
+            results = await pushChanges(client, old.diff(new).changes)
+            assert results == {"sw0001": None}
+            pushed = [query for name, query, _ in server.calls if name == "setMinifigCollection"]
+            assert pushed[0]["minifigNumber"] == "sw0001" and pushed[0]["userHash"] == "hash"
+            assert json.loads(pushed[0]["params"]) == {"own": 1, "qtyOwned": 1, "notes": ""}
+    asyncio.run(run())
@@ -0,0 +1,43 @@
+import asyncio
+
+from brickset.cache import ResponseCache
+from brickset.client import BricksetClient
+from brickset.metrics import Histogram, Metrics
+
+from test_client import makeServer
+
+
+def test_histogram_buckets():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(1.0) == float("inf")
+
+
+def test_client_records_requests_cache_and_quota():
+    async def run():
+        metrics = Metrics()
+        events = []
+        metrics.listeners.append(lambda event, labels, value: events.append(event))
+        async with makeServer(3) as server, BricksetClient("secret-key", baseURL=server.url, cache=ResponseCache(), metrics=metrics) as client:
+            await client.getSets(theme="City")
+            await client.getSets(theme="City")
+            await client.getKeyUsageStats()
+        assert metrics.requestLatency["getSets"].count == 1
+        assert metrics.requests == {("getSets", 200): 1, ("getKeyUsageStats", 200): 1}
+        assert metrics.bytesReceived["getSets"] > 0
+        assert metrics.objects == {"Sets": 4, "ApiKeyUsage": 1}
+        assert metrics.cache == {("getSets", "miss"): 1, ("getSets", "hit"): 1}
+        assert metrics.hitRatio == 0.5
+        assert metrics.quotaUsed == {"...-key": 2}
+        assert metrics.keyUsage == {"...-key": 10}
+        assert {"request", "bytes", "cache", "deserialize", "quota", "keyUsage"} <= set(events)
+        text = metrics.exportPrometheus()
+        assert 'brickset_request_seconds_bucket{method="getSets",le="+Inf"} 1' in text
+        assert 'brickset_requests_total{method="getSets",status="200"} 1' in text
+        assert "brickset_cache_hit_ratio 0.5" in text
+        assert 'brickset_key_usage{key="...-key"} 10' in text
+        assert "secret" not in text
+    asyncio.run(run())
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from brickset.parallel import importSnapshots, importTable, parseRange, splitSource
+from brickset.snapshot import load_snapshot
+from brickset.types import Sets
+
+from test_types import SET_JSON, makeResponse
+
+
+def test_ranges_parse_every_set_once(tmp_path):
+    path = tmp_path / "dump.json"
+    path.write_bytes(makeResponse(50))
+    ranges = splitSource(str(path), 1000)
+    assert len(ranges) > 10
+    setIDs = [s.setID for task in ranges for s in parseRange(*task)]
+    assert setIDs == list(range(50))
+
+
+def test_import_table_from_pages(tmp_path):
+    themes = ["Star Wars", "City", "Technic"]
+    for page in range(3):
+        sets = [dict(SET_JSON, setID=page * 10 + i, theme=themes[(page + i) % 3]) for i in range(10)]
+        (tmp_path / f"page-{page}.json").write_text(json.dumps({"status": "success", "matches": 30, "sets": sets}))
+    table = importTable(str(tmp_path), workers=2, chunkBytes=2000)
+    assert list(table.setID) == list(range(30))
+    assert [table.categories["theme"][code] for code in table.codes["theme"]] == [themes[(i // 10 + i % 10) % 3] for i in range(30)]
+    assert table.aggregate("pieces", "sum") == 30 * SET_JSON["pieces"]
+
+
+def test_import_snapshots(tmp_path):
+    path = tmp_path / "dump.json"
+    path.write_bytes(makeResponse(40))
+    segments = importSnapshots(str(path), str(tmp_path / "segments"), workers=2, chunkBytes=4000)
+    assert len(segments) > 1
+    loaded = []
+    for segment in segments:
+        with load_snapshot(segment) as snapshot:
+            loaded.extend(snapshot)
+    assert [s.setID for s in loaded] == list(range(40))
+    assert loaded[7].name == Sets.deJson(json.loads(makeResponse(8))["sets"][7]).name
+
+
+def test_dump_with_sorted_keys_is_rejected(tmp_path):
+    path = tmp_path / "dump.json"
+    path.write_text(json.dumps({"status": "success", "matches": 5, "sets": [dict(SET_JSON, setID=i) for i in range(5)]}, sort_keys=True))
+    with pytest.raises(ValueError):
+        parseRange(str(path), 0, path.stat().st_size)
+    with pytest.raises(ValueError):
+        importTable(str(path), workers=1, chunkBytes=1000)
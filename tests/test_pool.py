@@ -0,0 +1,35 @@
+import json
+
+from brickset.pool import STRINGS, StringPool
+from brickset.types import Sets, Themes
+
+from test_types import SET_JSON
+
+
+def test_codes_and_intern():
+    pool = StringPool()
+    first = "".join(["Star", " Wars"])
+    second = "".join(["Star", " Wa", "rs"])
+    assert first is not second
+    assert pool.intern(first) is pool.intern(second) is first
+    assert pool.code(second) == 0 and pool.code("City") == 1
+    assert pool.lookup(1) == "City" and len(pool) == 2
+    assert pool.intern(None) is None
+
+
+def test_deserializers_share_strings():
+    a = Sets.deJson(json.dumps(SET_JSON))
+    b = Sets.deJson(json.dumps(SET_JSON))
+    theme = Themes.deJson(json.dumps({"theme": SET_JSON["theme"]}))
+    assert a.theme is b.theme is theme.theme
+    assert a.availability is b.availability
+    assert STRINGS.code(a.subtheme) == STRINGS.code(b.subtheme)
+
+
+def test_only_categories_are_interned_into_given_pool():
+    pool = StringPool()
+    extendedData = dict(SET_JSON.get("extendedData") or {}, tags=["pool test tag"])
+    s = Sets.deJson(json.dumps(dict(SET_JSON, theme="Pool test theme", extendedData=extendedData)), pool=pool)
+    assert s.theme is pool.intern("Pool test theme") and "Pool test theme" not in STRINGS
+    assert set(pool.values) == {s.theme, s.themeGroup, s.subtheme, s.category, s.packagingType, s.availability} - {None}
+    assert "pool test tag" not in STRINGS and s.extendedData.tags == ["pool test tag"]
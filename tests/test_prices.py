@@ -0,0 +1,37 @@
+from datetime import date
+
+from brickset.prices import PriceTable
+from brickset.types import Sets
+
+from test_types import SET_JSON
+
+
+def makeTable():
+    details = {"retailPrice": 200.0, "dateFirstAvailable": "2020-01-01T00:00:00Z", "dateLastAvailable": "2020-12-31T00:00:00Z"}
+    return PriceTable.fromSets([
+        Sets.deJson(dict(SET_JSON, setID=1, pieces=1000, LEGOCom={"US": details, "UK": dict(details, retailPrice=150.0)})),
+        Sets.deJson(dict(SET_JSON, setID=2, pieces=None, LEGOCom={"US": {"retailPrice": 10.0, "dateFirstAvailable": "2021-06-01T00:00:00Z"}})),
+        Sets.deJson(dict(SET_JSON, setID=3, pieces=50, LEGOCom={"US": dict(details, retailPrice=0)})),
+    ])
+
+
+def test_price_per_piece_and_ratio():
+    table = makeTable()
+    values, mask = table.pricePerPiece()
+    assert list(mask) == [1, 0, 0]
+    assert values[0] == 0.2
+    assert table.take(values, mask) == ([1], [0.2])
+    values, mask = table.ratio("UK")
+    assert list(mask) == [1, 0, 0]
+    assert values[0] == 0.75
+    assert table.aggregate(*table.ratio("DE")) is None
+
+
+def test_shelf_life_and_availability():
+    table = makeTable()
+    values, mask = table.shelfLife()
+    assert list(mask) == [1, 0, 1]
+    assert list(values) == [365, 0, 365]
+    assert list(table.availableAt(date(2020, 6, 1))) == [1, 0, 1]
+    assert list(table.availableAt(date(2022, 1, 1))) == [0, 1, 0]
+    assert list(table.availableAt(date(2022, 1, 1), "UK")) == [0, 0, 0]
@@ -0,0 +1,86 @@
+import asyncio
+import copy
+import pickle
+from statistics import fmean, pvariance
+
+import pytest
+
+from brickset.client import BricksetClient
+from brickset.reviews import RatingAggregate, ReviewPipeline, ReviewSpill, RunningStats
+from brickset.types import Reviews
+
+from test_client import makeServer
+
+
+def makeReview(i, overall, parts=None):
+    return {"author": f"a{i}", "datePosted": "2020-01-01T00:00:00Z", "rating": {"overall": overall, "parts": parts}, "title": f"Review {i}", "review": f"<p>text {i}</p>", "HTML": True}
+
+
+def test_running_stats_match_statistics():
+    values = [3, 5, 1, 4, 4, 2, 5, 5]
+    whole = RunningStats()
+    left, right = RunningStats(), RunningStats()
+    for i, value in enumerate(values):
+        whole.add(value)
+        (left if i < 3 else right).add(value)
+    left.merge(right)
+    left.merge(RunningStats())
+    for stats in (whole, left):
+        assert stats.count == len(values)
+        assert stats.mean == pytest.approx(fmean(values))
+        assert stats.variance == pytest.approx(pvariance(values))
+
+
+def test_aggregate_counts_dimensions_separately():
+    aggregate = RatingAggregate()
+    for i, (overall, parts) in enumerate([(5, 4), (3, None), (4, 2)]):
+        aggregate.add(Reviews.deJson(makeReview(i, overall, parts)))
+    assert aggregate.reviews == 3
+    assert aggregate.overall.count == 3 and aggregate.overall.mean == pytest.approx(4)
+    assert aggregate.parts.count == 2 and aggregate.parts.mean == pytest.approx(3)
+    assert aggregate.playability.count == 0
+
+
+def test_aggregates_from_pickle_merge():
+    left, right = RatingAggregate(), RatingAggregate()
+    left.add(Reviews.deJson(makeReview(0, 5, 4)))
+    right.add(Reviews.deJson(makeReview(1, 3, 2)))
+    right.add(Reviews.deJson(makeReview(2, 4)))
+    received = pickle.loads(pickle.dumps(right))
+    assert copy.copy(right).overall.count == 2
+    left.merge(received)
+    assert left.reviews == 3
+    assert left.overall.count == 3 and left.overall.mean == pytest.approx(4)
+    assert left.parts.count == 2 and left.parts.variance == pytest.approx(1)
+    with pytest.raises(AttributeError):
+        left.missing
+
+
+def test_pipeline_with_spill(tmp_path):
+    async def run():
+        async with makeServer(10) as server, BricksetClient("key", baseURL=server.url) as client:
+            def reviews(query):
+                setID = int(query["setID"])
+                if setID == 7:
+                    return 500, {}, b"error"
+                return server.success(reviews=[makeReview(i, 1 + (setID + i) % 5) for i in range(setID % 4 + 1)])
+            server.handlers["getReviews"] = reviews
+            with ReviewSpill(str(tmp_path / "reviews.jsonl")) as spill:
+                pipeline = ReviewPipeline(client, concurrency=3, spill=spill)
+                done = await pipeline.ingest(i for i in range(10))
+                assert sorted(done) == [0, 1, 2, 3, 4, 5, 6, 8, 9] and list(pipeline.errors) == [7]
+                assert done[3].reviews == 4
+                assert done[3].overall.mean == pytest.approx(fmean(1 + (3 + i) % 5 for i in range(4)))
+                assert [r.title for r in spill.reviews(3)] == [f"Review {i}" for i in range(4)]
+                again = await pipeline.ingest([3])
+                assert again[3].reviews == 4 and pipeline.aggregates[3] is again[3]
+                assert [r.title for r in spill.reviews(3)] == [f"Review {i}" for i in range(4)]
+            with open(tmp_path / "reviews.jsonl", "ab") as file:
+                file.write(b'{"setID": 11')
+            with ReviewSpill(str(tmp_path / "reviews.jsonl")) as spill:
+                assert len(spill) == 9 and 7 not in spill
+                assert len(spill.reviews(3)) == 4
+                assert spill.reviews(2)[2].review == "<p>text 2</p>"
+                spill.append(2, [Reviews.deJson(makeReview(9, 5))])
+                assert [r.author for r in spill.reviews(2)] == ["a0", "a1", "a2", "a9"]
+    asyncio.run(run())
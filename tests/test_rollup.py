@@ -0,0 +1,73 @@
+import asyncio
+
+from brickset.client import BricksetClient
+from brickset.index import SetIndex
+from brickset.rollup import CatalogueRollup
+from brickset.sync import CatalogueSync
+from brickset.types import Sets
+
+from test_client import makeServer
+from test_types import SET_JSON
+
+
+def makeSet(setID, theme, subtheme, year):
+    return Sets.deJson(dict(SET_JSON, setID=setID, theme=theme, subtheme=subtheme, year=year))
+
+
+def rescan(sets):
+    rollup = CatalogueRollup()
+    for s in sets:
+        rollup.insert(s)
+    return rollup
+
+
+def views(rollup):
+    themes = [str(t) for t in rollup.themes()]
+    return themes, {t.theme: ([str(s) for s in rollup.subthemes(t.theme)], [str(y) for y in rollup.years(t.theme)]) for t in rollup.themes()}
+
+
+def test_incremental_matches_rescan():
+    sets = {i: makeSet(i, ("City", "Technic", "Star Wars")[i % 3], (None, "Fire", "Police")[i % 4 % 3], 2000 + i * 7 % 11) for i in range(60)}
+    rollup = CatalogueRollup(sets.values())
+    assert views(rollup) == views(rescan(sets.values()))
+    city = rollup.theme("City")
+    assert city.setCount == 20 and city.subthemeCount == 2
+    assert (city.yearFrom, city.yearTo) == (min(s.year for s in sets.values() if s.theme == "City"), max(s.year for s in sets.values() if s.theme == "City"))
+    for i in range(0, 60, 4):
+        sets[i] = makeSet(i, "Technic", "Police", 1999)
+        assert rollup.update(sets[i])
+    for i in range(1, 60, 5):
+        rollup.delete(i)
+        del sets[i]
+    assert views(rollup) == views(rescan(sets.values()))
+    assert rollup.theme("Technic").yearFrom == 1999
+    assert [y.year for y in rollup.years("Technic")][0] == "1999"
+    for i in [i for i in sets if sets[i].year == 1999]:
+        rollup.delete(i)
+        del sets[i]
+    assert views(rollup) == views(rescan(sets.values()))
+    assert rollup.theme("Technic").yearFrom == 2000
+    assert rollup.theme("Nope") is None and rollup.subthemes("Nope") == [] and rollup.themeCount("Nope") == 0
+
+
+def test_empty_theme_is_dropped():
+    rollup = CatalogueRollup([makeSet(1, "City", "Fire", 2010)])
+    rollup.insert(makeSet(1, "Technic", None, 2011))
+    assert [t.theme for t in rollup.themes()] == ["Technic"]
+    assert rollup.theme("Technic").subthemeCount == 0
+    rollup.delete(1)
+    assert rollup.themes() == [] and len(rollup) == 0
+
+
+def test_rollup_wraps_index_in_sync():
+    async def run():
+        async with makeServer(6) as server, BricksetClient("key", baseURL=server.url) as client:
+            server.handlers["getThemes"] = lambda query: server.success(themes=[{"theme": "City", "setCount": 3}, {"theme": "Star Wars", "setCount": 3}])
+            index = SetIndex()
+            rollup = CatalogueRollup(index=index)
+            await CatalogueSync(client, rollup, pageSize=2).sync()
+            assert len(index) == len(rollup) == 6
+            assert [(t.theme, t.setCount) for t in await rollup.getThemes()] == [("City", 3), ("Star Wars", 3)]
+            assert views(CatalogueRollup(index=index)) == views(rollup)
+            assert (await rollup.getYears("City"))[0].year == str(index.get(0).year)
+    asyncio.run(run())
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from brickset.client import BricksetClient
+from brickset.scheduler import BULK, INTERACTIVE, QuotaExceededError, RequestScheduler
+
+from bricksetserver import FakeBricksetServer
+
+
+def test_priority_and_key_spreading():
+    async def run():
+        scheduler = RequestScheduler(["a", "b"], dailyQuota=100, rate=50, burst=1)
+        order = []
+
+        async def call(name, level):
+            with scheduler.priority(level):
+                key = await scheduler.acquire()
+            order.append((name, key))
+
+        tasks = [asyncio.create_task(call(f"bulk{i}", BULK)) for i in range(4)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(call("interactive", INTERACTIVE)))
+        await asyncio.gather(*tasks)
+        # first bulk request took the only token, the interactive one overtakes the rest
+        assert [name for name, _ in order][:2] == ["bulk0", "interactive"]
+        assert {key for _, key in order} == {"a", "b"}
+        assert scheduler.keys[0].used + scheduler.keys[1].used == 5
+    asyncio.run(run())
+
+
+def test_quota_and_bulk_reserve():
+    async def run():
+        scheduler = RequestScheduler(["a"], dailyQuota=3, rate=1000, burst=10, bulkReserve=1)
+        with scheduler.priority(BULK):
+            await scheduler.acquire()
+            await scheduler.acquire()
+            with pytest.raises(QuotaExceededError):
+                await scheduler.acquire()
+        assert await scheduler.acquire() == "a"
+        with pytest.raises(QuotaExceededError):
+            await scheduler.acquire()
+    asyncio.run(run())
+
+
+def test_client_uses_scheduler_and_live_usage():
+    async def run():
+        async with FakeBricksetServer() as server:
+            scheduler = RequestScheduler(["k1", "k2"], dailyQuota=20, rate=1000, burst=10)
+            async with BricksetClient("unused", baseURL=server.url, scheduler=scheduler) as client:
+                server.handlers["getKeyUsageStats"] = lambda query: server.success(apiKeyUsage=[{"dateStamp": None, "count": 7},
+                    {"dateStamp": f"{scheduler.keys[0].day.isoformat()}T00:00:00Z", "count": 15 if query["apiKey"] == "k1" else 2}])
+                await scheduler.refreshUsage(client)
+                assert [key.used for key in scheduler.keys] == [15, 2]
+                await asyncio.gather(*(client.getThemes() for _ in range(4)))
+                assert {query["apiKey"] for method, query, _ in server.calls if method == "getThemes"} == {"k2"}
+    asyncio.run(run())
@@ -0,0 +1,58 @@
+from brickset.search import SearchIndex, stripHTML
+from brickset.types import Reviews, Sets
+
+from test_types import SET_JSON
+
+
+def makeIndex():
+    index = SearchIndex()
+    index.addSets([
+        Sets.deJson(dict(SET_JSON, setID=1, name="Millennium Falcon", extendedData={"tags": ["Ultimate Collector Series"], "description": "The fastest hunk of junk"})),
+        Sets.deJson(dict(SET_JSON, setID=2, name="Falcon Fighter", extendedData={"description": "A small collector model"})),
+        Sets.deJson(dict(SET_JSON, setID=3, name="Fire Station", extendedData={})),
+    ])
+    return index
+
+
+def test_words_prefixes_and_phrases():
+    index = makeIndex()
+    assert [setID for setID, _ in index.search("falcon")] == [2, 1]
+    assert {setID for setID, _ in index.search("fa*")} == {1, 2}
+    assert {setID for setID, _ in index.search("f*")} == {1, 2, 3}
+    assert [setID for setID, _ in index.search('"ultimate collector"')] == [1]
+    assert [setID for setID, _ in index.search('"collector model" falc*')] == [2]
+    # fields are not joined into phrases
+    assert index.search('"falcon ultimate"') == []
+    assert index.search("falcon station") == []
+
+
+def test_ranking_prefers_frequent_words_in_short_documents():
+    index = makeIndex()
+    index.addReviews(1, [Reviews("a", None, None, "Falcon!", "falcon falcon", False)])
+    assert index.search("falcon")[0][0] == 1
+
+
+def test_reviews_html_is_stripped_and_documents_replaced():
+    index = makeIndex()
+    assert stripHTML("<p>Great&nbsp;<b>build</b></p>").split() == ["Great", "build"]
+    index.addReviews(3, [Reviews("a", None, None, "Fun", "<p class='x'>Great <b>fire</b>truck &amp; ladder</p>", True)])
+    assert [setID for setID, _ in index.search("ladder")] == [3]
+    assert index.search("class") == []
+    assert [setID for setID, _ in index.search('"fire truck"')] == [3]
+    index.addSet(Sets.deJson(dict(SET_JSON, setID=3, name="Police Station", extendedData={})))
+    assert [setID for setID, _ in index.search("fire")] == [3]
+    assert [setID for setID, _ in index.search("police ladder")] == [3]
+    index.remove(3)
+    assert index.search("ladder") == []
+    assert "ladder" not in index.postings
+    assert len(index) == 2
+
+
+def test_vocabulary_follows_changes_after_expand():
+    index = makeIndex()
+    assert index.expand("f") == ["falcon", "fastest", "fighter", "fire"]
+    vocabulary = index._vocabulary
+    index.addSet(Sets.deJson(dict(SET_JSON, setID=4, name="Fairground Mixer", extendedData={})))
+    index.remove(3)
+    assert index._vocabulary is vocabulary and vocabulary == sorted(index.postings)
+    assert index.expand("f") == ["fairground", "falcon", "fastest", "fighter"]
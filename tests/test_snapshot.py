@@ -0,0 +1,43 @@
+import pytest
+
+from brickset.snapshot import load_snapshot, save_snapshot
+from brickset.types import Sets
+
+from test_types import SET_JSON
+
+
+def assertSame(loaded, expected):
+    for name in type(expected).__slots__:
+        value = getattr(loaded, name)
+        if hasattr(value, "__slots__"):
+            assertSame(value, getattr(expected, name))
+        else:
+            assert value == getattr(expected, name), name
+
+
+def test_round_trip(tmp_path):
+    original = [Sets.deJson(dict(SET_JSON, setID=setID, pieces=None if setID == 3 else 100)) for setID in (5, 3, 9)]
+    path = str(tmp_path / "catalogue.bsn")
+    save_snapshot(original, path)
+    with load_snapshot(path) as snapshot:
+        assert len(snapshot) == 3
+        assert [s.setID for s in snapshot] == [3, 5, 9]
+        loaded = snapshot.get(5)
+        expected = original[0]
+        assertSame(loaded, expected)
+        assert loaded.legoCom.US.dateFirstAvailable == expected.legoCom.US.dateFirstAvailable
+        assert loaded.legoCom.CA.retailPrice is None
+        assert loaded.extendedData.tags == ["Modular", "Dentist"]
+        assert loaded.collection.owned is None
+        assert snapshot[0].pieces is None
+        assert snapshot[0].theme is snapshot[2].theme
+        assert snapshot.get(4) is None
+        with pytest.raises(IndexError):
+            snapshot[3]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        load_snapshot(str(path))
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from brickset.client import BricksetClient
+from brickset.store import LocalStore
+from brickset.sync import CatalogueSync
+from brickset.types import Sets
+
+from test_client import makeServer
+from test_types import SET_JSON
+
+
+def makeStore():
+    store = LocalStore()
+    store.insertMany(Sets.deJson(dict(SET_JSON, setID=i, number=str(100 + i % 4), numberVariant=1 + i // 4, name=f"Set {i}", year=2010 + i % 3,
+                                      theme="City" if i % 2 else "Technic", pieces=(i + 1) * 10, extendedData={"tags": ["Fire"] if i < 3 else ["Police"]}))
+                     for i in range(12))
+    return store
+
+
+def test_filters_and_paging():
+    store = makeStore()
+    sets, matches = store.query(theme="city", pageSize=2, pageNumber=2)
+    assert matches == 6
+    assert [s.setID for s in sets] == [9, 3]
+    assert [s.setID for s in store.query(theme="City,Technic", year="2010", pageSize=50)[0]] == [0, 9, 6, 3]
+    assert [s.setID for s in store.query(setNumber="101-2,102")[0]] == [5, 2, 6, 10]
+    assert [s.setID for s in store.query(tag="fire")[0]] == [0, 1, 2]
+    assert [s.setID for s in store.query(query="technic fir")[0]] == [0, 2]
+    assert [s.setID for s in store.query(setID="4,5", orderBy="PiecesDESC")[0]] == [5, 4]
+    assert store.query(pageSize=1000)[1] == 12 and len(store.query(pageSize=1000)[0]) == 12
+    with pytest.raises(ValueError):
+        store.query(orderBy="Colour")
+    with pytest.raises(ValueError):
+        store.query(colour="red")
+
+
+def test_stored_sets_keep_no_encodings():
+    s = Sets.deJson(dict(SET_JSON, setID=1))
+    LocalStore().insertMany([s])
+    assert type(s) is Sets and not hasattr(s, "_encoded")
+
+
+def test_same_results_as_client():
+    async def run():
+        async with makeServer(30) as server, BricksetClient("key", baseURL=server.url) as client:
+            store = LocalStore()
+            store.insertMany(await client.getAllSets(pageSize=7))
+            for source in (client, store):
+                assert [s.setID for s in await source.getSets(theme="City", pageSize=4, pageNumber=3)] == [16, 18, 20, 22]
+                assert [s.setID async for s in source.iterSets(pageSize=4, theme="Star Wars")] == list(range(1, 30, 2))
+            assert (await store.getSets(setID=5))[0].to_json() == (await client.getSets(setID=5))[0].to_json()
+    asyncio.run(run())
+
+
+def test_store_is_kept_by_sync():
+    async def run():
+        async with makeServer(6) as server, BricksetClient("key", baseURL=server.url) as client:
+            server.handlers["getThemes"] = lambda query: server.success(themes=[{"theme": "City", "setCount": 3}])
+            store = LocalStore()
+            report = await CatalogueSync(client, store, pageSize=2).sync()
+            assert report.added == 3 and len(store) == 3
+            assert store.themeCount("City") == 3
+            assert store.update(store.get(0)) is False
+            assert store.delete(0).setID == 0 and 0 not in store
+    asyncio.run(run())
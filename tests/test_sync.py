@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+from brickset.cache import ResponseCache
+from brickset.client import BricksetClient
+from brickset.sync import CatalogueSync
+
+from bricksetserver import FakeBricksetServer
+from test_types import SET_JSON
+
+
+def makeSet(setID, lastUpdated, theme="City"):
+    return dict(SET_JSON, setID=setID, theme=theme, lastUpdated=lastUpdated)
+
+
+def test_incremental_sync(tmp_path):
+    async def run():
+        server = FakeBricksetServer([makeSet(i, "2024-01-0%dT10:00:00Z" % (i + 1)) for i in range(5)])
+        server.handlers["getThemes"] = lambda query: server.success(themes=[{"theme": "City", "setCount": sum(s["theme"] == "City" for s in server.sets)}])
+        statePath = str(tmp_path / "marks.json")
+        async with server, BricksetClient("key", baseURL=server.url) as client:
+            sync = CatalogueSync(client, statePath=statePath, pageSize=2)
+            report = await sync.sync()
+            assert (report.added, report.changed, report.removed) == (5, 0, 0)
+            assert sync.marks["City"].startswith("2024-01-05")
+
+            report = await sync.sync()
+            assert (report.added, report.changed, report.removed) == (0, 0, 0)
+            since = [call for call in server.calls if "updatedSince" in call[1].get("params", "")]
+            assert since and all('"2024-01-05"' in call[1]["params"] for call in since)
+
+            server.sets[1] = makeSet(1, "2024-02-01T00:00:00Z")
+            server.sets.append(makeSet(9, "2024-02-02T00:00:00Z"))
+            del server.sets[3]
+            sync = CatalogueSync(client, sync.index, statePath=statePath, pageSize=2)
+            report = await sync.sync()
+            assert (report.added, report.changed, report.removed) == (1, 1, 1)
+            assert sorted(s.setID for s in sync.index) == [0, 1, 2, 4, 9]
+            assert sync.marks["City"].startswith("2024-02-02")
+    asyncio.run(run())
+
+
+def test_one_incremental_call_and_removals_behind_cache():
+    async def run():
+        server = FakeBricksetServer([makeSet(i, "2024-01-0%dT10:00:00Z" % (i + 1), ("City", "Technic", "Ideas")[i % 3]) for i in range(9)])
+        def themes(query):
+            counts = {}
+            for s in server.sets:
+                counts[s["theme"]] = counts.get(s["theme"], 0) + 1
+            return server.success(themes=[{"theme": theme, "setCount": count} for theme, count in counts.items()])
+        server.handlers["getThemes"] = themes
+        async with server, BricksetClient("key", baseURL=server.url, cache=ResponseCache()) as client:
+            sync = CatalogueSync(client, pageSize=100)
+            assert (await sync.sync()).added == 9
+            assert sum(call[0] == "getSets" for call in server.calls) == 1
+
+            # City loses set 0 and gains set 20, Technic loses set 1
+            server.sets = [s for s in server.sets if s["setID"] not in (0, 1)] + [makeSet(20, "2024-03-01T00:00:00Z")]
+            server.calls.clear()
+            report = await sync.sync()
+            assert (report.added, report.changed, report.removed) == (1, 0, 2)
+            assert sorted(s.setID for s in sync.index) == [2, 3, 4, 5, 6, 7, 8, 20]
+            assert [call[0] for call in server.calls].count("getThemes") == 1
+            fullThemes = sorted(json.loads(call[1]["params"]).get("theme", "") for call in server.calls if call[0] == "getSets")
+            assert fullThemes == ["", "City", "Technic"]
+
+            server.calls.clear()
+            assert str(await sync.sync()) == "0 added, 0 changed, 0 removed"
+            assert [call[0] for call in server.calls] == ["getThemes", "getSets"]
+    asyncio.run(run())
@@ -0,0 +1,83 @@
+import pytest
+
+from brickset.table import SetTable, aggregateValues
+from brickset.types import Sets
+
+from test_types import SET_JSON
+
+
+def makeSets():
+    rows = [
+        ("Star Wars", 2019, 500, 49.99),
+        ("Star Wars", 2019, 1500, None),
+        ("Star Wars", 2020, None, 99.99),
+        ("City", 2019, 300, 29.99),
+    ]
+    legoCom = SET_JSON["LEGOCom"]
+    return [Sets.deJson(dict(SET_JSON, setID=i, theme=theme, year=year, pieces=pieces, LEGOCom=dict(legoCom, US={"retailPrice": price})))
+            for i, (theme, year, pieces, price) in enumerate(rows)]
+
+
+def test_columns_and_masks():
+    table = SetTable.fromSets(makeSets())
+    assert len(table) == 4
+    assert table.column("pieces") == [500, 1500, None, 300]
+    assert table.categories["theme"] == ["Star Wars", "City"]
+    assert list(table.codes["theme"]) == [0, 0, 0, 1]
+    assert table.column("height") == [48.0] * 4
+
+
+def test_filter_group_and_aggregate():
+    table = SetTable.fromSets(makeSets())
+    starWars = table.filter("theme", "==", "Star Wars")
+    assert list(starWars.setID) == [0, 1, 2]
+    assert list(starWars.filter("year", ">=", 2020).setID) == [2]
+    assert list(table.filter("theme", "==", "Ninjago").setID) == []
+    assert table.aggregate("pieces", "mean") == pytest.approx(2300 / 3)
+    assert table.groupBy(("theme", "year"), "pieces", "mean") == {("Star Wars", 2019): 1000, ("City", 2019): 300}
+    assert table.groupBy("theme") == {"Star Wars": 3, "City": 1}
+    assert table.histogram("pieces", [0, 1000, 2000]) == [2, 1]
+
+
+def test_divide():
+    table = SetTable.fromSets(makeSets())
+    values, mask = table.divide("USRetailPrice", "pieces")
+    assert list(mask) == [1, 0, 0, 1]
+    assert values[0] == pytest.approx(0.09998)
+
+
+def test_filtered_views():
+    table = SetTable.fromSets(makeSets())
+    view = table.filter("theme", "in", ["Star Wars"]).filter("pieces", "<", 1000)
+    assert list(view.setID) == [0] and len(view) == 1
+    assert view.column("USRetailPrice") == [49.99] and view.column("theme") == ["Star Wars"]
+    assert list(table.filter("pieces", "<", 1000).setID) == [0, 3]
+    assert list(table.filter("setID", "in", {1, 3}).filter("year", "==", 2019).setID) == [1, 3]
+    assert list(table.take([3, 0]).setID) == [3, 0] and list(view.take([0]).setID) == [0]
+    view.append(makeSets()[2])
+    assert list(view.setID) == [0, 2] and view.column("pieces") == [500, None]
+    assert len(table) == 4
+
+
+def test_missing_values_never_match():
+    sets = makeSets()
+    sets[1].subtheme = None
+    sets[3].pieces = 0
+    table = SetTable.fromSets(sets)
+    subtheme = sets[0].subtheme
+    assert list(table.filter("subtheme", "!=", "Other").setID) == [0, 2, 3]
+    assert list(table.filter("subtheme", "==", subtheme).setID) == [0, 2, 3]
+    assert list(table.filter("subtheme", "==", None).setID) == []
+    assert list(table.filter("subtheme", "in", [subtheme, None]).setID) == [0, 2, 3]
+    assert list(table.filter("pieces", "!=", 500).setID) == [1, 3]
+    assert table.groupBy(("subtheme", "pieces")) == {(subtheme, 500): 1, (None, 1500): 1, (subtheme, None): 1, (subtheme, 0): 1}
+    assert table.groupBy("theme", "USRetailPrice", "max") == {"Star Wars": 99.99, "City": 29.99}
+    values, mask = table.divide("USRetailPrice", "pieces")
+    assert list(mask) == [1, 0, 0, 0] and list(values) == [pytest.approx(0.09998), 0.0, 0.0, 0.0]
+
+
+def test_aggregate_values():
+    assert aggregateValues([1, 2, 3], "sum") == 6 and aggregateValues([], "mean") is None
+    assert aggregateValues([2, 4], "std") == 1.0 and aggregateValues([], "count") == 0
+    with pytest.raises(ValueError):
+        aggregateValues([1], "median")
@@ -1 +1,115 @@
-# TODO: implement tests for all types
+import io
+import json
+from datetime import date
+
+import pytest
+
+from brickset.types import ApiKeyUsage, Reviews, Sets, Themes
+
+SET_JSON = {
+    "setID": 26725,
+    "number": "10255",
+    "numberVariant": 1,
+    "name": "Assembly Square",
+    "year": 2017,
+    "theme": "Creator Expert",
+    "themeGroup": "Model making",
+    "subtheme": "Modular Buildings Collection",
+    "category": "Normal",
+    "released": True,
+    "pieces": 4002,
+    "minifigs": 8,
+    "image": {"thumbnailURL": "https://images.brickset.com/sets/small/10255-1.jpg", "imageURL": "https://images.brickset.com/sets/images/10255-1.jpg"},
+    "bricksetURL": "https://brickset.com/sets/10255-1",
+    "collection": {},
+    "collections": {"ownedBy": 15000, "wantedBy": 5000},
+    "LEGOCom": {
+        "US": {"retailPrice": 279.99, "dateFirstAvailable": "2017-01-01T00:00:00Z", "dateLastAvailable": "2019-12-31T00:00:00Z"},
+        "UK": {"retailPrice": 199.99},
+        "CA": {},
+        "DE": {"retailPrice": 229.99, "dateFirstAvailable": "2017-01-01T00:00:00Z"},
+    },
+    "rating": 4.6,
+    "reviewCount": 12,
+    "packagingType": "Box",
+    "availability": "Retail",
+    "instructionsCount": 6,
+    "additionalImageCount": 20,
+    "ageRange": {"min": 16},
+    "dimensions": {"height": 48.0, "width": 58.0, "depth": 12.0, "weight": 4.1},
+    "barcode": {"EAN": "5702015869935", "UPC": "673419266727"},
+    "extendedData": {"tags": ["Modular", "Dentist"], "description": "A big building"},
+    "lastUpdated": "2021-03-04T14:02:16.37Z",
+}
+
+
+def makeResponse(count):
+    sets = []
+    for i in range(count):
+        obj = dict(SET_JSON, setID=i, name=f"Set {i} ✓")
+        sets.append(obj)
+    return json.dumps({"status": "success", "matches": count, "sets": sets}).encode("utf-8")
+
+
+def test_sets_dejson_builds_nested_objects():
+    s = Sets.deJson(json.dumps(SET_JSON))
+    assert s.setID == 26725
+    assert s.image.imageURL.endswith("10255-1.jpg")
+    assert s.legoCom.US.retailPrice == 279.99
+    assert s.legoCom.US.dateLastAvailable == date(2019, 12, 31)
+    assert s.legoCom.CA.retailPrice is None
+    assert s.ageRange.min_s == 16 and s.ageRange.max_s is None
+    assert s.collection.owned is None
+    assert s.collections.ownedBy == 15000
+    assert s.barcode.EAN == "5702015869935"
+    assert s.extendedData.tags == ["Modular", "Dentist"]
+    assert s.lastUpdated.date() == date(2021, 3, 4)
+
+
+def test_other_types_dejson():
+    usage = ApiKeyUsage.deJson({"dateStamp": "2020-06-12T00:00:00Z", "count": 42})
+    assert usage.dateStamp == date(2020, 6, 12) and usage.count == 42
+    theme = Themes.deJson('{"theme": "Star Wars", "setCount": 900, "subthemeCount": 60, "yearFrom": 1999, "yearTo": 2024}')
+    assert str(theme) == "Star Wars produced in 1999-2024"
+    review = Reviews.deJson({"author": "a", "datePosted": "2020-01-01T10:00:00Z", "rating": {"overall": 5, "parts": 4}, "title": "t", "review": "r", "HTML": False})
+    assert review.rating.overall == 5 and review.rating.playability is None
+
+
+@pytest.mark.parametrize("chunkSize", [1, 7, 65536])
+def test_iter_from_stream(chunkSize):
+    data = makeResponse(25)
+    sets = list(Sets.iter_from_stream(io.BytesIO(data), chunkSize))
+    assert [s.setID for s in sets] == list(range(25))
+    assert sets[3].name == "Set 3 ✓"
+    assert sets[3].legoCom.DE.retailPrice == 229.99
+
+
+def test_iter_from_stream_empty_and_error():
+    assert list(Sets.iter_from_stream(io.BytesIO(b'{"status": "success", "matches": 0, "sets": []}'))) == []
+    with pytest.raises(ValueError):
+        list(Sets.iter_from_stream(io.BytesIO(b'{"status": "error", "message": "Invalid API key"}')))
+    with pytest.raises(ValueError):
+        list(Sets.iter_from_stream(io.BytesIO(makeResponse(3)[:-40])))
+
+
+def test_types_have_no_instance_dict():
+    s = Sets.deJson(SET_JSON)
+    for obj in (s, s.image, s.legoCom, s.legoCom.US, s.dimensions, s.extendedData):
+        assert not hasattr(obj, "__dict__")
+    with pytest.raises(AttributeError):
+        s.unknownField = 1
+
+
+def test_lazy_nested_objects():
+    s = Sets.deJson(SET_JSON, lazy=True)
+    assert type(Sets.__dict__["legoCom"].slot.__get__(s)) is dict
+    assert s.image.imageURL.endswith("10255-1.jpg")
+    legoCom = s.legoCom
+    assert legoCom.US.retailPrice == 279.99
+    assert s.legoCom is legoCom
+    assert s.extendedData.tags == ["Modular", "Dentist"]
+    assert s.ageRange.min_s == 16
+    s.dimensions = None
+    assert s.dimensions is None
+    lazy = list(Sets.iter_from_stream(io.BytesIO(makeResponse(2)), lazy=True))
+    assert lazy[1].barcode.UPC == "673419266727"
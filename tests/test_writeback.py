@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+from brickset.client import BricksetClient
+from brickset.writeback import WriteBehindQueue
+
+from test_client import makeServer
+
+
+def sent(server):
+    return [(int(query["SetID"]), json.loads(query["params"])) for name, query, _ in server.calls if name == "setCollection"]
+
+
+def test_updates_are_coalesced_and_flushed_on_timer():
+    async def run():
+        async with makeServer() as server, BricksetClient("key", "hash", baseURL=server.url) as client:
+            async with WriteBehindQueue(client, delay=0.02) as queue:
+                await queue.setCollection(1, want=1)
+                queue.put(1, want=0)
+                queue.put(2, own=1, qtyOwned=1)
+                queue.put(1, rating=4)
+                assert queue.pending == {1: {"want": 0, "rating": 4}, 2: {"own": 1, "qtyOwned": 1}}
+                assert sent(server) == []
+                await asyncio.sleep(0.1)
+                assert sorted(sent(server), key=lambda call: call[0]) == [(1, {"want": 0, "rating": 4}), (2, {"own": 1, "qtyOwned": 1})]
+                assert len(queue) == 0 and queue.upstreamCalls == 2 and queue.updates == 4
+    asyncio.run(run())
+
+
+def test_size_threshold_flushes_at_once():
+    async def run():
+        async with makeServer() as server, BricksetClient("key", "hash", baseURL=server.url) as client:
+            async with WriteBehindQueue(client, delay=60, maxPending=3) as queue:
+                for setID in range(3):
+                    queue.put(setID, own=1)
+                await asyncio.sleep(0.05)
+                assert sorted(setID for setID, _ in sent(server)) == [0, 1, 2]
+    asyncio.run(run())
+
+
+def test_failed_calls_are_retried_with_backoff():
+    async def run():
+        async with makeServer() as server, BricksetClient("key", "hash", baseURL=server.url) as client:
+            failures = {"left": 2}
+            def setCollection(query):
+                if query["SetID"] == "5" and failures["left"]:
+                    failures["left"] -= 1
+                    return 200, {}, json.dumps({"status": "error", "message": "try later"}).encode("utf-8")
+                return server.success()
+            server.handlers["setCollection"] = setCollection
+            async with WriteBehindQueue(client, delay=0.01, backoff=0.01, retries=5) as queue:
+                queue.put(5, want=1)
+                queue.put(6, want=1)
+                await asyncio.sleep(0.02)
+                queue.put(5, notes="gift")
+                await asyncio.sleep(0.2)
+                assert len(queue) == 0 and not queue.errors
+                assert sent(server)[-1] == (5, {"want": 1, "notes": "gift"})
+            async with WriteBehindQueue(client, delay=0.01, retries=1) as queue:
+                failures["left"] = 1
+                queue.put(5, want=0)
+                assert (await queue.flush())[5] is not None
+                assert list(queue.errors) == [5] and len(queue) == 0
+                assert queue.failed == {5: {"want": 0}}
+    asyncio.run(run())
+
+
+def test_failed_updates_are_kept_until_sent(tmp_path):
+    path = str(tmp_path / "writes.log")
+    async def run():
+        async with makeServer() as server, BricksetClient("key", "hash", baseURL=server.url) as client:
+            server.handlers["setCollection"] = lambda query: (500, {}, b"down")
+            queue = WriteBehindQueue(client, path, delay=60, retries=1)
+            queue.put(1, own=1)
+            await queue.flush()
+            queue.put(1, notes="x")
+            await queue.close()
+            assert queue.failed == {1: {"own": 1, "notes": "x"}} and list(queue.errors) == [1]
+            queue = WriteBehindQueue(client, path, delay=60, retries=1)
+            assert queue.pending == {1: {"own": 1, "notes": "x"}}
+            await queue.flush()
+            assert queue.failed == {1: {"own": 1, "notes": "x"}}
+            server.handlers["setCollection"] = lambda query: server.success()
+            queue.put(2, want=1)
+            await queue.flush()
+            assert queue.failed == {} and not queue.errors
+            assert sorted(sent(server)[-2:], key=lambda call: call[0]) == [(1, {"own": 1, "notes": "x"}), (2, {"want": 1})]
+            await queue.close()
+            queue = WriteBehindQueue(client, path)
+            assert queue.pending == {}
+            await queue.close()
+    asyncio.run(run())
+
+
+def test_log_replays_unsent_updates(tmp_path):
+    path = str(tmp_path / "writes.log")
+    async def run():
+        async with makeServer() as server, BricksetClient("key", "hash", baseURL=server.url) as client:
+            server.handlers["setCollection"] = lambda query: (500, {}, b"down")
+            queue = WriteBehindQueue(client, path, delay=60, retries=10)
+            queue.put(1, own=1)
+            queue.put(2, want=1)
+            await queue.flush()
+            queue.put(2, notes="x")
+            # crash - the queue is never closed
+            queue._log.close()
+            with open(path, "ab") as file:
+                file.write(b'{"setID":3,"par')
+            server.handlers["setCollection"] = lambda query: server.success()
+            queue = WriteBehindQueue(client, path, delay=60)
+            assert queue.pending == {1: {"own": 1}, 2: {"want": 1, "notes": "x"}}
+            await queue.close()
+            assert sorted(sent(server)[-2:], key=lambda call: call[0]) == [(1, {"own": 1}), (2, {"want": 1, "notes": "x"})]
+            queue = WriteBehindQueue(client, path)
+            assert queue.pending == {}
+            await queue.close()
+    asyncio.run(run())